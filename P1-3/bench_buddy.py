@@ -0,0 +1,149 @@
+# bench_buddy.py
+# Kevin Briceño 15-11661
+# Benchmark reproducible del buddy allocator.
+
+"""
+Cargas sintéticas con semilla fija para comparar backends y políticas:
+
+- suite "workloads": tamaños uniformes o con ley de potencia, combinados con
+  patrones de liberación LIFO, FIFO o al azar. Reporta ops/s, memoria pico
+  (tracemalloc, en una pasada aparte para no afectar el tiempo), reservas
+  fallidas y fragmentación externa promedio / interna final.
+- suite "policies": compara las políticas de colocación ("first", "lowest",
+  "highest", "nearest") en ambos backends sobre una misma traza.
+
+Con --debug cada operación va seguida de check_invariants() (mucho más lento;
+sirve para fuzzing de la implementación con cargas grandes).
+
+Uso:
+    python bench_buddy.py [--suite workloads|policies|all] [--ops 200000]
+                          [--arena 65536] [--seed 1] [--debug]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from buddy import POLICIES, BuddyError, make_allocator
+
+Op = Tuple[str, int, str]  # ("R", k, name) | ("F", 0, name)
+
+# distribuciones de tamaño: rng -> k
+SIZES: Dict[str, Callable[[random.Random], int]] = {
+    "uniform": lambda rng: rng.randint(1, 64),
+    # ley de potencia (Pareto, alfa = 1.2): muchos tamaños chicos y una cola larga
+    "powerlaw": lambda rng: min(1024, int(rng.paretovariate(1.2))),
+    # mezcla usada por la suite de políticas
+    "mixed": lambda rng: rng.randint(1, 4) if rng.random() < 0.8 else rng.randint(5, 512),
+}
+
+# patrones de liberación: elige el índice de la asignación viva a liberar
+FREE_PATTERNS: Dict[str, Callable[[random.Random, int], int]] = {
+    "lifo": lambda rng, n: n - 1,
+    "fifo": lambda rng, n: 0,
+    "random": lambda rng, n: rng.randrange(n),
+}
+
+def synthetic_trace(ops: int, arena: int, seed: int, sizes: str = "mixed",
+                    pattern: str = "random") -> List[Op]:
+    """Traza con la distribución de tamaños y el patrón de liberación indicados;
+    la ocupación pedida oscila alrededor del 70% del arena."""
+    rng = random.Random(seed)
+    size_of = SIZES[sizes]
+    pick = FREE_PATTERNS[pattern]
+    trace: List[Op] = []
+    live: List[Tuple[str, int]] = []
+    used = 0
+    for i in range(ops):
+        if live and (used > arena * 7 // 10 or rng.random() < 0.45):
+            name, k = live.pop(pick(rng, len(live)))
+            used -= k
+            trace.append(("F", 0, name))
+        else:
+            k = size_of(rng)
+            name = f"n{i}"
+            live.append((name, k))
+            used += k
+            trace.append(("R", k, name))
+    return trace
+
+def run(trace: List[Op], arena: int, backend: str, policy: str = "first",
+        debug: bool = False) -> Dict[str, float]:
+    """Ejecuta la traza y devuelve ops/s, fallos y fragmentación."""
+    allocator = make_allocator(arena, backend, policy=policy, debug=debug)
+    reserve = allocator.reserve
+    free = allocator.free
+    failed = set()
+    frag_samples: List[float] = []
+    # pista de localidad para "nearest": junto a la reserva anterior
+    last = 0
+    began = time.perf_counter()
+    for i, (kind, k, name) in enumerate(trace):
+        if kind == "R":
+            try:
+                last = reserve(k, name, last)[0]
+            except BuddyError:
+                failed.add(name)
+        elif name not in failed:
+            free(name)
+        if i % 1000 == 0:
+            frag_samples.append(allocator.stats()["external_fragmentation"])
+    elapsed = time.perf_counter() - began
+    return {
+        "ops_per_sec": len(trace) / elapsed,
+        "failures": len(failed),
+        "external_fragmentation": sum(frag_samples) / len(frag_samples),
+        "internal_fragmentation": allocator.stats()["internal_fragmentation"],
+    }
+
+def peak_memory(trace: List[Op], arena: int, backend: str) -> int:
+    """Memoria pico (bytes) asignada por Python durante la traza, según tracemalloc."""
+    tracemalloc.start()
+    try:
+        run(trace, arena, backend)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def suite_workloads(args: argparse.Namespace) -> None:
+    print(f"{'backend':8} {'sizes':9} {'free':7} {'ops/s':>10} {'pico KiB':>9} "
+          f"{'fallos':>7} {'frag.ext':>9} {'frag.int':>9}")
+    for sizes in ("uniform", "powerlaw"):
+        for pattern in FREE_PATTERNS:
+            trace = synthetic_trace(args.ops, args.arena, args.seed, sizes, pattern)
+            for backend in ("lists", "tree", "cached"):
+                r = run(trace, args.arena, backend, debug=args.debug)
+                peak = peak_memory(trace, args.arena, backend)
+                print(f"{backend:8} {sizes:9} {pattern:7} {r['ops_per_sec']:10.0f} {peak / 1024:9.0f} "
+                      f"{r['failures']:7d} {r['external_fragmentation']:9.3f} "
+                      f"{r['internal_fragmentation']:9.3f}")
+
+def suite_policies(args: argparse.Namespace) -> None:
+    trace = synthetic_trace(args.ops, args.arena, args.seed)
+    print(f"{'backend':8} {'policy':8} {'ops/s':>10} {'fallos':>7} {'frag.ext':>9}")
+    for backend in ("lists", "tree"):
+        for policy in POLICIES:
+            r = run(trace, args.arena, backend, policy, debug=args.debug)
+            print(f"{backend:8} {policy:8} {r['ops_per_sec']:10.0f} {r['failures']:7d} "
+                  f"{r['external_fragmentation']:9.3f}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark reproducible del buddy allocator")
+    parser.add_argument("--suite", choices=("workloads", "policies", "all"), default="all")
+    parser.add_argument("--ops", type=int, default=200_000)
+    parser.add_argument("--arena", type=int, default=1 << 16)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--debug", action="store_true",
+                        help="verificar invariantes después de cada operación")
+    args = parser.parse_args()
+    if args.suite in ("workloads", "all"):
+        suite_workloads(args)
+    if args.suite == "all":
+        print()
+    if args.suite in ("policies", "all"):
+        suite_policies(args)
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,24 @@
 
 """
 API principal:
-- BuddyAllocator(total_blocks)
-- reserve(k_blocks, name) -> (start, order)
+- BuddyAllocator(total_blocks, policy="first") -> backend de listas libres por order
+- BuddyTreeAllocator(total_blocks)  -> backend de árbol compacto (bytearray, ~2N bytes)
+- make_allocator(total_blocks, backend="lists"|"tree"|"cached")
+- CachedBuddyAllocator(total_blocks, high_water=8, max_cached_order=2) -> caché de bloques pequeños
+- ConcurrentBuddyAllocator(total_blocks, stripes=8) -> seguro para hilos, un lock por subárbol
+- ShardedBuddyAllocator([sizes...], routing="size"|"hash") -> varios arenas independientes
+- reserve(k_blocks, name, hint=None) -> (start, order)
+- políticas de colocación: "first" | "lowest" | "highest" | "nearest" (cerca de hint)
 - free(name)
+- resize(name, new_k) -> (start, order, moved): achica/crece en el lugar si se puede
+- reserve_many([(k_blocks, name), ...]) / free_many(names) -> lotes todo o nada
 - show() -> str
-- run_cli(total_blocks) -> bucle interactivo (RESERVAR/LIBERAR/MOSTRAR/SALIR)
+- dump(fileobj) / BuddyAllocator.load(fileobj) -> snapshot binario compacto
+- stats() -> dict con contadores incrementales (fragmentación, splits, merges, fallos)
+- check_invariants() -> verificación completa; debug=True la ejecuta tras cada operación
+- run_cli(total_blocks, backend="lists") -> bucle interactivo (RESERVAR/LIBERAR/MOSTRAR/SALIR)
+- replay_trace(allocator, lines) -> reproduce una traza sin salida y resume throughput/latencias
+- python buddy.py [total_blocks] [--backend B] [--replay traza.txt]
 
 Notas:
 - total_blocks debe ser potencia de dos.
@@ -16,78 +29,231 @@ Notas:
 - 'order' significa tamaño = 2**order.
 """
 
+import argparse
+import io
+import itertools
+import mmap
+import re
+import struct
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left, insort
+from collections import deque
+from heapq import heapify, heappop, heappush
 from math import log2
-from typing import Dict, List, Tuple
+from typing import BinaryIO, Deque, Dict, Iterable, List, Optional, Tuple
+
+# formato binario de dump()/load(): cabecera + bitmaps por order + tabla de asignaciones
+_SNAPSHOT_MAGIC = b"BUDY"
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<4sBBxxQ")   # magic, versión, max_order, cantidad de asignaciones
+_SNAPSHOT_ENTRY = struct.Struct("<QBQH")       # start, order, unidades pedidas, largo del nombre
+_NONZERO_BYTE = re.compile(rb"[^\x00]")
+# _BYTE_BITS[v] = posiciones de los bits encendidos del byte v
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+
+def _bitmap_size(bits: int) -> int:
+    return (bits + 7) >> 3
 
 class BuddyError(Exception):
     """Excepción específica del manejador buddy."""
     pass
 
+class BuddyBatchError(BuddyError):
+    """Fallo de una operación por lotes. 'failures' mapea nombre -> motivo.
+    El estado del allocator queda como antes de la operación (todo o nada)."""
+
+    def __init__(self, failures: Dict[str, str]):
+        self.failures = failures
+        detail = "; ".join(f"{name}: {reason}" for name, reason in failures.items())
+        super().__init__(f"{len(failures)} elemento(s) del lote fallaron: {detail}")
+
+def _format_state(total: int, max_order: int, free_blocks: Dict[int, List[int]],
+                  allocated: Dict[str, Tuple[int,int]]) -> str:
+    """Formato común de show(): listas libres (de mayor a menor order) y asignaciones."""
+    lines = [f"Total blocks: {total} (orders 0..{max_order})", "Free lists:"]
+    for o in range(max_order, -1, -1):
+        size = 1 << o
+        lines.append(f"  order {o} (size={size}): {free_blocks[o]}")
+    lines.append("Allocations:")
+    for name, (start, order) in sorted(allocated.items()):
+        lines.append(f"  {name}: start={start}, size={1<<order} (order {order})")
+    return "\n".join(lines)
+
+# políticas de colocación para reserve (ver BuddyAllocator)
+POLICIES = ("first", "lowest", "highest", "nearest")
+
+class _PlacementIndex:
+    """Estructuras ordenadas por order que acompañan a _free_sets según la política:
+    - "lowest"/"highest": montículos (min / max) con borrado perezoso; la verdad
+      sigue siendo _free_sets, así que las entradas obsoletas se descartan al sacar.
+      Un order cuyo montículo supera el doble de sus bloques libres se compacta al
+      agregar o descartar, así que el tamaño queda acotado aunque nunca se saque de él.
+    - "nearest": listas ordenadas por start; bisect encuentra el vecino de la pista
+      en O(log n) (la inserción/borrado mueve memoria en C)."""
+
+    def __init__(self, policy: str, free_sets: Dict[int, Dict[int, None]]):
+        self.policy = policy
+        self.free_sets = free_sets
+        self.items: Dict[int, List[int]] = {o: [] for o in free_sets}
+
+    def push(self, order: int, start: int) -> None:
+        if self.policy == "nearest":
+            insort(self.items[order], start)
+        else:
+            heappush(self.items[order], start if self.policy == "lowest" else -start)
+            self._maybe_compact(order)
+
+    def discard(self, order: int, start: int) -> None:
+        if self.policy == "nearest":
+            items = self.items[order]
+            items.pop(bisect_left(items, start))
+        else:
+            self._maybe_compact(order)
+
+    def _maybe_compact(self, order: int) -> None:
+        """Reconstruye el montículo de 'order' sin entradas obsoletas si crece de más.
+        Entre dos compactaciones pasan Ω(n) operaciones, así que cuesta O(1) amortizado."""
+        items, free = self.items[order], self.free_sets[order]
+        if len(items) > 2 * len(free) + 16:
+            items[:] = [s if self.policy == "lowest" else -s for s in free]
+            heapify(items)
+
+    def pick(self, order: int, hint: int) -> int:
+        """Elige (y quita del índice) un start libre de 'order' según la política."""
+        items, free = self.items[order], self.free_sets[order]
+        if self.policy == "nearest":
+            pos = bisect_left(items, hint)
+            if pos == len(items) or (pos > 0 and hint - items[pos - 1] <= items[pos] - hint):
+                pos -= 1
+            return items.pop(pos)
+        while True:
+            start = heappop(items)
+            start = start if self.policy == "lowest" else -start
+            if start in free:
+                return start
+
 class BuddyAllocator:
-    """Clase que implementa un buddy allocator sencillo."""
+    """Clase que implementa un buddy allocator sencillo (backend de listas libres).
+
+    Las operaciones públicas (reserve/free/show) se apoyan en tres ganchos que
+    definen el almacenamiento de bloques libres y que las subclases pueden
+    redefinir: _take_block, _release_block y _free_blocks.
+
+    Con debug=True se llama a check_invariants() después de cada operación que
+    modifica el estado (lento; pensado para pruebas y fuzzing).
 
-    def __init__(self, total_blocks: int):
+    Políticas de colocación (policy):
+    - "first": el bloque libre insertado más recientemente (O(1), por defecto).
+    - "lowest" / "highest": la dirección más baja / más alta del order elegido
+      (montículos por order, O(log n)).
+    - "nearest": el bloque más cercano a la pista 'hint' de reserve dentro del
+      menor order disponible (listas ordenadas + bisect). Al dividir se conserva
+      la mitad del lado de la pista.
+    """
+
+    def __init__(self, total_blocks: int, policy: str = "first", debug: bool = False):
         # Validaciones iniciales
         if total_blocks <= 0:
             raise BuddyError("Total de bloques debe ser positivo")
         if (total_blocks & (total_blocks - 1)) != 0:
             raise BuddyError("Total de bloques debe ser potencia de dos (p. ej. 8, 16, 32)")
+        if policy not in POLICIES:
+            raise BuddyError(f"Política desconocida '{policy}'. Válidas: {', '.join(POLICIES)}")
+        self.policy = policy
+        self.debug = debug
         self.N = total_blocks
         self.max_order = int(log2(self.N))
-        # free_lists[order] = lista de starts libres para bloques de tamaño 2**order
-        self.free_lists: Dict[int, List[int]] = {o: [] for o in range(self.max_order + 1)}
-        # inicialmente todo libre en el order máximo, inicio 0
-        self.free_lists[self.max_order].append(0)
+        # contadores mantenidos incrementalmente (ver stats)
+        self.splits = 0
+        self.merges = 0
+        self.failures = 0
+        self._free_units = self.N
+        self._requested_units = 0
+        self._granted_units = 0
+        self._init_storage()
         # asignaciones activas: name -> (start, order)
         self.allocated: Dict[str, Tuple[int,int]] = {}
+        # unidades pedidas por cada asignación (k_blocks), para fragmentación interna
+        self._requested: Dict[str, int] = {}
+
+    def _init_storage(self) -> None:
+        """Inicializa la estructura de bloques libres con todo el arena libre."""
+        # _free_sets[order] = conjunto ordenado de starts libres para bloques de tamaño 2**order.
+        # Se usa un dict (start -> None) como conjunto: pertenencia, inserción y borrado en O(1)
+        # y, a diferencia de set, el orden de iteración es determinista (orden de inserción).
+        self._free_sets: Dict[int, Dict[int, None]] = {o: {} for o in range(self.max_order + 1)}
+        # índice ordenado auxiliar (sólo para políticas distintas de "first")
+        self._index = _PlacementIndex(self.policy, self._free_sets) if self.policy != "first" else None
+        # inicialmente todo libre en el order máximo, inicio 0
+        self._push_free(self.max_order, 0)
+
+    def _push_free(self, order: int, start: int) -> None:
+        self._free_sets[order][start] = None
+        if self._index is not None:
+            self._index.push(order, start)
 
     def _find_suitable_order(self, k_blocks: int) -> int:
         """Devuelve el menor order tal que 2**order >= k_blocks.
         Lanza BuddyError si k_blocks <= 0."""
         if k_blocks <= 0:
             raise BuddyError("Cantidad de bloques solicitada debe ser positiva")
-        order = 0
-        while (1 << order) < k_blocks:
-            order += 1
-        return order
+        # (k-1).bit_length() es el menor order con 2**order >= k, sin iterar
+        return (k_blocks - 1).bit_length()
 
-    def reserve(self, k_blocks: int, name: str) -> Tuple[int,int]:
-        """Reservar al menos k_blocks (unidades) con identificador name.
-        Devuelve (start, order). Lanza BuddyError si falla."""
-        if name in self.allocated:
-            raise BuddyError(f"El nombre '{name}' ya está reservado")
-        order = self._find_suitable_order(k_blocks)
+    # --- ganchos de almacenamiento (backend de listas) ---
+    def _take_block(self, order: int, hint: Optional[int] = None) -> Optional[int]:
+        """Toma un bloque libre de tamaño exactamente 2**order (dividiendo si hace falta),
+        elegido según la política. Devuelve su start o None si no hay espacio."""
         # buscar un bloque libre en order >= desired
         chosen_order = None
         for o in range(order, self.max_order + 1):
-            if self.free_lists[o]:
+            if self._free_sets[o]:
                 chosen_order = o
                 break
         if chosen_order is None:
-            raise BuddyError("No hay bloque suficientemente grande para la solicitud")
-        # tomar el bloque y dividir hasta llegar al order deseado
-        start = self.free_lists[chosen_order].pop(0)
-        for o in range(chosen_order - 1, order - 1, -1):
-            # al dividir, creamos el buddy superior y lo añadimos a free_lists[o]
-            buddy_start = start + (1 << o)
-            self.free_lists[o].append(buddy_start)
-            # start (la mitad baja) se mantiene para seguir dividiendo si hace falta
-        # registrar asignación
-        self.allocated[name] = (start, order)
-        return (start, order)
+            return None
+        fl = self._free_sets[chosen_order]
+        if self._index is None:
+            # tomar el bloque (el último insertado, O(1)) y dividir hasta llegar al order deseado
+            start, _ = fl.popitem()
+            for o in range(chosen_order - 1, order - 1, -1):
+                # al dividir, creamos el buddy superior y lo añadimos a _free_sets[o]
+                buddy_start = start + (1 << o)
+                self._free_sets[o][buddy_start] = None
+                # start (la mitad baja) se mantiene para seguir dividiendo si hace falta
+        else:
+            target = hint if hint is not None else 0
+            start = self._index.pick(chosen_order, target)
+            del fl[start]
+            for o in range(chosen_order - 1, order - 1, -1):
+                upper = start + (1 << o)
+                # conservar la mitad alta si la política lo pide (o si la pista cae en ella)
+                if self.policy == "highest" or (self.policy == "nearest" and target >= upper):
+                    self._push_free(o, start)
+                    start = upper
+                else:
+                    self._push_free(o, upper)
+        self.splits += chosen_order - order
+        self._free_units -= 1 << order
+        return start
 
-    def free(self, name: str) -> None:
-        """Liberar una asignación por nombre y coalescer con su buddy si es posible."""
-        if name not in self.allocated:
-            raise BuddyError(f"El nombre '{name}' no fue encontrado")
-        cur_start, cur_order = self.allocated.pop(name)
+    def _release_block(self, start: int, order: int) -> None:
+        """Devuelve el bloque (start, order) a las listas libres, coalesciendo con su buddy."""
+        cur_start, cur_order = start, order
+        self._free_units += 1 << order
         # intentar fusionar con buddy mientras sea posible
         while True:
             buddy = cur_start ^ (1 << cur_order)  # cálculo XOR para obtener buddy
-            fl = self.free_lists[cur_order]
+            fl = self._free_sets[cur_order]
             if buddy in fl:
-                # si el buddy está libre, lo removemos y subimos un order
-                fl.remove(buddy)
+                # si el buddy está libre, lo removemos (O(1)) y subimos un order
+                del fl[buddy]
+                if self._index is not None:
+                    self._index.discard(cur_order, buddy)
+                self.merges += 1
                 cur_start = min(cur_start, buddy)  # el start del bloque fusionado
                 cur_order += 1
                 if cur_order > self.max_order:
@@ -96,29 +262,1060 @@ class BuddyAllocator:
                 # continuar intentando fusionar en el siguiente nivel
             else:
                 # si no hay buddy libre, insertamos el bloque en su lista y terminamos
-                fl.append(cur_start)
+                self._push_free(cur_order, cur_start)
                 break
 
+    def _return_block(self, start: int, order: int) -> None:
+        """Devuelve un bloque que la propia operación tomó (al deshacerla o para
+        reintentar con su espacio). No es una liberación del usuario, así que las
+        subclases con caché no deben retenerlo."""
+        self._release_block(start, order)
+
+    def _claim_block(self, start: int, order: int) -> bool:
+        """Saca de las listas libres el bloque concreto (start, order), dividiendo el
+        bloque libre que lo contiene si hace falta. Devuelve False (sin cambios) si
+        esa región no está completamente libre."""
+        for o in range(order, self.max_order + 1):
+            enclosing = start & ~((1 << o) - 1)
+            fl = self._free_sets[o]
+            if enclosing in fl:
+                break
+        else:
+            return False
+        del fl[enclosing]
+        if self._index is not None:
+            self._index.discard(o, enclosing)
+        # dividir conservando la mitad que contiene start
+        for lower in range(o - 1, order - 1, -1):
+            upper = enclosing + (1 << lower)
+            if start >= upper:
+                self._push_free(lower, enclosing)
+                enclosing = upper
+            else:
+                self._push_free(lower, upper)
+        self.splits += o - order
+        self._free_units -= 1 << order
+        return True
+
+    @property
+    def free_lists(self) -> Dict[int, List[int]]:
+        """Vista de solo lectura: order -> starts libres ordenados. Tiene la misma
+        forma en todos los backends (se calcula en cada acceso, O(n log n))."""
+        return self._free_blocks()
+
+    def _free_blocks(self) -> Dict[int, List[int]]:
+        """Starts libres por order, ordenados (usado por show)."""
+        return {o: sorted(fl) for o, fl in self._free_sets.items()}
+
+    def _free_counts(self) -> List[int]:
+        """Cantidad de bloques libres por order, sin recorrer las listas."""
+        return [len(self._free_sets[o]) for o in range(self.max_order + 1)]
+
+    def _largest_free_order(self) -> int:
+        """Order del mayor bloque libre, o -1 si no queda nada libre."""
+        for o in range(self.max_order, -1, -1):
+            if self._free_sets[o]:
+                return o
+        return -1
+
+    def _can_take(self, order: int) -> bool:
+        """True si una reserva de 'order' tendría espacio (no modifica nada). Lo usan
+        los front-ends para no probar allocators llenos con reservas que fallarían."""
+        return self._largest_free_order() >= order
+
+    # --- contabilidad de asignaciones ---
+    def _record(self, name: str, start: int, order: int, k_blocks: int) -> None:
+        self.allocated[name] = (start, order)
+        self._requested[name] = k_blocks
+        self._requested_units += k_blocks
+        self._granted_units += 1 << order
+
+    def _forget(self, name: str) -> Tuple[int,int]:
+        start, order = self.allocated.pop(name)
+        self._requested_units -= self._requested.pop(name)
+        self._granted_units -= 1 << order
+        return start, order
+
+    # --- API pública ---
+    def reserve(self, k_blocks: int, name: str, hint: Optional[int] = None) -> Tuple[int,int]:
+        """Reservar al menos k_blocks (unidades) con identificador name.
+        'hint' es un start preferido (usado por la política "nearest").
+        Devuelve (start, order). Lanza BuddyError si falla."""
+        if name in self.allocated:
+            raise BuddyError(f"El nombre '{name}' ya está reservado")
+        order = self._find_suitable_order(k_blocks)
+        start = self._take_block(order, hint)
+        if start is None:
+            self.failures += 1
+            raise BuddyError("No hay bloque suficientemente grande para la solicitud")
+        # registrar asignación
+        self._record(name, start, order, k_blocks)
+        if self.debug:
+            self.check_invariants()
+        return (start, order)
+
+    def free(self, name: str) -> None:
+        """Liberar una asignación por nombre y coalescer con su buddy si es posible."""
+        if name not in self.allocated:
+            raise BuddyError(f"El nombre '{name}' no fue encontrado")
+        start, order = self._forget(name)
+        self._release_block(start, order)
+        if self.debug:
+            self.check_invariants()
+
+    def reserve_many(self, requests: Iterable[Tuple[int, str]]) -> Dict[str, Tuple[int,int]]:
+        """Reservar un lote [(k_blocks, name), ...] con semántica todo o nada.
+        Las solicitudes se atienden de mayor a menor order, de modo que cada bloque
+        dividido deja su buddy listo para las solicitudes más pequeñas siguientes.
+        Devuelve name -> (start, order); si algún elemento falla deshace el lote
+        y lanza BuddyBatchError con todos los elementos fallidos."""
+        requests = list(requests)
+        failures: Dict[str, str] = {}
+        planned: List[Tuple[int, int, str]] = []  # (order, índice, name)
+        requested: Dict[str, int] = {}
+        seen = set()
+        for idx, (k_blocks, name) in enumerate(requests):
+            if name in self.allocated or name in seen:
+                failures[name] = f"El nombre '{name}' ya está reservado"
+                continue
+            seen.add(name)
+            requested[name] = k_blocks
+            try:
+                planned.append((self._find_suitable_order(k_blocks), idx, name))
+            except BuddyError as e:
+                failures[name] = str(e)
+        planned.sort(key=lambda item: (-item[0], item[1]))
+        granted: Dict[str, Tuple[int,int]] = {}
+        for order, _, name in planned:
+            start = self._take_block(order)
+            if start is None:
+                self.failures += 1
+                failures[name] = "No hay bloque suficientemente grande para la solicitud"
+            else:
+                granted[name] = (start, order)
+        if failures:
+            # deshacer en orden inverso para recomponer los bloques divididos
+            for start, order in reversed(list(granted.values())):
+                self._return_block(start, order)
+            if self.debug:
+                self.check_invariants()
+            raise BuddyBatchError(failures)
+        result = {name: granted[name] for _, name in requests}
+        for name, (start, order) in result.items():
+            self._record(name, start, order, requested[name])
+        if self.debug:
+            self.check_invariants()
+        return result
+
+    def free_many(self, names: Iterable[str]) -> None:
+        """Liberar un lote de asignaciones con semántica todo o nada: si algún
+        nombre no existe (o se repite) no se libera nada y se lanza BuddyBatchError."""
+        names = list(names)
+        failures: Dict[str, str] = {}
+        seen = set()
+        for name in names:
+            if name in seen:
+                failures[name] = f"El nombre '{name}' aparece repetido en el lote"
+            elif name not in self.allocated:
+                failures[name] = f"El nombre '{name}' no fue encontrado"
+            seen.add(name)
+        if failures:
+            raise BuddyBatchError(failures)
+        for name in names:
+            start, order = self._forget(name)
+            self._release_block(start, order)
+        if self.debug:
+            self.check_invariants()
+
+    def resize(self, name: str, new_k: int) -> Tuple[int, int, bool]:
+        """Cambia el tamaño de una asignación a al menos new_k unidades.
+        - Achicar: siempre en el lugar, devolviendo las mitades superiores a las listas.
+        - Crecer: en el lugar si el bloque está alineado al nuevo tamaño y sus buddies
+          superiores están libres; si no, se reubica (primero sin soltar el bloque
+          actual y, si no hay espacio, soltándolo y reintentando).
+        Devuelve (start, order, moved), con moved=True si cambió el start. Si no hay
+        espacio lanza BuddyError y la asignación queda como estaba."""
+        if name not in self.allocated:
+            raise BuddyError(f"El nombre '{name}' no fue encontrado")
+        new_order = self._find_suitable_order(new_k)
+        start, order = self.allocated[name]
+        if new_order <= order:
+            self._shrink_block(start, order, new_order)
+            new_start = start
+        else:
+            new_start = self._grow_in_place(start, order, new_order)
+            if new_start is None:
+                new_start = self._take_block(new_order, start)
+                if new_start is not None:
+                    self._release_block(start, order)
+                else:
+                    # el bloque actual puede ser parte del espacio necesario
+                    self._return_block(start, order)
+                    new_start = self._take_block(new_order, start)
+                    if new_start is None:
+                        self._claim_block(start, order)
+                        self.failures += 1
+                        if self.debug:
+                            self.check_invariants()
+                        raise BuddyError("No hay bloque suficientemente grande para la solicitud")
+        self._forget(name)
+        self._record(name, new_start, new_order, new_k)
+        if self.debug:
+            self.check_invariants()
+        return (new_start, new_order, new_start != start)
+
+    def _shrink_block(self, start: int, order: int, new_order: int) -> None:
+        """Reduce el bloque asignado (start, order) a (start, new_order) devolviendo
+        sus mitades superiores a las estructuras libres."""
+        for o in range(order - 1, new_order - 1, -1):
+            self._release_block(start + (1 << o), o)
+
+    def _grow_in_place(self, start: int, order: int, new_order: int) -> Optional[int]:
+        """Intenta extender (start, order) hasta new_order reclamando sus buddies
+        superiores. Devuelve start si lo logra; si no, deshace y devuelve None."""
+        if start & ((1 << new_order) - 1):
+            return None
+        claimed = []
+        for o in range(order, new_order):
+            if not self._claim_block(start + (1 << o), o):
+                for buddy, buddy_order in reversed(claimed):
+                    self._return_block(buddy, buddy_order)
+                return None
+            claimed.append((start + (1 << o), o))
+        return start
+
+    def _held_blocks(self) -> List[Tuple[int, int]]:
+        """Bloques que no están libres ni asignados (p. ej. en una caché): (start, order)."""
+        return []
+
+    def check_invariants(self) -> None:
+        """Verifica la consistencia interna y lanza BuddyError si algo falla:
+        - ningún bloque (libre, asignado o retenido) se solapa con otro y todos
+          están alineados a su tamaño;
+        - entre todos cubren exactamente el arena 0..N-1;
+        - no quedan dos buddies libres sin fusionar;
+        - los contadores incrementales coinciden con las estructuras."""
+        free_blocks = self._free_blocks()
+        spans = [(start, order) for order, starts in free_blocks.items() for start in starts]
+        spans += list(self.allocated.values())
+        spans += self._held_blocks()
+        spans.sort()
+        pos = 0
+        for start, order in spans:
+            if start != pos:
+                kind = "solapamiento" if start < pos else "hueco"
+                raise BuddyError(f"Invariante violado: {kind} en {min(start, pos)}")
+            if start & ((1 << order) - 1):
+                raise BuddyError(f"Invariante violado: bloque {start} no alineado a 2**{order}")
+            pos += 1 << order
+        if pos != self.N:
+            raise BuddyError(f"Invariante violado: los bloques cubren {pos} de {self.N} unidades")
+        for order in range(self.max_order):
+            free = set(free_blocks[order])
+            for start in free:
+                if start ^ (1 << order) in free:
+                    raise BuddyError(f"Invariante violado: buddies libres sin fusionar en {start} (order {order})")
+        counts = [len(free_blocks[o]) for o in range(self.max_order + 1)]
+        if counts != self._free_counts():
+            raise BuddyError("Invariante violado: conteo de bloques libres por order desactualizado")
+        if self._free_units != sum(c << o for o, c in enumerate(counts)):
+            raise BuddyError("Invariante violado: unidades libres desactualizadas")
+        largest = max((o for o, c in enumerate(counts) if c), default=-1)
+        if largest != self._largest_free_order():
+            raise BuddyError("Invariante violado: mayor bloque libre desactualizado")
+        if self._granted_units != sum(1 << o for _, o in self.allocated.values()):
+            raise BuddyError("Invariante violado: unidades otorgadas desactualizadas")
+        if set(self._requested) != set(self.allocated):
+            raise BuddyError("Invariante violado: tabla de unidades pedidas desactualizada")
+
+    def stats(self) -> Dict[str, object]:
+        """Estadísticas del allocator a partir de contadores incrementales
+        (no recorre ni ordena las listas libres; a lo sumo O(log N)):
+        - free_units / free_blocks_per_order / free_units_per_order
+        - largest_free_block: tamaño (unidades) del mayor bloque libre
+        - requested_units / granted_units / internal_fragmentation = 1 - pedido/otorgado
+        - external_fragmentation = 1 - mayor_bloque_libre / unidades_libres
+        - splits / merges / failures (reservas fallidas por falta de espacio)
+        """
+        counts = self._free_counts()
+        largest = self._largest_free_order()
+        largest_units = (1 << largest) if largest >= 0 else 0
+        free_units = self._free_units
+        granted = self._granted_units
+        return {
+            "total_units": self.N,
+            "free_units": free_units,
+            "free_blocks_per_order": {o: c for o, c in enumerate(counts)},
+            "free_units_per_order": {o: c << o for o, c in enumerate(counts)},
+            "largest_free_block": largest_units,
+            "allocations": len(self.allocated),
+            "requested_units": self._requested_units,
+            "granted_units": granted,
+            "internal_fragmentation": 1 - self._requested_units / granted if granted else 0.0,
+            "external_fragmentation": 1 - largest_units / free_units if free_units else 0.0,
+            "splits": self.splits,
+            "merges": self.merges,
+            "failures": self.failures,
+        }
+
     def show(self) -> str:
         """Representación textual del estado actual: listas libres y asignaciones."""
-        lines = [f"Total blocks: {self.N} (orders 0..{self.max_order})", "Free lists:"]
-        for o in range(self.max_order, -1, -1):
-            size = 1 << o
-            starts = sorted(self.free_lists[o])
-            lines.append(f"  order {o} (size={size}): {starts}")
-        lines.append("Allocations:")
-        for name, (start, order) in sorted(self.allocated.items()):
-            lines.append(f"  {name}: start={start}, size={1<<order} (order {order})")
+        return _format_state(self.N, self.max_order, self._free_blocks(), self.allocated)
+
+    # --- snapshot binario ---
+    def _load_free_blocks(self, blocks: Dict[int, List[int]]) -> None:
+        """Reemplaza los bloques libres por 'blocks' (order -> starts), sin coalescer."""
+        self._free_sets = {o: {} for o in range(self.max_order + 1)}
+        if self._index is not None:
+            self._index = _PlacementIndex(self.policy, self._free_sets)
+        for o, starts in blocks.items():
+            for start in starts:
+                self._push_free(o, start)
+        self._free_units = sum(len(starts) << o for o, starts in blocks.items())
+
+    def dump(self, fileobj: BinaryIO) -> None:
+        """Escribe el estado en formato binario compacto (ver _SNAPSHOT_HEADER):
+        cabecera, un bitmap de bloques libres por order (bit j del order o = bloque
+        con start j * 2**o libre; ~N/4 bytes en total) y la tabla de asignaciones
+        empaquetada (start, order, unidades pedidas, nombre UTF-8)."""
+        fileobj.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION,
+                                            self.max_order, len(self.allocated)))
+        for order, starts in sorted(self._free_blocks().items()):
+            bitmap = bytearray(_bitmap_size(self.N >> order))
+            for start in starts:
+                idx = start >> order
+                bitmap[idx >> 3] |= 1 << (idx & 7)
+            fileobj.write(bitmap)
+        for name, (start, order) in self.allocated.items():
+            encoded = name.encode("utf-8")
+            fileobj.write(_SNAPSHOT_ENTRY.pack(start, order, self._requested[name], len(encoded)))
+            fileobj.write(encoded)
+
+    @classmethod
+    def load(cls, source, policy: str = "first") -> "BuddyAllocator":
+        """Reconstruye un allocator desde dump(). 'source' puede ser un archivo
+        binario (se mapea en memoria con mmap si es posible; se lee desde la posición
+        actual y ésta queda justo después del snapshot) o un objeto bytes-like.
+        Los bitmaps se recorren saltando los bytes en cero sin bucles en Python, así
+        que el costo depende de la cantidad de bloques libres y no del tamaño del arena."""
+        origin = None
+        if hasattr(source, "read"):
+            try:
+                origin = source.tell()
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                pass
+            try:
+                data = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+                skip = origin or 0
+            except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+                data = source.read()
+                skip = 0
+        else:
+            data = source
+            skip = 0
+        whole = memoryview(data)
+        view = whole[skip:]
+        try:
+            if len(view) < _SNAPSHOT_HEADER.size:
+                raise BuddyError("Snapshot truncado")
+            magic, version, max_order, n_allocs = _SNAPSHOT_HEADER.unpack_from(view, 0)
+            if magic != _SNAPSHOT_MAGIC or version != _SNAPSHOT_VERSION:
+                raise BuddyError("Formato de snapshot no reconocido")
+            allocator = cls(1 << max_order, policy=policy)
+            offset = _SNAPSHOT_HEADER.size
+            blocks: Dict[int, List[int]] = {}
+            for order in range(max_order + 1):
+                size = _bitmap_size(allocator.N >> order)
+                if offset + size > len(view):
+                    raise BuddyError("Snapshot truncado")
+                starts = []
+                with view[offset:offset + size] as bitmap:
+                    for pos in (m.start() for m in _NONZERO_BYTE.finditer(bitmap)):
+                        base = pos << 3
+                        starts.extend((base + bit) << order for bit in _BYTE_BITS[bitmap[pos]])
+                offset += size
+                blocks[order] = starts
+            allocator._load_free_blocks(blocks)
+            for _ in range(n_allocs):
+                if offset + _SNAPSHOT_ENTRY.size > len(view):
+                    raise BuddyError("Snapshot truncado")
+                start, order, requested, name_len = _SNAPSHOT_ENTRY.unpack_from(view, offset)
+                offset += _SNAPSHOT_ENTRY.size
+                name = bytes(view[offset:offset + name_len]).decode("utf-8")
+                offset += name_len
+                allocator._record(name, start, order, requested)
+        finally:
+            view.release()
+            whole.release()
+            if isinstance(data, mmap.mmap):
+                data.close()
+        if origin is not None:
+            source.seek(origin + offset)
+        return allocator
+
+class BuddyTreeAllocator(BuddyAllocator):
+    """Buddy allocator con el árbol completo almacenado en un bytearray compacto.
+
+    El nodo i (1-indexado, hijos 2i y 2i+1) guarda 1 + el mayor order libre dentro
+    de su subárbol, o 0 si no queda nada libre. Un nodo completamente libre guarda
+    su propio order + 1. Ocupa 2*N bytes fijos, sin importar la fragmentación, y
+    reserve/free cuestan O(log N).
+    """
+
+    def _init_storage(self) -> None:
+        # bloques libres por order, mantenidos al dividir/fusionar (para stats)
+        self._counts = [0] * (self.max_order + 1)
+        self._counts[self.max_order] = 1
+        self._tree = bytearray(2 * self.N)
+        # nivel depth: nodos [2**depth, 2**(depth+1)) de order max_order - depth
+        for depth in range(self.max_order + 1):
+            value = self.max_order - depth + 1
+            self._tree[1 << depth:2 << depth] = bytes((value,)) * (1 << depth)
+
+    def _node_index(self, start: int, order: int) -> int:
+        return (1 << (self.max_order - order)) + (start >> order)
+
+    def _update_parents(self, i: int, order: int) -> None:
+        """Recalcula los ancestros del nodo i (de order 'order') tras un cambio."""
+        tree = self._tree
+        node_order = order
+        while i > 1:
+            i >>= 1
+            node_order += 1
+            left = tree[2 * i]
+            right = tree[2 * i + 1]
+            if left == right == node_order:
+                # ambos hijos completamente libres -> el nodo vuelve a estar entero (merge)
+                value = node_order + 1
+                self._counts[node_order - 1] -= 2
+                self._counts[node_order] += 1
+                self.merges += 1
+            else:
+                value = left if left > right else right
+            if tree[i] == value:
+                # los ancestros no cambian
+                break
+            tree[i] = value
+
+    def _split_node(self, i: int, node_order: int) -> None:
+        """Divide el nodo libre entero i: sus hijos pasan a ser bloques libres enteros.
+        Los descendientes de un nodo entero pueden tener valores viejos (p. ej. tras
+        load), así que se escriben explícitamente al dividir."""
+        self._tree[2 * i] = self._tree[2 * i + 1] = node_order
+        self._counts[node_order] -= 1
+        self._counts[node_order - 1] += 2
+        self.splits += 1
+
+    def _take_block(self, order: int, hint: Optional[int] = None) -> Optional[int]:
+        tree = self._tree
+        want = order + 1
+        if tree[1] < want:
+            return None
+        if self.policy == "nearest":
+            return self._take_nearest(order, hint if hint is not None else 0)
+        # descender prefiriendo el hijo izquierdo (direcciones bajas) o el derecho
+        # ("highest") cuando el preferido cabe
+        policy = self.policy
+        counts = self._counts
+        i = 1
+        node_order = self.max_order
+        while node_order > order:
+            if tree[i] == node_order + 1:
+                self._split_node(i, node_order)
+            i <<= 1
+            node_order -= 1
+            if policy == "highest":
+                if tree[i + 1] >= want:
+                    i += 1
+            elif tree[i] < want:
+                i += 1
+        tree[i] = 0
+        counts[order] -= 1
+        self._free_units -= 1 << order
+        self._update_parents(i, order)
+        return (i - (1 << (self.max_order - order))) << order
+
+    def _take_nearest(self, order: int, hint: int) -> int:
+        """Política "nearest", igual que en el backend de listas: el bloque libre
+        entero más cercano a la pista dentro del menor order disponible (ante un
+        empate, el de start menor), dividido conservando la mitad del lado de la pista."""
+        chosen = next(o for o in range(order, self.max_order + 1) if self._counts[o])
+        block = self._nearest_whole(chosen, hint)
+        # el sub-bloque de 'order' del lado de la pista (los extremos si cae fuera)
+        end = block + (1 << chosen) - (1 << order)
+        start = min(max(hint >> order << order, block), end)
+        BuddyTreeAllocator._claim_block(self, start, order)
+        return start
+
+    def _nearest_whole(self, order: int, hint: int) -> Optional[int]:
+        """Start del bloque libre entero de 'order' más cercano a hint, o None.
+        Se desciende hacia el hijo más cercano a la pista y el otro se apila para
+        después (ramificación y poda): se descartan los subárboles sin espacio, los
+        bloques enteros de order mayor (no contienen bloques enteros de 'order') y
+        los que quedan más lejos que el mejor candidato encontrado."""
+        tree, top = self._tree, self.max_order
+        want = order + 1
+        unit = 1 << order
+        root = tree[1]
+        if root < want or (root == top + 1 and top != order):
+            return None
+        best, best_dist = None, float("inf")
+        stack = [(0, 1, top)]
+        while stack:
+            dist, i, k = stack.pop()
+            if dist > best_dist:
+                continue
+            while k > order:
+                k -= 1
+                i <<= 1
+                vl, vr = tree[i], tree[i + 1]
+                # hijo utilizable: con espacio y sin ser un bloque entero mayor
+                okl = vl >= want and (vl != k + 1 or k == order)
+                okr = vr >= want and (vr != k + 1 or k == order)
+                if not (okl or okr):
+                    break
+                mid = ((i + 1 - (1 << (top - k))) << k)   # start del hijo derecho
+                if okl:
+                    lo, last = mid - (1 << k), mid - unit
+                    dl = lo - hint if hint < lo else (hint - last if hint > last else 0)
+                if okr:
+                    last = mid + (1 << k) - unit
+                    dr = mid - hint if hint < mid else (hint - last if hint > last else 0)
+                if okl and okr:
+                    # seguir por el más cercano (ante empate, el izquierdo) y apilar el otro
+                    if dr < dl:
+                        if dl <= best_dist:
+                            stack.append((dl, i, k))
+                        i += 1
+                        dist = dr
+                    else:
+                        if dr <= best_dist:
+                            stack.append((dr, i + 1, k))
+                        dist = dl
+                elif okl:
+                    dist = dl
+                else:
+                    i += 1
+                    dist = dr
+                if dist > best_dist:
+                    break
+            else:
+                start = (i - (1 << (top - order))) << order
+                if dist < best_dist or start < best:
+                    best, best_dist = start, dist
+        return best
+
+    def _release_block(self, start: int, order: int) -> None:
+        i = self._node_index(start, order)
+        self._tree[i] = order + 1
+        self._counts[order] += 1
+        self._free_units += 1 << order
+        self._update_parents(i, order)
+
+    def _claim_block(self, start: int, order: int) -> bool:
+        tree = self._tree
+        target = self._node_index(start, order)
+        # bajar desde la raíz (los valores por debajo de un nodo entero o asignado
+        # pueden estar viejos) hasta el bloque libre entero que contiene al pedido
+        i, node_order = 1, self.max_order
+        while tree[i] != node_order + 1:
+            if node_order == order or tree[i] <= order:
+                return False
+            node_order -= 1
+            i = target >> (node_order - order)
+        # dividir hacia abajo siguiendo el camino hasta el nodo pedido
+        while node_order > order:
+            self._split_node(i, node_order)
+            node_order -= 1
+            i = target >> (node_order - order)
+        tree[target] = 0
+        self._counts[order] -= 1
+        self._free_units -= 1 << order
+        self._update_parents(target, order)
+        return True
+
+    def _shrink_block(self, start: int, order: int, new_order: int) -> None:
+        # los nodos del camino bajo el bloque asignado pueden tener valores viejos:
+        # se marcan ocupados antes de liberar las mitades superiores
+        i = self._node_index(start, order)
+        for _ in range(order - new_order + 1):
+            self._tree[i] = 0
+            i <<= 1
+        super()._shrink_block(start, order, new_order)
+
+    def _free_counts(self) -> List[int]:
+        return list(self._counts)
+
+    def _largest_free_order(self) -> int:
+        # la raíz guarda 1 + el mayor order libre de todo el arena
+        return self._tree[1] - 1
+
+    def _free_blocks(self) -> Dict[int, List[int]]:
+        tree = self._tree
+        blocks: Dict[int, List[int]] = {o: [] for o in range(self.max_order + 1)}
+        # recorrido en profundidad (izquierda primero) -> starts ya ordenados
+        stack = [(1, self.max_order)]
+        while stack:
+            i, order = stack.pop()
+            value = tree[i]
+            if value == order + 1:
+                blocks[order].append((i - (1 << (self.max_order - order))) << order)
+            elif value:
+                stack.append((2 * i + 1, order - 1))
+                stack.append((2 * i, order - 1))
+        return blocks
+
+    def _load_free_blocks(self, blocks: Dict[int, List[int]]) -> None:
+        tree = self._tree = bytearray(2 * self.N)
+        self._counts = [0] * (self.max_order + 1)
+        self._free_units = 0
+        # pending[d] = nodos internos de profundidad d cuyo valor hay que recalcular
+        pending: List[set] = [set() for _ in range(self.max_order + 1)]
+        for order, starts in blocks.items():
+            depth = self.max_order - order
+            base = 1 << depth
+            for start in starts:
+                i = base + (start >> order)
+                tree[i] = order + 1
+                if depth:
+                    pending[depth - 1].add(i >> 1)
+            self._counts[order] = len(starts)
+            self._free_units += len(starts) << order
+        # recalcular sólo los ancestros de los bloques libres, de abajo hacia arriba
+        for depth in range(self.max_order - 1, -1, -1):
+            node_order = self.max_order - depth
+            for i in pending[depth]:
+                left = tree[2 * i]
+                right = tree[2 * i + 1]
+                tree[i] = node_order + 1 if left == right == node_order else max(left, right)
+                if depth:
+                    pending[depth - 1].add(i >> 1)
+
+class CachedBuddyAllocator(BuddyAllocator):
+    """BuddyAllocator con una caché de bloques liberados por order (tipo slab).
+
+    Al liberar un bloque de order <= max_cached_order, en lugar de coalescerlo se
+    guarda en la caché de su order (hasta high_water bloques; al superarse se
+    devuelve a las listas buddy el más antiguo). Las reservas de ese order toman
+    primero el bloque más reciente de la caché, evitando el ciclo dividir/fusionar
+    del tráfico pequeño. Si el buddy se queda sin espacio, la caché se vacía
+    hacia las listas y se reintenta.
+    """
+
+    def __init__(self, total_blocks: int, high_water: int = 8, max_cached_order: int = 2,
+                 policy: str = "first", debug: bool = False):
+        if high_water < 0:
+            raise BuddyError("high_water no puede ser negativo")
+        self.high_water = high_water
+        self.max_cached_order = max_cached_order
+        # cache[order] = starts de bloques liberados pendientes de reutilizar
+        self.cache: Dict[int, Deque[int]] = {o: deque() for o in range(max_cached_order + 1)}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        super().__init__(total_blocks, policy, debug)
+
+    def _take_block(self, order: int, hint: Optional[int] = None) -> Optional[int]:
+        cached = self.cache.get(order)
+        if cached:
+            self.cache_hits += 1
+            return cached.pop()
+        if cached is not None:
+            self.cache_misses += 1
+        start = super()._take_block(order, hint)
+        if start is None and any(self.cache.values()):
+            self.flush_cache()
+            start = super()._take_block(order, hint)
+        return start
+
+    def _release_block(self, start: int, order: int) -> None:
+        cached = self.cache.get(order)
+        if cached is None or self.high_water == 0:
+            super()._release_block(start, order)
+            return
+        cached.append(start)
+        if len(cached) > self.high_water:
+            self.cache_evictions += 1
+            super()._release_block(cached.popleft(), order)
+
+    def _held_blocks(self) -> List[Tuple[int, int]]:
+        return [(start, order) for order, cached in self.cache.items() for start in cached]
+
+    def _return_block(self, start: int, order: int) -> None:
+        BuddyAllocator._release_block(self, start, order)
+
+    def reserve_many(self, requests: Iterable[Tuple[int, str]]) -> Dict[str, Tuple[int,int]]:
+        """Como BuddyAllocator.reserve_many; si el lote falla, también la caché
+        queda como estaba (bloques tomados de ella o vaciados al reintentar)."""
+        saved = {o: list(cached) for o, cached in self.cache.items()}
+        try:
+            return super().reserve_many(requests)
+        except BuddyBatchError:
+            self._restore_cache(saved)
+            raise
+
+    def resize(self, name: str, new_k: int) -> Tuple[int, int, bool]:
+        saved = {o: list(cached) for o, cached in self.cache.items()}
+        try:
+            return super().resize(name, new_k)
+        except BuddyError:
+            self._restore_cache(saved)
+            raise
+
+    def _restore_cache(self, saved: Dict[int, List[int]]) -> None:
+        """Vuelve a poner en la caché exactamente los bloques de 'saved' (order ->
+        starts, en orden). Tras deshacer una operación fallida esos bloques sólo
+        pueden estar en la caché o libres en las listas buddy."""
+        changed = [o for o, starts in saved.items() if list(self.cache[o]) != starts]
+        for o in changed:
+            cached = self.cache[o]
+            while cached:
+                BuddyAllocator._release_block(self, cached.pop(), o)
+        for o in changed:
+            for start in saved[o]:
+                BuddyAllocator._claim_block(self, start, o)
+                self.cache[o].append(start)
+        if changed and self.debug:
+            self.check_invariants()
+
+    def _can_take(self, order: int) -> bool:
+        # con bloques en caché de otro order, vaciarla podría formar el bloque pedido
+        return (bool(self.cache.get(order)) or super()._can_take(order)
+                or any(self.cache.values()))
+
+    def _claim_block(self, start: int, order: int) -> bool:
+        cached = self.cache.get(order)
+        if cached and start in cached:
+            cached.remove(start)
+            return True
+        return super()._claim_block(start, order)
+
+    def flush_cache(self) -> None:
+        """Devuelve todos los bloques en caché a las listas buddy (coalesciendo)."""
+        for order, cached in self.cache.items():
+            while cached:
+                self.cache_evictions += 1
+                super()._release_block(cached.popleft(), order)
+
+    def cache_stats(self) -> Dict[str, object]:
+        """Aciertos, fallos, tasa de acierto, expulsiones y bloques en caché por order."""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+            "evictions": self.cache_evictions,
+            "cached": {o: len(c) for o, c in self.cache.items()},
+        }
+
+    def dump(self, fileobj: BinaryIO) -> None:
+        """Como BuddyAllocator.dump, pero antes devuelve la caché a las listas buddy
+        (los bloques en caché no son libres ni asignados en el formato binario)."""
+        self.flush_cache()
+        super().dump(fileobj)
+
+    def stats(self) -> Dict[str, object]:
+        """stats() del buddy más las estadísticas de la caché y las unidades retenidas en ella."""
+        out = super().stats()
+        out["cache"] = self.cache_stats()
+        out["cached_units"] = sum(len(c) << o for o, c in self.cache.items())
+        return out
+
+    def show(self) -> str:
+        lines = [super().show(), "Cache:"]
+        for o in range(self.max_cached_order, -1, -1):
+            lines.append(f"  order {o} (size={1 << o}): {sorted(self.cache[o])}")
+        return "\n".join(lines)
+
+# backends disponibles para make_allocator / run_cli
+BACKENDS = {"lists": BuddyAllocator, "tree": BuddyTreeAllocator, "cached": CachedBuddyAllocator}
+
+def make_allocator(total_blocks: int, backend: str = "lists", policy: str = "first",
+                   debug: bool = False) -> BuddyAllocator:
+    """Crea un allocator con el backend ('lists', 'tree' o 'cached') y la política indicados."""
+    if backend not in BACKENDS:
+        raise BuddyError(f"Backend desconocido '{backend}'. Válidos: {', '.join(BACKENDS)}")
+    return BACKENDS[backend](total_blocks, policy=policy, debug=debug)
+
+class ConcurrentBuddyAllocator:
+    """Buddy allocator seguro para hilos con locks por subárbol (lock striping).
+
+    El arena de N unidades se parte en 'stripes' subárboles alineados de N/stripes
+    unidades, cada uno con su propio allocator (backend a elección) y su propio
+    lock. Las solicitudes que caben en un subárbol sólo bloquean ese subárbol, así
+    que reservas en mitades distintas del arena no se serializan entre sí. Cada
+    hilo tiene un subárbol propio (asignados en ronda) donde prueba primero; si no
+    cabe, sigue con los subárboles ya usados y por último con los libres por
+    completo, que así quedan disponibles para las solicitudes que los abarcan. Los
+    subárboles llenos se descartan mirando su espacio libre, sin tomar su lock
+    ni intentar la reserva. Las solicitudes mayores toman los locks de todos los subárboles que cubren (en orden
+    creciente, lo que evita interbloqueos) y sólo tienen éxito si están libres por
+    completo. Los starts devueltos son globales (0..N-1), igual que BuddyAllocator.
+    """
+
+    def __init__(self, total_blocks: int, stripes: int = 8, backend: str = "lists"):
+        if total_blocks <= 0:
+            raise BuddyError("Total de bloques debe ser positivo")
+        if (total_blocks & (total_blocks - 1)) != 0:
+            raise BuddyError("Total de bloques debe ser potencia de dos (p. ej. 8, 16, 32)")
+        if stripes <= 0 or (stripes & (stripes - 1)) != 0 or stripes > total_blocks:
+            raise BuddyError("Cantidad de stripes debe ser potencia de dos y no mayor al total")
+        self.N = total_blocks
+        self.max_order = int(log2(self.N))
+        self.stripe_size = total_blocks // stripes
+        self.stripe_order = int(log2(self.stripe_size))
+        self._stripes = [make_allocator(self.stripe_size, backend) for _ in range(stripes)]
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # subárbol propio de cada hilo, asignado en ronda la primera vez que reserva
+        self._local = threading.local()
+        self._homes = itertools.count()
+        # name -> (primer stripe, cantidad de stripes, start global, order); None mientras se reserva
+        self._owners: Dict[str, Optional[Tuple[int, int, int, int]]] = {}
+        self._names_lock = threading.Lock()
+
+    def _claim_name(self, name: str) -> None:
+        with self._names_lock:
+            if name in self._owners:
+                raise BuddyError(f"El nombre '{name}' ya está reservado")
+            self._owners[name] = None
+
+    def reserve(self, k_blocks: int, name: str) -> Tuple[int,int]:
+        """Igual que BuddyAllocator.reserve, pero seguro para hilos."""
+        if k_blocks <= 0:
+            raise BuddyError("Cantidad de bloques solicitada debe ser positiva")
+        order = (k_blocks - 1).bit_length()
+        self._claim_name(name)
+        try:
+            if order <= self.stripe_order:
+                placed = self._reserve_in_stripe(k_blocks, name)
+            else:
+                placed = self._reserve_spanning(order, name)
+        except BaseException:
+            with self._names_lock:
+                del self._owners[name]
+            raise
+        if placed is None:
+            with self._names_lock:
+                del self._owners[name]
+            raise BuddyError("No hay bloque suficientemente grande para la solicitud")
+        first, start = placed
+        span = 1 << max(0, order - self.stripe_order)
+        with self._names_lock:
+            self._owners[name] = (first, span, start, order)
+        return (start, order)
+
+    def _home_stripe(self) -> int:
+        home = getattr(self._local, "home", None)
+        if home is None:
+            home = self._local.home = next(self._homes) % len(self._stripes)
+        return home
+
+    def _reserve_in_stripe(self, k_blocks: int, name: str) -> Optional[Tuple[int, int]]:
+        order = (k_blocks - 1).bit_length()
+        count = len(self._stripes)
+        home = self._home_stripe()
+        others = [(home + j) % count for j in range(1, count)]
+        # el propio, luego los ya usados y al final los libres por completo
+        ordered = ([home] + [idx for idx in others if self._stripes[idx].allocated]
+                   + [idx for idx in others if not self._stripes[idx].allocated])
+        for idx in ordered:
+            stripe = self._stripes[idx]
+            # lectura sin lock para saltar stripes llenos; se confirma con el lock
+            if not stripe._can_take(order):
+                continue
+            with self._locks[idx]:
+                if not stripe._can_take(order):
+                    continue
+                try:
+                    start, _ = stripe.reserve(k_blocks, name)
+                except BuddyError:
+                    continue  # sólo con 'cached': vaciar la caché no alcanzó
+            return idx, idx * self.stripe_size + start
+        return None
+
+    def _reserve_spanning(self, order: int, name: str) -> Optional[Tuple[int, int]]:
+        if order > self.max_order:
+            return None
+        span = 1 << (order - self.stripe_order)
+        for first in range(0, len(self._stripes), span):
+            group = range(first, first + span)
+            for idx in group:
+                self._locks[idx].acquire()
+            try:
+                if all(not self._stripes[idx].allocated for idx in group):
+                    for idx in group:
+                        self._stripes[idx].reserve(self.stripe_size, name)
+                    return first, first * self.stripe_size
+            finally:
+                for idx in reversed(group):
+                    self._locks[idx].release()
+        return None
+
+    def free(self, name: str) -> None:
+        """Igual que BuddyAllocator.free, pero seguro para hilos."""
+        with self._names_lock:
+            entry = self._owners.get(name)
+            if entry is None:
+                raise BuddyError(f"El nombre '{name}' no fue encontrado")
+            del self._owners[name]
+        first, span, _, _ = entry
+        for idx in range(first, first + span):
+            with self._locks[idx]:
+                self._stripes[idx].free(name)
+
+    @property
+    def allocated(self) -> Dict[str, Tuple[int,int]]:
+        """Copia de las asignaciones activas: name -> (start global, order)."""
+        with self._names_lock:
+            return {name: (entry[2], entry[3]) for name, entry in self._owners.items()
+                    if entry is not None}
+
+    def _snapshot(self) -> Tuple[Dict[int, List[int]], Dict[str, Tuple[int,int]]]:
+        """Bloques libres y asignaciones tomados con todos los locks (vista consistente)."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            per_stripe = [st._free_blocks() for st in self._stripes]
+            allocated = self.allocated
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+        return self._merge_free_blocks(per_stripe), allocated
+
+    def _free_blocks(self) -> Dict[int, List[int]]:
+        return self._snapshot()[0]
+
+    def _merge_free_blocks(self, per_stripe: List[Dict[int, List[int]]]) -> Dict[int, List[int]]:
+        """Bloques libres globales; los subárboles enteros libres se fusionan hacia arriba."""
+        blocks: Dict[int, List[int]] = {o: [] for o in range(self.max_order + 1)}
+        for idx, free in enumerate(per_stripe):
+            base = idx * self.stripe_size
+            for o, starts in free.items():
+                blocks[o].extend(base + s for s in starts)
+        # fusionar buddies por encima del tamaño de un stripe
+        for o in range(self.stripe_order, self.max_order):
+            present = set(blocks[o])
+            merged = [s for s in blocks[o] if not s & (1 << o) and s | (1 << o) in present]
+            if merged:
+                gone = set(merged) | {s | (1 << o) for s in merged}
+                blocks[o] = [s for s in blocks[o] if s not in gone]
+                blocks[o + 1] = sorted(blocks[o + 1] + merged)
+        return blocks
+
+    def show(self) -> str:
+        """Representación textual con direcciones globales (toma todos los locks)."""
+        free_blocks, allocated = self._snapshot()
+        return _format_state(self.N, self.max_order, free_blocks, allocated)
+
+class ShardedBuddyAllocator:
+    """Front-end sobre varios arenas buddy independientes (shards).
+
+    Cada shard es un allocator propio (su tamaño puede diferir de los demás), así
+    que no hace falta un único arena contiguo y cada lista libre se mantiene corta.
+    Las reservas devuelven (shard, start, order) con start relativo a su shard.
+    Enrutamiento:
+    - "size": se prueban primero los shards más pequeños que puedan contener el
+      bloque, de modo que las solicitudes pequeñas no fragmenten los arenas grandes.
+    - "hash": el shard preferido sale de crc32(name) (estable entre procesos).
+    En ambos casos, si el shard preferido está lleno se prueba con los demás.
+    """
+
+    ROUTINGS = ("size", "hash")
+
+    def __init__(self, shard_sizes: Iterable[int], routing: str = "size", backend: str = "lists"):
+        sizes = list(shard_sizes)
+        if not sizes:
+            raise BuddyError("Se requiere al menos un shard")
+        if routing not in self.ROUTINGS:
+            raise BuddyError(f"Enrutamiento desconocido '{routing}'. Válidos: {', '.join(self.ROUTINGS)}")
+        self.routing = routing
+        self.shards: List[BuddyAllocator] = [make_allocator(n, backend) for n in sizes]
+        # asignaciones activas: name -> índice del shard que la contiene
+        self._owner: Dict[str, int] = {}
+        # reservas que no cupieron en ningún shard
+        self.failures = 0
+        self._by_size = sorted(range(len(sizes)), key=lambda i: (sizes[i], i))
+
+    def _candidates(self, order: int, name: str) -> List[int]:
+        """Shards a probar, en orden de preferencia."""
+        if self.routing == "hash":
+            count = len(self.shards)
+            first = zlib.crc32(name.encode("utf-8")) % count
+            order_idx = [(first + j) % count for j in range(count)]
+        else:
+            order_idx = self._by_size
+        return [i for i in order_idx if self.shards[i].max_order >= order]
+
+    def reserve(self, k_blocks: int, name: str) -> Tuple[int, int, int]:
+        """Reservar al menos k_blocks en algún shard. Devuelve (shard, start, order)."""
+        if name in self._owner:
+            raise BuddyError(f"El nombre '{name}' ya está reservado")
+        order = self.shards[0]._find_suitable_order(k_blocks)
+        for i in self._candidates(order, name):
+            shard = self.shards[i]
+            # los shards sin espacio se saltan sin intentar la reserva, para que
+            # sus 'failures' cuenten fallos reales y no pruebas del enrutamiento
+            if not shard._can_take(order):
+                continue
+            try:
+                start, order = shard.reserve(k_blocks, name)
+            except BuddyError:
+                continue  # sólo con 'cached': vaciar la caché no alcanzó
+            self._owner[name] = i
+            return (i, start, order)
+        self.failures += 1
+        raise BuddyError("No hay bloque suficientemente grande para la solicitud en ningún shard")
+
+    def free(self, name: str) -> None:
+        """Liberar una asignación por nombre en el shard que la contiene."""
+        if name not in self._owner:
+            raise BuddyError(f"El nombre '{name}' no fue encontrado")
+        self.shards[self._owner.pop(name)].free(name)
+
+    @property
+    def allocated(self) -> Dict[str, Tuple[int, int, int]]:
+        """Asignaciones activas: name -> (shard, start, order)."""
+        return {name: (i,) + self.shards[i].allocated[name] for name, i in self._owner.items()}
+
+    def stats(self) -> Dict[str, object]:
+        """Resumen agregado (totales y por shard) a partir de stats() de cada shard."""
+        per_shard = [dict(shard.stats(), shard=i) for i, shard in enumerate(self.shards)]
+        free_units = sum(s["free_units"] for s in per_shard)
+        largest = max(s["largest_free_block"] for s in per_shard)
+        requested = sum(s["requested_units"] for s in per_shard)
+        granted = sum(s["granted_units"] for s in per_shard)
+        return {
+            "shards": len(self.shards),
+            "total_units": sum(s["total_units"] for s in per_shard),
+            "free_units": free_units,
+            "largest_free_block": largest,
+            "allocations": len(self._owner),
+            "requested_units": requested,
+            "granted_units": granted,
+            "internal_fragmentation": 1 - requested / granted if granted else 0.0,
+            "external_fragmentation": 1 - largest / free_units if free_units else 0.0,
+            "splits": sum(s["splits"] for s in per_shard),
+            "merges": sum(s["merges"] for s in per_shard),
+            "failures": self.failures,
+            "per_shard": per_shard,
+        }
+
+    def show(self) -> str:
+        """Estado de todos los shards, uno tras otro."""
+        lines = [f"Shards: {len(self.shards)} (routing={self.routing})"]
+        for i, shard in enumerate(self.shards):
+            lines.append(f"Shard {i}:")
+            lines.extend("  " + line for line in shard.show().split("\n"))
         return "\n".join(lines)
 
-def run_cli(total_blocks: int):
+def run_cli(total_blocks: int, backend: str = "lists"):
     """Bucle interactivo simple. Comandos:
     RESERVAR <cantidad> <nombre>
     LIBERAR <nombre>
     MOSTRAR
     SALIR
     """
-    allocator = BuddyAllocator(total_blocks)
+    allocator = make_allocator(total_blocks, backend)
     print(f"Buddy allocator iniciado con {total_blocks} bloques (unidad)")
     while True:
         try:
@@ -156,3 +1353,80 @@ def run_cli(total_blocks: int):
             print("ERROR:", e)
         except ValueError:
             print("ERROR: se esperaba un valor numérico donde corresponde")
+
+def replay_trace(allocator, lines: Iterable[str]) -> Dict[str, object]:
+    """Reproduce una traza de comandos (mismo formato que la CLI) sin imprimir nada
+    por comando. Las líneas se consumen de forma perezosa (sirve un archivo abierto)
+    y la latencia de cada RESERVAR/LIBERAR se guarda en un array('q') compacto.
+    MOSTRAR se ignora y SALIR termina la reproducción.
+    Devuelve un resumen con conteos, throughput (ops/s) y percentiles de latencia (µs)."""
+    latencies = array("q")
+    counts = {"reserves": 0, "frees": 0, "errors": 0, "skipped": 0}
+    reserve = allocator.reserve
+    free = allocator.free
+    clock = time.perf_counter_ns
+    began = clock()
+    for line in lines:
+        toks = line.split()
+        if not toks:
+            continue
+        verb = toks[0].upper()
+        t0 = clock()
+        try:
+            if verb == "RESERVAR" and len(toks) == 3:
+                counts["reserves"] += 1
+                reserve(int(toks[1]), toks[2])
+            elif verb == "LIBERAR" and len(toks) == 2:
+                counts["frees"] += 1
+                free(toks[1])
+            elif verb == "SALIR":
+                break
+            else:
+                counts["skipped"] += 1
+                continue
+        except (BuddyError, ValueError):
+            counts["errors"] += 1
+        latencies.append(clock() - t0)
+    elapsed = (clock() - began) / 1e9
+    ops = len(latencies)
+    ordered = sorted(latencies)
+
+    def percentile(q: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1000
+
+    return dict(counts, ops=ops, elapsed_s=elapsed,
+                ops_per_sec=ops / elapsed if elapsed else 0.0,
+                p50_us=percentile(0.50), p90_us=percentile(0.90),
+                p99_us=percentile(0.99), max_us=ordered[-1] / 1000 if ordered else 0.0)
+
+def format_replay_summary(summary: Dict[str, object]) -> str:
+    """Resumen legible de replay_trace."""
+    return "\n".join([
+        f"Operaciones: {summary['ops']} (reservas {summary['reserves']}, liberaciones {summary['frees']}, "
+        f"errores {summary['errors']}, ignoradas {summary['skipped']})",
+        f"Tiempo: {summary['elapsed_s']:.3f} s  ->  {summary['ops_per_sec']:.0f} ops/s",
+        f"Latencia (us): p50={summary['p50_us']:.2f} p90={summary['p90_us']:.2f} "
+        f"p99={summary['p99_us']:.2f} max={summary['max_us']:.2f}",
+    ])
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada: CLI interactiva o, con --replay, reproducción de una traza."""
+    parser = argparse.ArgumentParser(description="Simulador del Buddy System")
+    parser.add_argument("total_blocks", nargs="?", type=int, default=1 << 20,
+                        help="unidades del arena (potencia de dos, por defecto 2**20)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="lists")
+    parser.add_argument("--replay", metavar="TRAZA",
+                        help="archivo con comandos RESERVAR/LIBERAR a reproducir sin salida por comando")
+    args = parser.parse_args(argv)
+    if args.replay is None:
+        run_cli(args.total_blocks, args.backend)
+        return
+    allocator = make_allocator(args.total_blocks, args.backend)
+    with open(args.replay, encoding="utf-8") as trace:
+        summary = replay_trace(allocator, trace)
+    print(format_replay_summary(summary))
+
+if __name__ == "__main__":
+    main()
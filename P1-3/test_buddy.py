@@ -8,7 +8,10 @@ Cubre casos de inicialización, reserva, liberación, merge, errores y CLI.
 
 import pytest
 import builtins
-from buddy import BuddyAllocator, BuddyError, run_cli
+import io
+import random
+import threading
+from buddy import BuddyAllocator, BuddyTreeAllocator, CachedBuddyAllocator, ConcurrentBuddyAllocator, ShardedBuddyAllocator, BuddyError, BuddyBatchError, make_allocator, run_cli, replay_trace, main
 
 def test_init_invalid():
     # total <= 0 o no potencia de dos
@@ -105,3 +108,666 @@ def test_reserve_full_and_fail():
     # liberar algunos y reservar par
     b.free("n0"); b.free("n1")
     b.reserve(2, "pair")
+
+# listas libres con pertenencia/borrado O(1) y orden determinista
+def test_free_lists_fragmented_churn_and_deterministic_show():
+    b = BuddyAllocator(1024)
+    for i in range(1024):
+        b.reserve(1, f"u{i}")
+    # liberar sólo los impares: 512 fragmentos sin buddy libre
+    for i in range(1, 1024, 2):
+        b.free(f"u{i}")
+    assert len(b.free_lists[0]) == 512
+    assert all(s % 2 == 1 for s in b.free_lists[0])
+    out1 = b.show()
+    # liberar los pares fusiona todo de vuelta al bloque máximo
+    for i in range(0, 1024, 2):
+        b.free(f"u{i}")
+    assert list(b.free_lists[b.max_order]) == [0]
+    assert all(not b.free_lists[o] for o in range(b.max_order))
+    # show() es determinista: misma secuencia de operaciones -> misma salida
+    b2 = BuddyAllocator(1024)
+    for i in range(1024):
+        b2.reserve(1, f"u{i}")
+    for i in range(1, 1024, 2):
+        b2.free(f"u{i}")
+    assert b2.show() == out1
+
+# backend de árbol compacto
+def test_tree_backend_basic_reserve_free_and_show():
+    b = make_allocator(8, "tree")
+    assert isinstance(b, BuddyTreeAllocator)
+    assert len(b._tree) == 16  # 2N bytes fijos
+    assert b.reserve(3, "X") == (0, 2)
+    assert b.reserve(1, "Y") == (4, 0)
+    assert b.free_lists[0] == [5] and b.free_lists[1] == [6]
+    out = b.show()
+    assert "order 1 (size=2): [6]" in out and "Y: start=4, size=1 (order 0)" in out
+    b.free("X")
+    b.free("Y")
+    assert b.free_lists[3] == [0]
+    assert b.reserve(8, "ALL") == (0, 3)
+    with pytest.raises(BuddyError):
+        b.reserve(1, "z")
+    with pytest.raises(BuddyError):
+        make_allocator(8, "nope")
+
+def test_tree_backend_matches_lists_backend_accounting():
+    rng = random.Random(7)
+    lists, tree = BuddyAllocator(256), BuddyTreeAllocator(256)
+    live = []
+    for step in range(2000):
+        if live and rng.random() < 0.45:
+            name = live.pop(rng.randrange(len(live)))
+            lists.free(name)
+            tree.free(name)
+            continue
+        k = rng.randint(1, 16)
+        name = f"a{step}"
+        ok = []
+        for b in (lists, tree):
+            try:
+                b.reserve(k, name)
+                ok.append(True)
+            except BuddyError:
+                ok.append(False)
+        if ok == [True, True]:
+            live.append(name)
+        elif ok[0] or ok[1]:
+            # la colocación difiere entre backends: deshacer para seguir comparando
+            for b, good in zip((lists, tree), ok):
+                if good:
+                    b.free(name)
+        for b in (lists, tree):
+            free_units = sum(len(starts) << o for o, starts in b._free_blocks().items())
+            used = sum(1 << o for _, o in b.allocated.values())
+            assert free_units + used == 256
+    for name in live:
+        tree.free(name)
+    assert tree.free_lists[tree.max_order] == [0]
+
+# operaciones por lotes (todo o nada)
+@pytest.mark.parametrize("backend", ["lists", "tree"])
+def test_reserve_many_and_free_many(backend):
+    b = make_allocator(64, backend)
+    got = b.reserve_many([(1, "a"), (16, "big"), (3, "c"), (1, "d")])
+    assert list(got) == ["a", "big", "c", "d"]
+    assert got["big"][1] == 4 and got["c"][1] == 2
+    starts = sorted((s, s + (1 << o)) for s, o in got.values())
+    assert all(prev[1] <= cur[0] for prev, cur in zip(starts, starts[1:]))
+    assert b.allocated == got
+    b.free_many(["a", "big", "c", "d"])
+    # misma forma en todos los backends: order -> starts libres ordenados
+    assert b.free_lists[b.max_order] == [0]
+
+def test_free_lists_same_shape_in_every_backend():
+    views = []
+    for backend in ("lists", "tree", "cached"):
+        b = make_allocator(32, backend, policy="lowest")
+        for i, k in enumerate((1, 8, 2, 1)):
+            b.reserve(k, f"n{i}")
+        b.free("n1")
+        views.append(b.free_lists)
+    assert views[0] == views[1] == views[2] == {0: [], 1: [], 2: [4], 3: [8], 4: [16], 5: []}
+
+@pytest.mark.parametrize("backend", ["lists", "tree", "cached"])
+def test_reserve_many_is_all_or_nothing(backend):
+    b = make_allocator(16, backend)
+    b.reserve(1, "keep")
+    before = b.show()
+    with pytest.raises(BuddyBatchError) as info:
+        b.reserve_many([(8, "x"), (4, "y"), (4, "z"), (0, "bad"), (1, "keep")])
+    failures = info.value.failures
+    assert set(failures) == {"z", "bad", "keep"}
+    assert b.show() == before
+    with pytest.raises(BuddyBatchError) as info:
+        b.free_many(["keep", "ghost", "keep"])
+    assert set(info.value.failures) == {"ghost", "keep"}
+    assert "keep" in b.allocated
+
+def test_cached_rollbacks_restore_free_lists_and_cache():
+    c = CachedBuddyAllocator(16)
+    c.reserve(1, "k")
+    before = c.show()
+    with pytest.raises(BuddyBatchError):
+        c.reserve_many([(1, "x"), (1, "y"), (64, "z")])
+    assert c.show() == before
+    # la reserva grande falla aun vaciando la caché; las chicas salen de las listas
+    for i in range(3):
+        c.reserve(1, f"c{i}")
+    c.free("c0")
+    c.free("c2")
+    c.reserve(4, "w")
+    before = c.show()
+    assert c.cache[0]
+    with pytest.raises(BuddyBatchError):
+        c.reserve_many([(1, "a"), (1, "b"), (16, "big")])
+    assert c.show() == before
+    # resize que falla tras liberar el bloque para reintentar
+    with pytest.raises(BuddyError):
+        c.resize("w", 16)
+    assert c.show() == before
+    c.check_invariants()
+
+def _assert_partition(total, free_blocks, allocated):
+    # bloques libres y asignados no se solapan y cubren exactamente el arena
+    spans = [(s, 1 << o) for o, starts in free_blocks.items() for s in starts]
+    spans += [(s, 1 << o) for s, o in allocated.values()]
+    spans.sort()
+    pos = 0
+    for start, size in spans:
+        assert start == pos and start % size == 0
+        pos += size
+    assert pos == total
+
+# variante concurrente con locks por subárbol
+def test_concurrent_allocator_basic_and_spanning():
+    b = ConcurrentBuddyAllocator(64, stripes=4)
+    assert b.reserve(32, "half") in {(0, 5), (32, 5)}
+    small = b.reserve(3, "s")
+    assert small[1] == 2
+    with pytest.raises(BuddyError):
+        b.reserve(1, "s")
+    with pytest.raises(BuddyError):
+        b.reserve(64, "all")
+    assert "half: start=" in b.show()
+    b.free("half")
+    b.free("s")
+    assert b._free_blocks()[6] == [0]
+    assert b.reserve(64, "all") == (0, 6)
+    with pytest.raises(BuddyError):
+        b.free("nope")
+    with pytest.raises(BuddyError):
+        ConcurrentBuddyAllocator(64, stripes=3)
+
+def test_concurrent_small_reservations_leave_room_for_spanning():
+    c = ConcurrentBuddyAllocator(64, stripes=8)
+    plain = BuddyAllocator(64)
+    for i in range(8):
+        assert c.reserve(1, f"s{i}") == plain.reserve(1, f"s{i}")
+    assert c.reserve(16, "big") == plain.reserve(16, "big") == (16, 4)
+    assert c.reserve(32, "half") == plain.reserve(32, "half") == (32, 5)
+    c.free("s3")
+    assert c.reserve(2, "pair") == (8, 1)  # el stripe 0 sólo tiene la unidad 3 libre
+    with pytest.raises(BuddyError):
+        c.reserve(16, "more")
+    for name in ("s0", "s1", "s2", "s4", "s5", "s6", "s7", "pair"):
+        c.free(name)
+    assert c.reserve(16, "more") == (0, 4)
+
+def test_concurrent_threads_start_in_their_own_stripes():
+    c = ConcurrentBuddyAllocator(64, stripes=8)
+    barrier = threading.Barrier(4)
+    placed = {}
+
+    def worker(tid):
+        barrier.wait()
+        for j in range(3):
+            placed[f"t{tid}-{j}"] = c.reserve(1, f"t{tid}-{j}")[0] // c.stripe_size
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # cada hilo usa un único stripe y ninguno comparte el suyo
+    stripes = [{placed[f"t{tid}-{j}"] for j in range(3)} for tid in range(4)]
+    assert all(len(st) == 1 for st in stripes)
+    assert len(set().union(*stripes)) == 4
+    # un hilo no espera el lock de un stripe ajeno
+    busy = c._stripes.index(next(st for st in c._stripes if st.allocated))
+    with c._locks[busy]:
+        other = threading.Thread(target=lambda: c.reserve(1, "libre"))
+        other.start()
+        other.join(timeout=5)
+        assert not other.is_alive()
+    assert "libre" in c.allocated
+
+def test_concurrent_full_stripes_are_skipped_without_failures():
+    c = ConcurrentBuddyAllocator(64, stripes=8)
+    for i in range(40):
+        c.reserve(1, f"s{i}")
+    assert [st.failures for st in c._stripes] == [0] * 8
+    assert sorted(start for start, _ in c.allocated.values()) == list(range(40))
+    for i in range(24):
+        c.reserve(1, f"r{i}")
+    with pytest.raises(BuddyError):
+        c.reserve(1, "lleno")
+    assert [st.failures for st in c._stripes] == [0] * 8
+
+@pytest.mark.parametrize("backend", ["lists", "tree"])
+def test_concurrent_allocator_stress(backend):
+    b = ConcurrentBuddyAllocator(1 << 12, stripes=8, backend=backend)
+    errors = []
+
+    def worker(tid):
+        rng = random.Random(tid)
+        live = []
+        try:
+            for step in range(1500):
+                if live and rng.random() < 0.5:
+                    b.free(live.pop(rng.randrange(len(live))))
+                else:
+                    name = f"t{tid}-{step}"
+                    try:
+                        b.reserve(rng.choice((1, 2, 3, 8, 30, 700)), name)
+                        live.append(name)
+                    except BuddyError:
+                        pass
+            for name in live[::2]:
+                b.free(name)
+        except Exception as e:  # pragma: no cover - sólo en caso de fallo
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    free_blocks, allocated = b._snapshot()
+    _assert_partition(b.N, free_blocks, allocated)
+    for name in list(allocated):
+        b.free(name)
+    assert b._free_blocks()[b.max_order] == [0]
+
+# front-end con varios arenas (shards)
+def test_sharded_size_routing_and_fallback():
+    b = ShardedBuddyAllocator([64, 8, 16])
+    assert b.reserve(2, "a") == (1, 0, 1)     # el shard más pequeño primero
+    assert b.reserve(8, "b")[0] == 2          # no cabe en lo que queda del shard 1
+    assert b.reserve(32, "c")[0] == 0         # sólo cabe en el grande
+    with pytest.raises(BuddyError):
+        b.reserve(128, "huge")
+    with pytest.raises(BuddyError):
+        b.reserve(1, "a")
+    st = b.stats()
+    assert st["total_units"] == 88 and st["allocations"] == 3 and st["failures"] == 1
+    assert st["free_units"] == 88 - 2 - 8 - 32
+    assert [p["allocations"] for p in st["per_shard"]] == [1, 1, 1]
+    assert b.allocated["c"] == (0, 0, 5)
+    out = b.show()
+    assert "Shard 2:" in out and "b: start=0" in out
+    b.free("b")
+    assert b.stats()["per_shard"][2]["free_units"] == 16
+    with pytest.raises(BuddyError):
+        b.free("b")
+    # los shards llenos se saltan sin contar un fallo en ellos
+    assert [p["failures"] for p in b.stats()["per_shard"]] == [0, 0, 0]
+
+def test_sharded_hash_routing_is_stable_and_falls_back():
+    b1 = ShardedBuddyAllocator([8, 8, 8, 8], routing="hash")
+    b2 = ShardedBuddyAllocator([8, 8, 8, 8], routing="hash", backend="tree")
+    for i in range(10):
+        assert b1.reserve(1, f"k{i}")[0] == b2.reserve(1, f"k{i}")[0]
+    # llenar todo: el shard preferido se agota y se usan los demás
+    for i in range(22):
+        b1.reserve(1, f"fill{i}")
+    assert b1.stats()["free_units"] == 0
+    assert all(p["failures"] == 0 for p in b1.stats()["per_shard"])
+    with pytest.raises(BuddyError):
+        b1.reserve(1, "extra")
+    st = b1.stats()
+    assert st["failures"] == 1 and all(p["failures"] == 0 for p in st["per_shard"])
+    with pytest.raises(BuddyError):
+        ShardedBuddyAllocator([8], routing="random")
+    with pytest.raises(BuddyError):
+        ShardedBuddyAllocator([])
+
+# caché de bloques pequeños delante del buddy
+def test_cached_allocator_reuses_blocks_without_split_merge():
+    b = CachedBuddyAllocator(16, high_water=2, max_cached_order=1)
+    first = b.reserve(1, "a")
+    b.free("a")
+    # el bloque queda en caché: no se coalesce
+    assert list(b.cache[0]) == [first[0]] and not b.free_lists[4]
+    assert b.reserve(1, "b") == first
+    st = b.cache_stats()
+    assert st["hits"] == 1 and st["misses"] == 1 and st["hit_rate"] == 0.5
+    # superar high_water expulsa el más antiguo hacia las listas buddy
+    for i in range(3):
+        b.reserve(1, f"x{i}")
+    for i in range(3):
+        b.free(f"x{i}")
+    assert len(b.cache[0]) == 2 and b.cache_stats()["evictions"] == 1
+    assert "Cache:" in b.show()
+    # órdenes fuera de la caché van directo al buddy
+    b.reserve(8, "big")
+    b.free("big")
+    assert b.cache_stats()["cached"] == {0: 2, 1: 0}
+
+def test_cached_allocator_flushes_cache_when_full():
+    b = CachedBuddyAllocator(8, high_water=8, max_cached_order=2)
+    for i in range(8):
+        b.reserve(1, f"n{i}")
+    for i in range(8):
+        b.free(f"n{i}")
+    assert len(b.cache[0]) == 8
+    # no hay bloque de 8 en las listas: se vacía la caché, se coalesce y se reintenta
+    assert b.reserve(8, "all") == (0, 3)
+    assert not any(b.cache.values())
+
+# estadísticas incrementales
+@pytest.mark.parametrize("backend", ["lists", "tree"])
+def test_stats_counters_and_fragmentation(backend):
+    b = make_allocator(16, backend)
+    st = b.stats()
+    assert st["free_units"] == 16 and st["largest_free_block"] == 16
+    assert st["external_fragmentation"] == 0.0 and st["internal_fragmentation"] == 0.0
+    b.reserve(3, "a")      # 16 -> 8 + 4 + [4]: dos splits
+    b.reserve(1, "b")      # 4 -> 2 + 1 + [1]: dos splits
+    with pytest.raises(BuddyError):
+        b.reserve(16, "c")
+    st = b.stats()
+    assert st["splits"] == 4 and st["failures"] == 1 and st["merges"] == 0
+    assert st["free_units"] == 11
+    assert st["free_blocks_per_order"] == {0: 1, 1: 1, 2: 0, 3: 1, 4: 0}
+    assert st["free_units_per_order"][3] == 8
+    assert st["largest_free_block"] == 8
+    assert st["requested_units"] == 4 and st["granted_units"] == 5
+    assert st["internal_fragmentation"] == pytest.approx(1 - 4 / 5)
+    assert st["external_fragmentation"] == pytest.approx(1 - 8 / 11)
+    b.free("a")
+    b.free("b")
+    st = b.stats()
+    assert st["merges"] == 4 and st["free_units"] == 16 and st["granted_units"] == 0
+    assert st["free_blocks_per_order"] == {0: 0, 1: 0, 2: 0, 3: 0, 4: 1}
+
+@pytest.mark.parametrize("backend", ["lists", "tree", "cached"])
+def test_stats_match_free_lists_under_random_churn(backend):
+    rng = random.Random(3)
+    b = make_allocator(512, backend)
+    live = []
+    for step in range(3000):
+        if live and rng.random() < 0.5:
+            b.free(live.pop(rng.randrange(len(live))))
+        else:
+            try:
+                b.reserve(rng.randint(1, 40), f"n{step}")
+                live.append(f"n{step}")
+            except BuddyError:
+                pass
+        if step % 97 == 0:
+            st = b.stats()
+            blocks = b._free_blocks()
+            assert st["free_blocks_per_order"] == {o: len(v) for o, v in blocks.items()}
+            assert st["free_units"] == sum(len(v) << o for o, v in blocks.items())
+            cached = st.get("cached_units", 0)
+            assert st["free_units"] + st["granted_units"] + cached == 512
+
+# snapshot binario (dump/load)
+@pytest.mark.parametrize("cls", [BuddyAllocator, BuddyTreeAllocator])
+def test_dump_load_roundtrip_matches_show(cls, tmp_path):
+    rng = random.Random(11)
+    b = cls(1024)
+    for i in range(300):
+        try:
+            b.reserve(rng.randint(1, 9), f"n{i}")
+        except BuddyError:
+            pass
+    for i in range(0, 300, 3):
+        if f"n{i}" in b.allocated:
+            b.free(f"n{i}")
+    b.reserve(2, "ñandú")
+    buf = io.BytesIO()
+    b.dump(buf)
+    # menos de 1 byte por unidad de arena (bitmaps ~N/4 bytes + tabla)
+    assert len(buf.getvalue()) < 1024 + 30 * len(b.allocated)
+    restored = cls.load(buf.getvalue())
+    assert type(restored) is cls
+    assert restored.show() == b.show()
+    st1, st2 = b.stats(), restored.stats()
+    for key in ("free_units", "free_blocks_per_order", "largest_free_block", "requested_units", "granted_units"):
+        assert st1[key] == st2[key]
+    # desde un archivo real (se mapea con mmap) y siguiendo operando tras cargar
+    path = tmp_path / "arena.bin"
+    with open(path, "wb") as f:
+        b.dump(f)
+    with open(path, "rb") as f:
+        from_file = cls.load(f)
+    assert from_file.show() == b.show()
+    for name in list(from_file.allocated):
+        from_file.free(name)
+    assert list(from_file.free_lists[from_file.max_order]) == [0]
+
+def test_load_from_file_position_after_a_header(tmp_path):
+    a, b = BuddyAllocator(64), BuddyTreeAllocator(128)
+    a.reserve(5, "x")
+    b.reserve(9, "y")
+    # dos snapshots seguidos tras una cabecera propia, en un archivo real y en memoria
+    path = tmp_path / "arenas.bin"
+    with open(path, "wb") as f:
+        f.write(b"CABECERA")
+        a.dump(f)
+        b.dump(f)
+        f.write(b"FIN")
+    with open(path, "rb") as f, io.BytesIO(path.read_bytes()) as mem:
+        for source in (f, mem):
+            assert source.read(8) == b"CABECERA"
+            assert BuddyAllocator.load(source).show() == a.show()
+            assert BuddyTreeAllocator.load(source).show() == b.show()
+            assert source.read() == b"FIN"
+
+def test_load_rejects_bad_snapshots_and_cached_dump_flushes():
+    with pytest.raises(BuddyError):
+        BuddyAllocator.load(b"XXXX" + bytes(12))
+    with pytest.raises(BuddyError):
+        BuddyAllocator.load(b"BU")
+    good = io.BytesIO()
+    BuddyAllocator(64).dump(good)
+    with pytest.raises(BuddyError):
+        BuddyAllocator.load(good.getvalue()[:-3])
+    c = CachedBuddyAllocator(16)
+    c.reserve(1, "a")
+    c.reserve(1, "b")
+    c.free("a")
+    buf = io.BytesIO()
+    c.dump(buf)
+    assert not any(c.cache.values())
+    assert BuddyAllocator.load(buf.getvalue()).show() == BuddyAllocator.show(c)
+
+# reproducción de trazas sin interacción
+def test_replay_trace_counts_and_summary():
+    b = BuddyAllocator(16)
+    lines = ["RESERVAR 4 a", "reservar 2 b", "", "MOSTRAR", "RESERVAR x c",
+             "LIBERAR a", "LIBERAR zz", "RESERVAR 64 big", "SALIR", "RESERVAR 1 tarde"]
+    summary = replay_trace(b, iter(lines))
+    assert summary["reserves"] == 4 and summary["frees"] == 2
+    assert summary["errors"] == 3 and summary["skipped"] == 1 and summary["ops"] == 6
+    assert summary["p50_us"] <= summary["p99_us"] <= summary["max_us"]
+    assert set(b.allocated) == {"b"}
+
+def test_main_replay_from_file(tmp_path, capsys):
+    trace = tmp_path / "trace.txt"
+    trace.write_text("".join(f"RESERVAR {1 + i % 5} n{i}\n" for i in range(200)) +
+                     "".join(f"LIBERAR n{i}\n" for i in range(200)), encoding="utf-8")
+    main(["1024", "--backend", "tree", "--replay", str(trace)])
+    out = capsys.readouterr().out
+    assert "Operaciones: 400 (reservas 200, liberaciones 200, errores 0" in out
+    assert "ops/s" in out and "p99=" in out
+
+# políticas de colocación
+@pytest.mark.parametrize("backend", ["lists", "tree"])
+def test_placement_policies_lowest_highest_nearest(backend):
+    low = make_allocator(64, backend, policy="lowest")
+    assert [low.reserve(4, f"a{i}")[0] for i in range(3)] == [0, 4, 8]
+    low.free("a1")
+    assert low.reserve(1, "x")[0] == 4
+    high = make_allocator(64, backend, policy="highest")
+    assert [high.reserve(4, f"a{i}")[0] for i in range(3)] == [60, 56, 52]
+    near = make_allocator(64, backend, policy="nearest")
+    assert near.reserve(4, "p", hint=37)[0] == 36
+    assert near.reserve(4, "q", hint=37)[0] in (32, 40)
+    # el más cercano dentro del menor order disponible (igual en ambos backends)
+    assert near.reserve(1, "r", hint=63)[0] == 47
+    # sin pista se usa 0: el más bajo del menor order libre
+    assert near.reserve(1, "s")[0] == 46
+    with pytest.raises(BuddyError):
+        make_allocator(64, backend, policy="random")
+
+def test_nearest_policy_same_placement_in_both_backends():
+    rng = random.Random(11)
+    lists = BuddyAllocator(256, policy="nearest")
+    tree = BuddyTreeAllocator(256, policy="nearest", debug=True)
+    live = []
+    for step in range(3000):
+        if live and rng.random() < 0.45:
+            name = live.pop(rng.randrange(len(live)))
+            lists.free(name)
+            tree.free(name)
+            continue
+        k, hint, name = rng.randint(1, 12), rng.randrange(-8, 264), f"n{step}"
+        try:
+            placed = lists.reserve(k, name, hint=hint)
+        except BuddyError:
+            with pytest.raises(BuddyError):
+                tree.reserve(k, name, hint=hint)
+            continue
+        assert tree.reserve(k, name, hint=hint) == placed
+        live.append(name)
+    def blocks(b):
+        return {o: sorted(starts) for o, starts in b._free_blocks().items()}
+    assert blocks(tree) == blocks(lists)
+
+@pytest.mark.parametrize("policy", ["lowest", "highest", "nearest"])
+def test_placement_policy_indexes_stay_consistent(policy):
+    rng = random.Random(5)
+    b = BuddyAllocator(256, policy=policy)
+    live = []
+    for step in range(3000):
+        if live and rng.random() < 0.5:
+            b.free(live.pop(rng.randrange(len(live))))
+        else:
+            try:
+                b.reserve(rng.randint(1, 12), f"n{step}", hint=rng.randrange(256))
+                live.append(f"n{step}")
+            except BuddyError:
+                pass
+    if policy == "nearest":
+        assert b.free_lists == b._index.items
+    buf = io.BytesIO()
+    b.dump(buf)
+    restored = BuddyAllocator.load(buf.getvalue(), policy=policy)
+    assert restored.show() == b.show()
+    for name in live:
+        b.free(name)
+    assert list(b.free_lists[b.max_order]) == [0]
+
+@pytest.mark.parametrize("policy", ["lowest", "highest"])
+def test_placement_heaps_stay_bounded_under_churn(policy):
+    # las entradas obsoletas de orders de los que nunca se saca también se compactan
+    b = BuddyAllocator(1024, policy=policy)
+    for _ in range(20000):
+        b.reserve(1, "x")
+        b.free("x")
+    assert all(len(b._index.items[o]) <= 2 * len(b._free_sets[o]) + 16 for o in range(b.max_order + 1))
+    rng = random.Random(3)
+    live = []
+    for step in range(20000):
+        if live and rng.random() < 0.5:
+            b.free(live.pop(rng.randrange(len(live))))
+        else:
+            try:
+                b.reserve(rng.randint(1, 64), f"n{step}")
+                live.append(f"n{step}")
+            except BuddyError:
+                pass
+        if step % 1000 == 0:
+            assert all(len(b._index.items[o]) <= 2 * len(b._free_sets[o]) + 16
+                       for o in range(b.max_order + 1))
+    b.check_invariants()
+
+# cambio de tamaño (resize)
+@pytest.mark.parametrize("backend", ["lists", "tree", "cached"])
+def test_resize_shrink_grow_in_place_and_relocate(backend):
+    b = make_allocator(32, backend, policy="lowest")
+    assert b.reserve(8, "a") == (0, 3)
+    # achicar en el lugar: las mitades superiores vuelven a las listas
+    assert b.resize("a", 2) == (0, 1, False)
+    assert b.stats()["granted_units"] == 2
+    # crecer en el lugar: los buddies superiores están libres
+    assert b.resize("a", 7) == (0, 3, False)
+    b.reserve(8, "b")                          # ocupa [8, 16)
+    # crecer a 16 exige [8, 16) libre -> hay que reubicar
+    start, order, moved = b.resize("a", 16)
+    assert (start, order, moved) == (16, 4, True)
+    assert b.allocated["a"] == (16, 4) and b._requested["a"] == 16
+    # sin espacio en ningún lado: falla y deja todo igual
+    before = b.show()
+    with pytest.raises(BuddyError):
+        b.resize("a", 32)
+    assert b.show() == before and b.allocated["a"] == (16, 4)
+    with pytest.raises(BuddyError):
+        b.resize("ghost", 1)
+    b.free("a")
+    b.free("b")
+    if backend == "cached":
+        b.flush_cache()
+    assert list(b.free_lists[b.max_order]) == [0]
+
+@pytest.mark.parametrize("backend", ["lists", "tree"])
+def test_resize_reuses_own_block_when_relocating(backend):
+    b = make_allocator(16, backend)
+    b.reserve(4, "x")
+    b.reserve(4, "y")
+    b.free("y")
+    b.reserve(8, "z")
+    # x sólo puede crecer a 8 soltando su bloque y fusionando con su buddy
+    start, order, moved = b.resize("x", 8)
+    assert order == 3 and b.allocated["z"][0] != start
+    assert b.stats()["free_units"] == 0
+
+def test_tree_load_then_split_large_free_block():
+    b = BuddyTreeAllocator(16)
+    b.reserve(1, "a")
+    buf = io.BytesIO()
+    b.dump(buf)
+    c = BuddyTreeAllocator.load(buf.getvalue())
+    # los descendientes de bloques libres cargados no deben usarse sin dividir
+    assert [c.reserve(1, n)[0] for n in "xyz"] == [1, 2, 3]
+    assert c.stats()["free_units"] == 12
+
+# fuzzing con verificación de invariantes tras cada operación (modo debug)
+@pytest.mark.parametrize("backend,policy", [("lists", "first"), ("lists", "nearest"), ("tree", "lowest"),
+                                            ("tree", "highest"), ("cached", "first")])
+def test_fuzz_random_operations_keep_invariants(backend, policy):
+    # semilla fija por caso (hash() de str cambia entre ejecuciones)
+    rng = random.Random(f"{backend}-{policy}")
+    b = make_allocator(128, backend, policy=policy, debug=True)
+    live = []
+    for step in range(1200):
+        action = rng.random()
+        try:
+            if action < 0.35:
+                name = f"r{step}"
+                b.reserve(rng.choice((1, 1, 2, 3, 5, 8, 17, 40)), name, hint=rng.randrange(128))
+                live.append(name)
+            elif action < 0.65 and live:
+                b.free(live.pop(rng.randrange(len(live))))
+            elif action < 0.8 and live:
+                b.resize(rng.choice(live), rng.randint(1, 48))
+            elif action < 0.9:
+                batch = [(rng.randint(1, 6), f"m{step}-{i}") for i in range(rng.randint(1, 5))]
+                live.extend(b.reserve_many(batch))
+            elif live:
+                chosen = rng.sample(live, min(len(live), rng.randint(1, 4)))
+                b.free_many(chosen)
+                live = [n for n in live if n not in chosen]
+        except BuddyError as e:
+            assert "Invariante" not in str(e)
+    b.check_invariants()
+
+def test_check_invariants_detects_corruption():
+    b = BuddyAllocator(16)
+    b.reserve(1, "a")
+    b.check_invariants()
+    # inyectar dos buddies libres sin fusionar
+    b._free_sets[0][0] = None
+    del b.allocated["a"]
+    with pytest.raises(BuddyError, match="sin fusionar"):
+        b.check_invariants()
+    c = BuddyAllocator(16)
+    c.reserve(4, "a")
+    c.allocated["b"] = (2, 1)   # se solapa con 'a'
+    with pytest.raises(BuddyError, match="solapamiento"):
+        c.check_invariants()
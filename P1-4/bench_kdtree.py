@@ -0,0 +1,78 @@
+# bench_kdtree.py
+# Kevin Briceño 15-11661
+# Benchmark del k-d tree contra la búsqueda por fuerza bruta.
+
+"""
+Genera una nube de puntos uniforme en el cubo unitario (semilla fija), construye
+el KDTree y compara el tiempo por consulta de query_radius y knn contra la
+fuerza bruta (abs(p - q) para cada punto). Verifica además que ambos den el
+mismo resultado.
+
+Uso:
+    python bench_kdtree.py [--n 100000 200000 1000000] [--queries 200]
+                           [--radius 0.02] [--k 10] [--seed 1]
+"""
+
+import argparse
+import heapq
+import random
+import time
+
+from vector3d import Vector3D
+from vector3d_kdtree import KDTree
+
+def brute_radius(points, center, r):
+    return [p for p in points if abs(p - center) <= r]
+
+def brute_knn(points, center, k):
+    return heapq.nsmallest(k, points, key=lambda p: abs(p - center))
+
+def per_query(fn, queries) -> float:
+    """Tiempo promedio (s) de fn(q) sobre las consultas."""
+    began = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - began) / len(queries)
+
+def bench(n: int, args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    points = [Vector3D(rng.random(), rng.random(), rng.random()) for _ in range(n)]
+    queries = [Vector3D(rng.random(), rng.random(), rng.random()) for _ in range(args.queries)]
+    # la fuerza bruta es O(n) por consulta: con pocas basta para medirla
+    brute_queries = queries[:args.brute_queries]
+
+    began = time.perf_counter()
+    tree = KDTree(points)
+    build = time.perf_counter() - began
+
+    for q in brute_queries:
+        assert {id(p) for p in tree.query_radius(q, args.radius)} == \
+               {id(p) for p in brute_radius(points, q, args.radius)}
+        assert [id(p) for p in tree.knn(q, args.k)] == \
+               [id(p) for p in brute_knn(points, q, args.k)]
+
+    rows = [
+        ("radio", per_query(lambda q: tree.query_radius(q, args.radius), queries),
+         per_query(lambda q: brute_radius(points, q, args.radius), brute_queries)),
+        (f"knn k={args.k}", per_query(lambda q: tree.knn(q, args.k), queries),
+         per_query(lambda q: brute_knn(points, q, args.k), brute_queries)),
+    ]
+    print(f"n={n}: construcción {build:.2f} s")
+    for label, fast, slow in rows:
+        print(f"  {label:10} kd-tree {fast * 1e3:9.3f} ms   fuerza bruta {slow * 1e3:9.1f} ms"
+              f"   ({slow / fast:,.0f}x)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del k-d tree")
+    parser.add_argument("--n", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--brute-queries", type=int, default=5)
+    parser.add_argument("--radius", type=float, default=0.02)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    for n in args.n:
+        bench(n, args)
+
+if __name__ == "__main__":
+    main()
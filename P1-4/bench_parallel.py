@@ -0,0 +1,70 @@
+# bench_parallel.py
+# Kevin Briceño 15-11661
+# Escalabilidad de las reducciones paralelas de vector3d_parallel.py.
+
+"""
+Genera n vectores aleatorios (semilla fija) en un Vector3DBatch y mide cada
+reducción de ParallelReducer con distinta cantidad de procesos. La columna
+"speedup" es relativa a la ejecución serial (1 proceso). Los tiempos incluyen
+la copia de las coordenadas a memoria compartida.
+
+Uso:
+    python bench_parallel.py [--n 2000000] [--workers 1 2 4 8] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import time
+
+from vector3d import Vector3D
+from vector3d_batch import Vector3DBatch
+from vector3d_parallel import ParallelReducer
+
+OPERATIONS = {
+    "sum": lambda r, data, v: r.sum(data),
+    "mean": lambda r, data, v: r.mean(data),
+    "max_norm": lambda r, data, v: r.max_norm(data),
+    "dots": lambda r, data, v: r.dots(data, v),
+    "norms": lambda r, data, v: r.norms(data),
+}
+
+def best_time(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - began)
+    return min(times)
+
+def main() -> None:
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, cpus} | {w for w in (2, 4, 8, 16) if w < cpus})
+    parser = argparse.ArgumentParser(description="Escalabilidad de las reducciones paralelas")
+    parser.add_argument("--n", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    n = args.n
+    data = Vector3DBatch([rng.uniform(-1, 1) for _ in range(n)],
+                         [rng.uniform(-1, 1) for _ in range(n)],
+                         [rng.uniform(-1, 1) for _ in range(n)])
+    v = Vector3D(0.5, -1, 2)
+
+    print(f"n={n}, {cpus} CPU(s)")
+    print(f"{'operación':10} {'procesos':>8} {'tiempo ms':>10} {'speedup':>8}")
+    baseline = {}
+    for workers in args.workers:
+        # serial_below=0: con más de un proceso siempre se reparte el trabajo
+        with ParallelReducer(workers=workers, serial_below=0) as reducer:
+            OPERATIONS["sum"](reducer, data[:1000], v)  # arranca el pool fuera de la medición
+            for name, op in OPERATIONS.items():
+                elapsed = best_time(lambda: op(reducer, data, v), args.repeat)
+                baseline.setdefault(name, elapsed)
+                print(f"{name:10} {workers:8d} {elapsed * 1e3:10.1f} {baseline[name] / elapsed:7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# bench_vector3d.py
+# Kevin Briceño 15-11661
+# Suite de benchmarks de Vector3D y de los núcleos por lotes.
+
+"""
+Mediciones reproducibles (operandos generados con semilla fija, sin red):
+
+- memory:      bytes por instancia de Vector3D (y de la réplica anterior) y
+               bytes por vector en un Vector3DBatch.
+- operators:   operaciones por segundo de cada operador de Vector3D
+               (+, -, * cruz y escalar, %, abs, ~, 0 & v, in-place).
+- expressions: las expresiones compuestas de prueba.py.
+- batch:       vectores por segundo de los núcleos por lotes (Vector3DBatch,
+               expresiones fusionadas y, si NumPy está instalado, Vector3DArray)
+               frente al ciclo equivalente sobre una lista de Vector3D.
+- legacy:      operadores actuales frente a la réplica de la versión anterior
+               (atributos en __dict__, float() en cada resultado, sin in-place).
+
+Con --json se escribe además un JSON con metadatos del entorno y todas las
+métricas; con --compare se compara contra un JSON anterior y el programa
+termina con código 1 si alguna métrica empeoró más que --tolerance.
+
+Uso:
+    python bench_vector3d.py [--suite all] [--n 200000] [--batch-size 100000]
+                             [--json resultados.json] [--compare base.json]
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from math import sqrt
+from typing import Callable, Dict
+
+from vector3d import Vector3D
+from vector3d_batch import Vector3DBatch
+from vector3d_lazy import fuse
+
+class LegacyVector3D:
+    """Réplica de la representación original, solo con los operadores medidos."""
+
+    def __init__(self, x, y, z):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    @staticmethod
+    def _is_number(value) -> bool:
+        return isinstance(value, (int, float))
+
+    def __add__(self, other):
+        if isinstance(other, LegacyVector3D):
+            return LegacyVector3D(self.x + other.x, self.y + other.y, self.z + other.z)
+        if self._is_number(other):
+            return LegacyVector3D(self.x + other, self.y + other, self.z + other)
+        return NotImplemented
+
+    def __sub__(self, other):
+        if isinstance(other, LegacyVector3D):
+            return LegacyVector3D(self.x - other.x, self.y - other.y, self.z - other.z)
+        if self._is_number(other):
+            return LegacyVector3D(self.x - other, self.y - other, self.z - other)
+        return NotImplemented
+
+    def __mul__(self, other):
+        if isinstance(other, LegacyVector3D):
+            cx = self.y * other.z - self.z * other.y
+            cy = self.z * other.x - self.x * other.z
+            cz = self.x * other.y - self.y * other.x
+            return LegacyVector3D(cx, cy, cz)
+        if self._is_number(other):
+            return LegacyVector3D(self.x * other, self.y * other, self.z * other)
+        return NotImplemented
+
+    def __mod__(self, other):
+        if not isinstance(other, LegacyVector3D):
+            return NotImplemented
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def __abs__(self):
+        return sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+def bytes_per_instance(make: Callable[[int], object], n: int) -> float:
+    """Memoria (tracemalloc) de n objetos creados con make(i), dividida entre n."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        items = [make(i) for i in range(n)]
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    # no cuenta la lista que los contiene (un puntero por elemento)
+    return used / len(items) - 8
+
+def batch_bytes_per_vector(n: int) -> float:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        batch = Vector3DBatch(range(n), range(n), range(n))
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return used / len(batch)
+
+# operadores medidos (a, b, c son vectores; s es un escalar; acc, un acumulador)
+OPERATORS = {
+    "a + b": "a + b",
+    "a - b": "a - b",
+    "a + s": "a + s",
+    "s - a": "s - a",
+    "a * b (cruz)": "a * b",
+    "a * s": "a * s",
+    "s * a": "s * a",
+    "a % b": "a % b",
+    "abs(a)": "abs(a)",
+    "~a": "~a",
+    "0 & a": "0 & a",
+    "acc += b": "acc += b",
+    "acc *= s": "acc *= s",
+}
+
+# expresiones compuestas de prueba.py
+EXPRESSIONS = {
+    "b + c": "b + c",
+    "a - 1": "a - 1",
+    "a * b + c": "a * b + c",
+    "a * 3.0 + ~b": "a * 3.0 + ~b",
+    "(b + b) * (c - a)": "(b + b) * (c - a)",
+    "a % (c * b)": "a % (c * b)",
+}
+
+# subconjunto que también entiende la réplica anterior
+LEGACY_OPERATIONS = {
+    "a + b": "a + b",
+    "a - b": "a - b",
+    "a * b (cruz)": "a * b",
+    "a * s": "a * s",
+    "a % b": "a % b",
+    "abs(a)": "abs(a)",
+    "a * s + b": "a * s + b",
+    "acc += b": "acc += b",
+}
+
+def operands(cls, seed: int) -> Dict[str, object]:
+    rng = random.Random(seed)
+    env = {name: cls(rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-10, 10))
+           for name in "abc"}
+    env["s"] = rng.uniform(0.5, 2)
+    return env
+
+def ops_per_sec(env: Dict[str, object], stmt: str, number: int, repeat: int) -> float:
+    # acc se crea en el setup para que sea local al ciclo medido
+    best = min(timeit.repeat(stmt, setup="acc = a + 0", globals=dict(env),
+                             number=number, repeat=repeat))
+    return number / best
+
+def vectors_per_sec(fn: Callable[[], object], size: int, repeat: int) -> float:
+    best = min(timeit.repeat(fn, number=1, repeat=repeat))
+    return size / best
+
+def suite_memory(args) -> Dict[str, float]:
+    n = args.n
+    return {
+        "Vector3D bytes/instancia": bytes_per_instance(lambda i: Vector3D(i, i + 1.0, i + 2.0), n),
+        "anterior bytes/instancia": bytes_per_instance(lambda i: LegacyVector3D(i, i + 1.0, i + 2.0), n),
+        "Vector3DBatch bytes/vector": batch_bytes_per_vector(n),
+    }
+
+def suite_operators(args) -> Dict[str, float]:
+    env = operands(Vector3D, args.seed)
+    return {label: ops_per_sec(env, stmt, args.n, args.repeat) for label, stmt in OPERATORS.items()}
+
+def suite_expressions(args) -> Dict[str, float]:
+    env = operands(Vector3D, args.seed)
+    return {label: ops_per_sec(env, stmt, args.n, args.repeat) for label, stmt in EXPRESSIONS.items()}
+
+def suite_legacy(args) -> Dict[str, float]:
+    results = {}
+    for label, stmt in LEGACY_OPERATIONS.items():
+        results[f"anterior: {label}"] = ops_per_sec(operands(LegacyVector3D, args.seed), stmt,
+                                                    args.n, args.repeat)
+        results[f"actual: {label}"] = ops_per_sec(operands(Vector3D, args.seed), stmt,
+                                                  args.n, args.repeat)
+    return results
+
+def suite_batch(args) -> Dict[str, float]:
+    size = args.batch_size
+    rng = random.Random(args.seed)
+    def cloud():
+        return [Vector3D(rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-10, 10))
+                for _ in range(size)]
+    xs, ys = cloud(), cloud()
+    c = Vector3D(0.5, -1, 2)
+    A, B = Vector3DBatch.from_vectors(xs), Vector3DBatch.from_vectors(ys)
+    expr = fuse(lambda a, b, c: (b + b) * (c - a))
+    kernels = {
+        "lista: a + b": lambda: [x + y for x, y in zip(xs, ys)],
+        "lista: a * b (cruz)": lambda: [x * y for x, y in zip(xs, ys)],
+        "lista: a % b": lambda: [x % y for x, y in zip(xs, ys)],
+        "lista: abs(a)": lambda: [abs(x) for x in xs],
+        "lista: (b + b) * (c - a)": lambda: [(y + y) * (c - x) for x, y in zip(xs, ys)],
+        "Vector3DBatch: a + b": lambda: A + B,
+        "Vector3DBatch: a * b (cruz)": lambda: A * B,
+        "Vector3DBatch: a % b": lambda: A % B,
+        "Vector3DBatch: abs(a)": lambda: abs(A),
+        "Vector3DBatch: (b + b) * (c - a)": lambda: (B + B) * (c - A),
+        "fusionado: (b + b) * (c - a)": lambda: expr(A, B, c),
+    }
+    try:
+        from vector3d_array import Vector3DArray
+    except ImportError:
+        pass
+    else:
+        NA, NB = Vector3DArray.from_vectors(xs), Vector3DArray.from_vectors(ys)
+        kernels.update({
+            "Vector3DArray: a + b": lambda: NA + NB,
+            "Vector3DArray: a * b (cruz)": lambda: NA * NB,
+            "Vector3DArray: a % b": lambda: NA % NB,
+            "Vector3DArray: abs(a)": lambda: abs(NA),
+            "Vector3DArray: (b + b) * (c - a)": lambda: (NB + NB) * (c - NA),
+        })
+    return {label: vectors_per_sec(fn, size, args.repeat) for label, fn in kernels.items()}
+
+SUITES = {
+    "memory": (suite_memory, "bytes"),
+    "operators": (suite_operators, "ops/s"),
+    "expressions": (suite_expressions, "ops/s"),
+    "batch": (suite_batch, "vectores/s"),
+    "legacy": (suite_legacy, "ops/s"),
+}
+
+def metadata(args) -> Dict[str, object]:
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "n": args.n,
+        "batch_size": args.batch_size,
+        "repeat": args.repeat,
+    }
+    try:
+        import numpy
+        meta["numpy"] = numpy.__version__
+    except ImportError:
+        meta["numpy"] = None
+    return meta
+
+def compare(results: Dict[str, Dict[str, float]], baseline_path: str, tolerance: float,
+            out=sys.stdout) -> int:
+    """Imprime la razón actual / base de cada métrica; retorna la cantidad de
+    regresiones (menos throughput, o más bytes, que la base más la tolerancia)."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = 0
+    print(f"\ncomparación contra {baseline_path} (tolerancia {tolerance:.0%})", file=out)
+    for suite, metrics in results.items():
+        for label, value in metrics.items():
+            old = baseline.get(suite, {}).get(label)
+            if not old:
+                continue
+            ratio = value / old
+            # en memoria, menos es mejor
+            worse = ratio > 1 + tolerance if suite == "memory" else ratio < 1 - tolerance
+            regressions += worse
+            print(f"{suite:12} {label:36} {ratio:6.2f}x{'  REGRESIÓN' if worse else ''}",
+                  file=out)
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de Vector3D")
+    parser.add_argument("--suite", nargs="+", choices=(*SUITES, "all"), default=["all"])
+    parser.add_argument("--n", type=int, default=200_000,
+                        help="operaciones por medición (y objetos en memory)")
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="ARCHIVO", help="escribir resultados en JSON ('-' = stdout)")
+    parser.add_argument("--compare", metavar="ARCHIVO", help="JSON base contra el cual comparar")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    names = list(SUITES) if "all" in args.suite else args.suite
+    results: Dict[str, Dict[str, float]] = {}
+    # con --json - la tabla va a stderr para no mezclarse con el JSON
+    out = sys.stderr if args.json == "-" else sys.stdout
+    for name in names:
+        run, unit = SUITES[name]
+        results[name] = run(args)
+        print(f"[{name}]", file=out)
+        for label, value in results[name].items():
+            print(f"  {label:36} {value:14,.0f} {unit}", file=out)
+
+    if args.json:
+        report = json.dumps({"meta": metadata(args), "results": results}, indent=2,
+                            ensure_ascii=False)
+        if args.json == "-":
+            print(report)
+        else:
+            with open(args.json, "w") as f:
+                f.write(report + "\n")
+    if args.compare and compare(results, args.compare, args.tolerance, out):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 # Pruebas unitarias para Vector3D
 import pytest
 import math
-from vector3d import Vector3D
+from vector3d import Vector3D, DuplicateIndex, dedupe
 
 EPS = 1e-9
 
@@ -75,3 +75,401 @@ def test_errors_and_type_resilience():
         _ = a % 3  # producto punto requiere Vector3D
     with pytest.raises(TypeError):
         _ = a * "x"  # multiplicación por cadena no soportada
+
+def test_slots_and_results_are_floats():
+    a = Vector3D(1, 2, 3)
+    assert not hasattr(a, "__dict__")
+    with pytest.raises(AttributeError):
+        a.w = 1.0
+    # los resultados salen del constructor interno: siguen siendo Vector3D con floats
+    for r in (a + 1, a - a, a * a, 2 * a, 10 - a):
+        assert type(r) is Vector3D
+        assert all(type(c) is float for c in r.to_tuple())
+
+def test_inplace_operators_mutate_without_allocating():
+    a = Vector3D(1, 2, 3)
+    same = a
+    a += Vector3D(1, 1, 1)
+    assert a is same and a == Vector3D(2, 3, 4)
+    a -= 1
+    assert a is same and a == Vector3D(1, 2, 3)
+    a *= 2
+    assert a is same and a == Vector3D(2, 4, 6)
+    # *= con vector es el producto cruz; también con alias (v *= v)
+    i = Vector3D(1, 0, 0)
+    i *= Vector3D(0, 1, 0)
+    assert i == Vector3D(0, 0, 1)
+    v = Vector3D(1, 2, 3)
+    v *= v
+    assert v == Vector3D(0, 0, 0)
+    with pytest.raises(TypeError):
+        a += "x"
+
+def test_hash_consistent_with_equality_for_computed_vectors():
+    a = Vector3D(0.1, 0.2, 0.3)
+    b = Vector3D(0.3, 0.1, 0.2) + Vector3D(-0.2, 0.1, 0.1)   # igual a a con error de redondeo
+    assert a == b and a.to_tuple() != b.to_tuple()
+    assert hash(a) == hash(b)
+    assert hash(Vector3D(0.0, 0, 0)) == hash(Vector3D(-0.0, 0, 0))
+    assert len({a, b, Vector3D(1, 2, 3)}) == 2
+    assert {a: "a"}[b] == "a"
+    hash(Vector3D(float("inf"), 0, float("nan")))  # no falla
+
+def test_hash_and_dedupe_follow_relative_tolerance_at_large_magnitudes():
+    import random
+    a, b = Vector3D(500.0, 1, 1), Vector3D(500.0000004, 1, 1)
+    assert a == b and len({a, b}) == 1 and dedupe([a, b]) == [a]
+    rng = random.Random(17)
+    mismatched = 0
+    for _ in range(2000):
+        c = [rng.choice((-1, 1)) * 10 ** rng.uniform(0, 12) for _ in range(3)]
+        v = Vector3D(*c)
+        w = Vector3D(*(x * (1 + rng.uniform(-0.9e-9, 0.9e-9)) for x in c))
+        assert v == w
+        mismatched += hash(v) != hash(w)
+        assert dedupe([v, w]) == [v]
+    # solo los pares que quedan a ambos lados del borde de una celda
+    assert mismatched <= 20
+    # dedupe coincide con una deduplicación por fuerza bruta con ==
+    base = [Vector3D(rng.uniform(-1e6, 1e6), rng.uniform(-1e3, 1e3), rng.uniform(-1, 1)) for _ in range(60)]
+    points = [Vector3D(*(x * (1 + rng.uniform(-2e-9, 2e-9)) + rng.uniform(-2e-9, 2e-9)
+                         for x in p.to_tuple())) for p in base for _ in range(4)]
+    rng.shuffle(points)
+    brute = []
+    for p in points:
+        if not any(p == q for q in brute):
+            brute.append(p)
+    assert dedupe(points) == brute
+    # con rel_tol=0 la tolerancia es solo absoluta
+    assert len(dedupe([a, b], rel_tol=0)) == 2
+
+def test_dedupe_with_non_finite_components():
+    inf, nan = float("inf"), float("nan")
+    pinf, ninf = Vector3D(inf, 0, 0), Vector3D(-inf, 0, 0)
+    n1, n2 = Vector3D(nan, 1, 2), Vector3D(nan, 1, 2)
+    finite = Vector3D(1, 0, 0)
+    # inf es igual a sí mismo; nan nunca es igual a nada (como con ==)
+    points = [pinf, Vector3D(inf, 0, 0), ninf, n1, n2, finite, Vector3D(1 + 1e-12, 0, 0)]
+    assert dedupe(points) == [pinf, ninf, n1, n2, finite]
+    assert len(dedupe(points, rel_tol=0)) == 5
+    # con rel_tol=0 un componente finito enorme tampoco tiene celda entera
+    huge = Vector3D(1e308, 0, 0)
+    assert dedupe([huge, Vector3D(1e308, 0, 0), pinf], rel_tol=0) == [huge, pinf]
+    index = DuplicateIndex()
+    assert index.add(pinf) is pinf and index.find(Vector3D(inf, 0, 0)) is pinf
+    assert index.find(n1) is None and index.find(ninf) is None
+
+def test_dedupe_matches_brute_force():
+    import random
+    rng = random.Random(5)
+    centers = [Vector3D(rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-10, 10)) for _ in range(50)]
+    tol = 1e-3
+    points = [c + Vector3D(rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1)) * (tol / 4)
+              for c in centers for _ in range(5)]
+    rng.shuffle(points)
+    def close(p, q):
+        return all(abs(u - w) <= tol for u, w in zip(p.to_tuple(), q.to_tuple()))
+    brute = []
+    for p in points:
+        if not any(close(p, q) for q in brute):
+            brute.append(p)
+    assert dedupe(points, tol) == brute
+    assert len(brute) == 50
+
+def test_duplicate_index_across_cell_borders_and_nearest():
+    index = DuplicateIndex(tol=1.0)
+    # 0.9 y 1.1 caen en celdas distintas pero son duplicados
+    first = index.add(Vector3D(0.9, 0, 0))
+    assert index.add(Vector3D(1.1, 0, 0)) is first
+    other = index.add(Vector3D(2.5, 0, 0))
+    assert other is not first and len(index) == 2
+    # 1.8 es duplicado de ambos: find devuelve el más cercano
+    assert index.find(Vector3D(1.8, 0, 0)) is other
+    assert index.find(Vector3D(5, 5, 5)) is None
+    with pytest.raises(ValueError):
+        DuplicateIndex(0)
+
+# --- Vector3DArray (requiere numpy) ---
+
+def _array_module():
+    pytest.importorskip("numpy")
+    import vector3d_array
+    return vector3d_array
+
+def test_array_roundtrip_and_indexing():
+    Vector3DArray = _array_module().Vector3DArray
+    vs = [Vector3D(1, 2, 3), Vector3D(-1, 0.5, 4)]
+    arr = Vector3DArray.from_vectors(vs)
+    assert len(arr) == 2
+    assert arr.data.shape == (2, 3) and arr.data.flags["C_CONTIGUOUS"]
+    assert arr.to_vectors() == vs
+    assert arr[1] == vs[1]
+    assert arr[:1].to_vectors() == vs[:1]
+    assert list(arr) == vs
+
+def test_array_matches_scalar_operators():
+    Vector3DArray = _array_module().Vector3DArray
+    import random
+    rng = random.Random(7)
+    def rand_vectors(n):
+        return [Vector3D(rng.uniform(-5, 5), rng.uniform(-5, 5), rng.uniform(-5, 5)) for _ in range(n)]
+    xs, ys = rand_vectors(50), rand_vectors(50)
+    a, b = Vector3DArray.from_vectors(xs), Vector3DArray.from_vectors(ys)
+    c = Vector3D(0.5, -2, 3)
+    assert (a + b).to_vectors() == [x + y for x, y in zip(xs, ys)]
+    assert (a - b).to_vectors() == [x - y for x, y in zip(xs, ys)]
+    assert (a * b).to_vectors() == [x * y for x, y in zip(xs, ys)]
+    assert (a + 3).to_vectors() == [x + 3 for x in xs]
+    assert (10 - a).to_vectors() == [10 - x for x in xs]
+    assert (2.5 * a).to_vectors() == [2.5 * x for x in xs]
+    # con un Vector3D a cualquier lado (difusión)
+    assert (a * c).to_vectors() == [x * c for x in xs]
+    assert (c * a).to_vectors() == [c * x for x in xs]
+    assert (c - a).to_vectors() == [c - x for x in xs]
+    for got, want in zip(a % b, [x % y for x, y in zip(xs, ys)]):
+        assert math.isclose(got, want, rel_tol=1e-9, abs_tol=EPS)
+    for got, want in zip(c % a, [c % x for x in xs]):
+        assert math.isclose(got, want, rel_tol=1e-9, abs_tol=EPS)
+    for norms in (abs(a), ~a, 0 & a):
+        for got, x in zip(norms, xs):
+            assert math.isclose(got, abs(x), rel_tol=1e-9)
+
+def test_array_composite_expression_and_errors():
+    Vector3DArray = _array_module().Vector3DArray
+    a = Vector3DArray.from_vectors([Vector3D(1, 0, 0)] * 3)
+    b = Vector3DArray.from_vectors([Vector3D(0, 1, 0)] * 3)
+    c = Vector3DArray.from_vectors([Vector3D(0, 0, 1)] * 3)
+    assert ((b + b) * (c - a)).to_vectors() == [Vector3D(2, 0, 2)] * 3
+    with pytest.raises(TypeError):
+        _ = a % 3
+    with pytest.raises(TypeError):
+        _ = a * "x"
+
+# --- Vector3DBatch (Python puro) ---
+
+from vector3d_batch import Vector3DBatch
+
+def test_batch_matches_scalar_operators():
+    import random
+    rng = random.Random(11)
+    def rand_vectors(n):
+        return [Vector3D(rng.uniform(-5, 5), rng.uniform(-5, 5), rng.uniform(-5, 5)) for _ in range(n)]
+    xs, ys = rand_vectors(40), rand_vectors(40)
+    a, b = Vector3DBatch.from_vectors(xs), Vector3DBatch.from_vectors(ys)
+    c = Vector3D(0.5, -2, 3)
+    assert a.to_vectors() == xs and list(a) == xs and a[3] == xs[3]
+    assert a.add(b).to_vectors() == [x + y for x, y in zip(xs, ys)] == (a + b).to_vectors()
+    assert (a - b).to_vectors() == [x - y for x, y in zip(xs, ys)]
+    assert a.scale(2.5).to_vectors() == [x * 2.5 for x in xs] == (2.5 * a).to_vectors()
+    assert a.cross(b).to_vectors() == [x * y for x, y in zip(xs, ys)]
+    assert (a * c).to_vectors() == [x * c for x in xs]
+    assert (c * a).to_vectors() == [c * x for x in xs]
+    assert (c - a).to_vectors() == [c - x for x in xs]
+    assert (a + 3).to_vectors() == [x + 3 for x in xs]
+    assert (10 - a).to_vectors() == [10 - x for x in xs]
+    for got, want in zip(a % b, [x % y for x, y in zip(xs, ys)]):
+        assert math.isclose(got, want, rel_tol=1e-9, abs_tol=EPS)
+    for norms in (a.norms(), abs(a), ~a, 0 & a):
+        for got, x in zip(norms, xs):
+            assert math.isclose(got, abs(x), rel_tol=1e-9)
+
+def test_batch_zero_copy_views_and_errors():
+    batch = Vector3DBatch.from_vectors([Vector3D(1, 2, 3), Vector3D(4, 5, 6)])
+    mx, my, mz = batch.memoryviews()
+    assert mx.format == "d" and mx.tolist() == [1.0, 4.0]
+    # las vistas comparten memoria con el lote
+    mz[1] = 9.0
+    assert batch[1] == Vector3D(4, 5, 9)
+    mx.release(); my.release(); mz.release()
+    batch.append(Vector3D(7, 8, 9))
+    assert len(batch) == 3 and batch[1:].to_vectors() == [Vector3D(4, 5, 9), Vector3D(7, 8, 9)]
+    with pytest.raises(ValueError):
+        _ = batch + batch[:1]
+    with pytest.raises(TypeError):
+        _ = batch % 3
+    with pytest.raises(TypeError):
+        batch.add("x")
+    with pytest.raises(ValueError):
+        Vector3DBatch([1.0], [2.0], [])
+
+# --- evaluación perezosa / fusionada ---
+
+from vector3d_lazy import lazy, fuse
+
+def test_lazy_matches_eager_expressions():
+    a, b, c = Vector3D(1, 2, 3), Vector3D(4, 5, 6), Vector3D(0, 1, 0)
+    assert (lazy(b) + c).evaluate() == b + c
+    assert (lazy(a) * 3.0 + ~lazy(b)).evaluate() == a * 3.0 + ~b
+    assert ((lazy(b) + b) * (lazy(c) - a)).evaluate() == (b + b) * (c - a)
+    assert math.isclose((lazy(a) % (lazy(c) * b)).evaluate(), a % (c * b))
+    assert (10 - lazy(a) * 2).evaluate() == 10 - a * 2
+    assert math.isclose((0 & (lazy(a) - b)).evaluate(), 0 & (a - b))
+    assert math.isclose((abs(lazy(a)) * (lazy(a) % b)).evaluate(), abs(a) * (a % b))
+    # subexpresión compartida: se calcula una sola vez
+    t = lazy(a) + b
+    assert (t * (t + 1)).evaluate() == (a + b) * ((a + b) + 1)
+
+def test_lazy_batches_in_one_pass():
+    import random
+    rng = random.Random(3)
+    xs = [Vector3D(rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1)) for _ in range(30)]
+    ys = [Vector3D(rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1)) for _ in range(30)]
+    c = Vector3D(0, 1, 0)
+    A, B = Vector3DBatch.from_vectors(xs), Vector3DBatch.from_vectors(ys)
+    got = ((lazy(B) + B) * (lazy(c) - A)).evaluate()
+    assert got.to_vectors() == [(y + y) * (c - x) for x, y in zip(xs, ys)]
+    norms = (lazy(A) * 3.0 + ~lazy(c)).evaluate()
+    assert norms.to_vectors() == [x * 3.0 + ~c for x in xs]
+    for got, x, y in zip((lazy(A) % B).evaluate(), xs, ys):
+        assert math.isclose(got, x % y, rel_tol=1e-9, abs_tol=EPS)
+    with pytest.raises(ValueError):
+        (lazy(A) + B[:5]).evaluate()
+
+def test_fuse_traces_once_per_argument_types():
+    calls = []
+
+    @fuse
+    def f(a, b, c):
+        calls.append(1)
+        return (b + b) * (c - a)
+
+    a, b, c = Vector3D(1, 2, 3), Vector3D(4, 5, 6), Vector3D(0, 1, 0)
+    assert f(a, b, c) == (b + b) * (c - a)
+    assert f(c, a, b) == (a + a) * (b - c)
+    assert len(calls) == 1
+    A = Vector3DBatch.from_vectors([a, b, c])
+    assert f(A, A, c).to_vectors() == [(v + v) * (c - v) for v in (a, b, c)]
+    assert len(calls) == 2
+    scaled = fuse(lambda v, s: v * s + ~v)
+    assert scaled(a, 2.0) == a * 2.0 + ~a and scaled(a, -1) == a * -1 + ~a
+
+def test_lazy_type_errors():
+    a = lazy(Vector3D(1, 2, 3))
+    with pytest.raises(TypeError):
+        _ = a % 3
+    with pytest.raises(TypeError):
+        _ = a * "x"
+    with pytest.raises(TypeError):
+        _ = ~(a % a)
+    with pytest.raises(TypeError):
+        lazy("x")
+
+# --- índice espacial ---
+
+from vector3d_kdtree import KDTree
+
+def _random_points(n, seed):
+    import random
+    rng = random.Random(seed)
+    return [Vector3D(rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1)) for _ in range(n)]
+
+def test_kdtree_radius_and_knn_match_brute_force():
+    points = _random_points(2000, 8)
+    tree = KDTree(points, leaf_size=8)
+    assert len(tree) == 2000
+    for q in _random_points(25, 9):
+        expected = {id(p) for p in points if abs(p - q) <= 0.3}
+        assert {id(p) for p in tree.query_radius(q, 0.3)} == expected
+        brute = sorted(points, key=lambda p: abs(p - q))[:7]
+        assert [id(p) for p in tree.knn(q, 7)] == [id(p) for p in brute]
+        dists = [d for d, _ in tree.knn_with_distances(q, 7)]
+        assert dists == sorted(dists) and math.isclose(dists[0], abs(brute[0] - q))
+
+def test_kdtree_duplicates_and_edge_cases():
+    same = [Vector3D(1, 1, 1) for _ in range(50)] + [Vector3D(2, 2, 2)]
+    tree = KDTree(same, leaf_size=4)
+    assert len(tree.query_radius(Vector3D(1, 1, 1), 0)) == 50
+    assert tree.knn(Vector3D(3, 3, 3), 1)[0] == Vector3D(2, 2, 2)
+    assert len(tree.knn(Vector3D(0, 0, 0), 100)) == 51
+    empty = KDTree([])
+    assert empty.query_radius(Vector3D(0, 0, 0), 1) == [] and empty.knn(Vector3D(0, 0, 0), 3) == []
+    with pytest.raises(ValueError):
+        KDTree(same, leaf_size=0)
+
+# --- reducciones paralelas ---
+
+from vector3d_parallel import ParallelReducer
+
+def test_parallel_reductions_match_serial():
+    points = _random_points(3000, 12)
+    batch = Vector3DBatch.from_vectors(points)
+    v = Vector3D(1, -2, 0.5)
+    with ParallelReducer(workers=1) as serial, \
+         ParallelReducer(workers=2, serial_below=0, chunks_per_worker=3) as parallel:
+        for data in (points, batch):
+            assert parallel.sum(data) == serial.sum(data)
+            total = Vector3D(0, 0, 0)
+            for p in points:
+                total += p
+            assert serial.sum(data) == total
+            assert parallel.mean(data) == total * (1 / len(points))
+            assert parallel.min_norm(data) == min(points, key=abs)
+            assert parallel.max_norm(data) == max(points, key=abs)
+            assert list(parallel.dots(data, v)) == list(serial.dots(data, v))
+            for got, p in zip(parallel.norms(data), points):
+                assert math.isclose(got, abs(p), rel_tol=1e-12)
+        # con una lista se devuelve el mismo objeto
+        assert parallel.max_norm(points) is max(points, key=abs)
+
+def test_parallel_reducer_edge_cases():
+    with ParallelReducer(workers=2, serial_below=0) as reducer:
+        assert reducer.sum([]) == Vector3D(0, 0, 0)
+        with pytest.raises(ValueError):
+            reducer.mean([])
+        with pytest.raises(ValueError):
+            reducer.max_norm([])
+        assert reducer.min_norm([Vector3D(3, 4, 0)]) == Vector3D(3, 4, 0)
+        # empate de normas: gana el primero
+        a, b = Vector3D(1, 0, 0), Vector3D(0, 1, 0)
+        assert reducer.max_norm([a, b]) is a
+
+# --- transformaciones ---
+
+from vector3d_transform import Transform3D
+
+def test_transform_rotation_translation_and_composition():
+    i, j, k = Vector3D(1, 0, 0), Vector3D(0, 1, 0), Vector3D(0, 0, 1)
+    rot = Transform3D.rotation(k, math.pi / 2)
+    assert rot(i) == j and rot(j) == Vector3D(-1, 0, 0) and rot(k) == k
+    move = Transform3D.translation(Vector3D(1, 2, 3))
+    scale = Transform3D.scaling(2)
+    p = Vector3D(0.5, -1, 4)
+    # '@' compone como matrices: primero el de la derecha
+    assert (move @ rot)(p) == move(rot(p))
+    combined = Transform3D.compose(scale, rot, move)
+    assert combined == rot.then(move) @ scale
+    assert combined(p) == move(rot(scale(p)))
+    assert combined.inverse()(combined(p)) == p
+    assert (combined @ combined.inverse()) == Transform3D.identity()
+    with pytest.raises(ValueError):
+        Transform3D.scaling(1, 0, 1).inverse()
+    # la singularidad se mide relativa a la escala de la matriz
+    tiny = Transform3D.scaling(1e-4)
+    assert tiny.inverse() == Transform3D.scaling(1e4)
+    assert (tiny @ tiny.inverse()) == Transform3D.identity()
+    with pytest.raises(ValueError):
+        Transform3D.scaling(1e-4, 0, 1e-4).inverse()
+    with pytest.raises(ValueError):
+        Transform3D(((1, 2, 3), (2, 4, 6), (0, 0, 1))).inverse()
+    with pytest.raises(ValueError):
+        Transform3D.rotation(Vector3D(0, 0, 0), 1.0)
+
+def test_transform_bulk_batch_and_stream():
+    points = _random_points(500, 21)
+    t = Transform3D.compose(Transform3D.rotation(Vector3D(1, 1, 0), 0.3),
+                            Transform3D.translation(Vector3D(-1, 0, 2)))
+    expected = [t(p) for p in points]
+    assert t.apply_many(points) == expected
+    assert t.apply_batch(Vector3DBatch.from_vectors(points)).to_vectors() == expected
+    # stream es perezoso: solo consume la entrada de a un trozo
+    consumed = []
+    def source():
+        for p in points:
+            consumed.append(p)
+            yield p
+    out = t.stream(source(), chunk_size=64)
+    assert next(out) == expected[0] and len(consumed) == 64
+    assert [next(out) for _ in range(63)] == expected[1:64] and len(consumed) == 64
+    assert list(out) == expected[64:]
+    with pytest.raises(ValueError):
+        next(t.stream(points, chunk_size=0))
@@ -2,12 +2,43 @@
 # Implementación de un tipo Vector3D con operadores aritméticos
 # Autor: Kevin Briceño
 
-from math import sqrt, isclose
-from typing import Union, Tuple
+from math import floor, isclose, isfinite, log, sqrt
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 Number = Union[int, float]
 
 EPS = 1e-9
+# tolerancia relativa de __eq__ (domina sobre EPS cuando |componente| > 1)
+REL_TOL = 1e-9
+
+# Lado de la rejilla usada por __hash__ (cerca del origen; ver _tolerance_units).
+# Es mucho mayor que EPS para que dos vectores iguales según __eq__ casi siempre
+# caigan en la misma celda.
+HASH_CELL = 1e-6
+
+def _tolerance_units(c: float, tol: float, rel_tol: float) -> float:
+    """Coordenada c medida en unidades de tolerancia: si
+    isclose(a, b, rel_tol=rel_tol, abs_tol=tol), entonces sus unidades difieren
+    a lo sumo en 1 (más un error despreciable). Es c / tol mientras domina la
+    tolerancia absoluta (|c| <= tol / rel_tol) y crece como log|c| / rel_tol
+    después, donde la tolerancia crece con |c|. Es continua y monótona."""
+    if not rel_tol:
+        return c / tol
+    limit = tol / rel_tol
+    if -limit <= c <= limit:
+        return c / tol
+    u = (1.0 + log(abs(c) / limit)) / rel_tol
+    return u if c > 0 else -u
+
+# celdas del hash en unidades de tolerancia de __eq__, y el |c| hasta el que
+# domina EPS (ahí las celdas miden exactamente HASH_CELL)
+_HASH_UNITS = HASH_CELL / EPS
+_HASH_LINEAR = EPS / REL_TOL
+
+def _hash_cell(c: float) -> int:
+    if -_HASH_LINEAR <= c <= _HASH_LINEAR:
+        return floor(c / HASH_CELL + 0.5)
+    return floor(_tolerance_units(c, EPS, REL_TOL) / _HASH_UNITS + 0.5)
 
 class Vector3D:
     """Vector tridimensional con operaciones sobrecargadas:
@@ -19,8 +50,12 @@ class Vector3D:
     - norma: usar abs(v) o ~v (retorna float)
     Nota: Python no permite operador unario '&', por eso ofrecemos ~v y abs(v).
     También se admite '0 & v' como atajo para norm(v) (ver __rand__).
+    Los operadores in-place (+=, -=, *=) modifican el vector sin crear otro.
     """
 
+    # sin __dict__ por instancia: menos memoria y acceso a atributos más rápido
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, x: Number, y: Number, z: Number):
         self.x = float(x)
         self.y = float(y)
@@ -37,9 +72,38 @@ class Vector3D:
     def __eq__(self, other) -> bool:
         if not isinstance(other, Vector3D):
             return False
-        return (isclose(self.x, other.x, rel_tol=1e-9, abs_tol=EPS) and
-                isclose(self.y, other.y, rel_tol=1e-9, abs_tol=EPS) and
-                isclose(self.z, other.z, rel_tol=1e-9, abs_tol=EPS))
+        return (isclose(self.x, other.x, rel_tol=REL_TOL, abs_tol=EPS) and
+                isclose(self.y, other.y, rel_tol=REL_TOL, abs_tol=EPS) and
+                isclose(self.z, other.z, rel_tol=REL_TOL, abs_tol=EPS))
+
+    # Hash por celdas: vectores iguales según __eq__ obtienen el mismo hash salvo
+    # que queden a ambos lados del borde de una celda. Las celdas miden HASH_CELL
+    # para |componente| <= 1 y, como __eq__ tolera un error relativo, por encima
+    # crecen en proporción a |componente| (HASH_CELL * |c|): la tolerancia sigue
+    # siendo unas 1000 veces menor que la celda a cualquier escala.
+    # La igualdad con tolerancia no es transitiva, así que ninguna rejilla puede
+    # evitar el caso del borde; para agrupar sin esa limitación usar dedupe() o
+    # DuplicateIndex, que revisan también las celdas vecinas.
+    # Ojo: no mutar (+=, -=, *=) un vector mientras sea clave de un dict o set.
+    def __hash__(self) -> int:
+        x, y, z = self.x, self.y, self.z
+        lim = _HASH_LINEAR
+        try:
+            if -lim <= x <= lim and -lim <= y <= lim and -lim <= z <= lim:
+                # caso común, igual a _hash_cell pero sin llamadas
+                return hash((floor(x / HASH_CELL + 0.5), floor(y / HASH_CELL + 0.5),
+                             floor(z / HASH_CELL + 0.5)))
+            return hash((_hash_cell(x), _hash_cell(y), _hash_cell(z)))
+        except (OverflowError, ValueError):
+            # inf / nan no tienen celda
+            return hash((self.x, self.y, self.z))
+
+    def grid_key(self, cell: float) -> Tuple[int, int, int]:
+        """Índices enteros de la celda de lado `cell` que contiene al vector.
+        Las celdas están centradas en los múltiplos de `cell`: valores "redondos"
+        como 0.3 quedan lejos de los bordes aunque tengan error de redondeo."""
+        return (floor(self.x / cell + 0.5), floor(self.y / cell + 0.5),
+                floor(self.z / cell + 0.5))
 
     # Helper para detectar número
     @staticmethod
@@ -49,10 +113,10 @@ class Vector3D:
     # Suma
     def __add__(self, other):
         if isinstance(other, Vector3D):
-            return Vector3D(self.x + other.x, self.y + other.y, self.z + other.z)
+            return _vector(self.x + other.x, self.y + other.y, self.z + other.z)
         if self._is_number(other):
             # suma escalar elemento a elemento
-            return Vector3D(self.x + other, self.y + other, self.z + other)
+            return _vector(self.x + other, self.y + other, self.z + other)
         return NotImplemented
 
     def __radd__(self, other):
@@ -62,15 +126,15 @@ class Vector3D:
     # Resta
     def __sub__(self, other):
         if isinstance(other, Vector3D):
-            return Vector3D(self.x - other.x, self.y - other.y, self.z - other.z)
+            return _vector(self.x - other.x, self.y - other.y, self.z - other.z)
         if self._is_number(other):
-            return Vector3D(self.x - other, self.y - other, self.z - other)
+            return _vector(self.x - other, self.y - other, self.z - other)
         return NotImplemented
 
     def __rsub__(self, other):
         # permite escalar - vector -> (n-x, n-y, n-z)
         if self._is_number(other):
-            return Vector3D(other - self.x, other - self.y, other - self.z)
+            return _vector(other - self.x, other - self.y, other - self.z)
         return NotImplemented
 
     # Multiplicación: sobrecargada para producto cruz (Vector x Vector) y escalar
@@ -80,16 +144,60 @@ class Vector3D:
             cx = self.y * other.z - self.z * other.y
             cy = self.z * other.x - self.x * other.z
             cz = self.x * other.y - self.y * other.x
-            return Vector3D(cx, cy, cz)
+            return _vector(cx, cy, cz)
         # Vector * escalar => multiplicación escalar
         if self._is_number(other):
-            return Vector3D(self.x * other, self.y * other, self.z * other)
+            return _vector(self.x * other, self.y * other, self.z * other)
         return NotImplemented
 
     def __rmul__(self, other):
         # escalar * Vector
         if self._is_number(other):
-            return Vector3D(self.x * other, self.y * other, self.z * other)
+            return _vector(self.x * other, self.y * other, self.z * other)
+        return NotImplemented
+
+    # Operadores in-place: mutan self en lugar de crear un Vector3D nuevo
+    def __iadd__(self, other):
+        if isinstance(other, Vector3D):
+            self.x += other.x
+            self.y += other.y
+            self.z += other.z
+            return self
+        if self._is_number(other):
+            self.x += other
+            self.y += other
+            self.z += other
+            return self
+        return NotImplemented
+
+    def __isub__(self, other):
+        if isinstance(other, Vector3D):
+            self.x -= other.x
+            self.y -= other.y
+            self.z -= other.z
+            return self
+        if self._is_number(other):
+            self.x -= other
+            self.y -= other
+            self.z -= other
+            return self
+        return NotImplemented
+
+    def __imul__(self, other):
+        # producto cruz in-place: se leen ambos operandos antes de escribir
+        # (other puede ser el mismo self, como en v *= v)
+        if isinstance(other, Vector3D):
+            x, y, z = self.x, self.y, self.z
+            ox, oy, oz = other.x, other.y, other.z
+            self.x = y * oz - z * oy
+            self.y = z * ox - x * oz
+            self.z = x * oy - y * ox
+            return self
+        if self._is_number(other):
+            self.x *= other
+            self.y *= other
+            self.z *= other
+            return self
         return NotImplemented
 
     # Producto punto usando operador '%' (módulo)
@@ -128,3 +236,105 @@ class Vector3D:
     def from_iterable(cls, it):
         x, y, z = it
         return cls(x, y, z)
+
+class DuplicateIndex:
+    """Conjunto de representantes únicos con la misma tolerancia que __eq__: dos
+    vectores son duplicados si cada componente cumple
+    isclose(a, b, rel_tol=rel_tol, abs_tol=tol). Con los valores por defecto
+    (EPS, REL_TOL) eso es exactamente v == w; con rel_tol=0 la tolerancia es
+    solo absoluta.
+
+    Los representantes se guardan en una rejilla (dict de celdas) de 4
+    unidades de tolerancia de lado: 4*tol cerca del origen y proporcional a |c|
+    donde domina la tolerancia relativa. Una consulta solo revisa las celdas
+    que toca el cubo de tolerancia alrededor de v (de 1 a 8, unas 3 en
+    promedio), así que cuesta O(1) en promedio en vez de O(n). Como los
+    representantes no son duplicados entre sí, cada celda guarda pocos vectores.
+    """
+
+    # lado de las celdas y radio de búsqueda, en unidades de tolerancia
+    _CELL = 4.0
+    _REACH = 1.0 + 1e-6
+
+    def __init__(self, tol: float = EPS, rel_tol: float = REL_TOL):
+        if tol <= 0:
+            raise ValueError("la tolerancia debe ser positiva")
+        if rel_tol < 0:
+            raise ValueError("la tolerancia relativa no puede ser negativa")
+        self.tol = tol
+        self.rel_tol = rel_tol
+        self.vectors: List[Vector3D] = []
+        self._cells: Dict[Tuple[int, int, int], List[Vector3D]] = {}
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _units(self, c: float) -> float:
+        return _tolerance_units(c, self.tol, self.rel_tol)
+
+    def _cell(self, c: float) -> Union[int, float]:
+        u = self._units(c)
+        if not isfinite(u):
+            # inf / nan (o un c enorme con rel_tol=0) no tienen índice entero: van
+            # a una celda propia con clave u; find igual compara con isclose
+            return u
+        return floor(u / self._CELL + 0.5)
+
+    def _key(self, v: Vector3D) -> Tuple[Union[int, float], ...]:
+        return (self._cell(v.x), self._cell(v.y), self._cell(v.z))
+
+    def _span(self, c: float) -> Iterable[Union[int, float]]:
+        u, cell, reach = self._units(c), self._CELL, self._REACH
+        if not isfinite(u):
+            return (u,)
+        return range(floor((u - reach) / cell + 0.5), floor((u + reach) / cell + 0.5) + 1)
+
+    def find(self, v: Vector3D) -> Optional[Vector3D]:
+        """Representante más cercano (distancia euclídea) que sea duplicado de v,
+        o None si no hay ninguno."""
+        tol, rel_tol = self.tol, self.rel_tol
+        cells = self._cells
+        best, best_dist = None, None
+        xs, ys, zs = self._span(v.x), self._span(v.y), self._span(v.z)
+        for i in xs:
+            for j in ys:
+                for k in zs:
+                    for p in cells.get((i, j, k), ()):
+                        if (isclose(p.x, v.x, rel_tol=rel_tol, abs_tol=tol) and
+                                isclose(p.y, v.y, rel_tol=rel_tol, abs_tol=tol) and
+                                isclose(p.z, v.z, rel_tol=rel_tol, abs_tol=tol)):
+                            dx, dy, dz = p.x - v.x, p.y - v.y, p.z - v.z
+                            dist = dx * dx + dy * dy + dz * dz
+                            if best is None or dist < best_dist:
+                                best, best_dist = p, dist
+        return best
+
+    def add(self, v: Vector3D) -> Vector3D:
+        """Agrega v si no tiene duplicado; retorna el representante que le toca."""
+        found = self.find(v)
+        if found is not None:
+            return found
+        self._cells.setdefault(self._key(v), []).append(v)
+        self.vectors.append(v)
+        return v
+
+def dedupe(vectors: Iterable[Vector3D], tol: float = EPS,
+           rel_tol: float = REL_TOL) -> List[Vector3D]:
+    """Elimina duplicados (vectores iguales, con la tolerancia de DuplicateIndex,
+    a uno ya visto), conservando el primero de cada grupo y el orden original.
+    Con los valores por defecto usa la misma igualdad que ==. O(n) en promedio."""
+    index = DuplicateIndex(tol, rel_tol)
+    for v in vectors:
+        index.add(v)
+    return index.vectors
+
+# Constructor interno para resultados de operaciones: los componentes ya son
+# float, así que se evita __init__ y sus tres llamadas a float().
+_new_vector = object.__new__
+
+def _vector(x: float, y: float, z: float) -> Vector3D:
+    v = _new_vector(Vector3D)
+    v.x = x
+    v.y = y
+    v.z = z
+    return v
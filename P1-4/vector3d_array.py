@@ -0,0 +1,143 @@
+# vector3d_array.py
+# Arreglo de vectores tridimensionales respaldado por NumPy
+# Autor: Kevin Briceño
+
+from itertools import chain
+from typing import Iterable, List
+
+import numpy as np
+
+from vector3d import Vector3D, _vector
+
+class Vector3DArray:
+    """Colección de N vectores guardada en un buffer contiguo float64 de forma (N, 3).
+
+    Soporta los mismos operadores que Vector3D, aplicados fila a fila en forma
+    vectorizada (sin crear un objeto Vector3D por elemento):
+    - suma / resta con otro Vector3DArray, con un Vector3D (broadcast) o con escalares
+    - '*': producto cruz fila a fila con vectores, o multiplicación escalar
+    - '%': producto punto fila a fila (retorna ndarray de forma (N,))
+    - abs(arr), ~arr y '0 & arr': normas fila a fila (ndarray de forma (N,))
+    """
+
+    # evita que ndarray.__add__ & cía. intenten operar elemento a elemento
+    # con nosotros: así Python delega en nuestros métodos reflejados
+    __array_ufunc__ = None
+
+    def __init__(self, data):
+        self.data = np.ascontiguousarray(data, dtype=np.float64).reshape(-1, 3)
+
+    @classmethod
+    def from_vectors(cls, vectors: Iterable[Vector3D]) -> "Vector3DArray":
+        vectors = list(vectors)
+        flat = np.fromiter(chain.from_iterable((v.x, v.y, v.z) for v in vectors),
+                           dtype=np.float64, count=3 * len(vectors))
+        return cls(flat)
+
+    def to_vectors(self) -> List[Vector3D]:
+        return [_vector(x, y, z) for x, y, z in self.data.tolist()]
+
+    # Contenedor
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            x, y, z = self.data[index].tolist()
+            return _vector(x, y, z)
+        return Vector3DArray(self.data[index])
+
+    def __iter__(self):
+        return iter(self.to_vectors())
+
+    def __array__(self, dtype=None, copy=None):
+        return self.data if dtype is None else self.data.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"Vector3DArray({len(self)} vectores)"
+
+    # Comparación aproximada, con la misma tolerancia que Vector3D.__eq__
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Vector3DArray) or other.data.shape != self.data.shape:
+            return False
+        return bool(np.allclose(self.data, other.data, rtol=1e-9, atol=1e-9))
+
+    # Helper: convierte el otro operando en algo que numpy pueda difundir.
+    # Retorna (valor, es_vector) o None si el tipo no está soportado.
+    @staticmethod
+    def _operand(other):
+        if isinstance(other, Vector3DArray):
+            return other.data, True
+        if isinstance(other, Vector3D):
+            return np.array((other.x, other.y, other.z)), True
+        if isinstance(other, (int, float)):
+            return other, False
+        return None
+
+    # Suma
+    def __add__(self, other):
+        op = self._operand(other)
+        if op is None:
+            return NotImplemented
+        return Vector3DArray(self.data + op[0])
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    # Resta
+    def __sub__(self, other):
+        op = self._operand(other)
+        if op is None:
+            return NotImplemented
+        return Vector3DArray(self.data - op[0])
+
+    def __rsub__(self, other):
+        # escalar - arreglo o Vector3D - arreglo
+        op = self._operand(other)
+        if op is None:
+            return NotImplemented
+        return Vector3DArray(op[0] - self.data)
+
+    # Multiplicación: producto cruz fila a fila o escalar
+    def __mul__(self, other):
+        op = self._operand(other)
+        if op is None:
+            return NotImplemented
+        value, is_vector = op
+        if is_vector:
+            return Vector3DArray(np.cross(self.data, value))
+        return Vector3DArray(self.data * value)
+
+    def __rmul__(self, other):
+        # Vector3D * arreglo: el producto cruz no es conmutativo
+        op = self._operand(other)
+        if op is None:
+            return NotImplemented
+        value, is_vector = op
+        if is_vector:
+            return Vector3DArray(np.cross(value, self.data))
+        return Vector3DArray(self.data * value)
+
+    # Producto punto fila a fila
+    def __mod__(self, other):
+        op = self._operand(other)
+        if op is None or not op[1]:
+            return NotImplemented
+        return np.einsum("ij,ij->i", self.data, np.broadcast_to(op[0], self.data.shape))
+
+    def __rmod__(self, other):
+        # Vector3D % arreglo: el punto sí es simétrico
+        return self.__mod__(other)
+
+    # Normas fila a fila
+    def __abs__(self) -> np.ndarray:
+        return np.sqrt(np.einsum("ij,ij->i", self.data, self.data))
+
+    def __invert__(self) -> np.ndarray:
+        return abs(self)
+
+    def __rand__(self, other):
+        # igual que Vector3D: "0 & arr" devuelve las normas
+        if other == 0:
+            return abs(self)
+        return NotImplemented
@@ -0,0 +1,192 @@
+# vector3d_batch.py
+# Lote de vectores tridimensionales en Python puro (sin NumPy)
+# Autor: Kevin Briceño
+
+from array import array
+from itertools import repeat
+from math import hypot
+from operator import add, mul, sub
+from typing import Iterable, List, Tuple
+
+from vector3d import Vector3D, _vector
+
+class Vector3DBatch:
+    """Lote de N vectores en forma de "structure of arrays": las coordenadas
+    x, y, z se guardan en tres buffers array('d') independientes.
+
+    Las operaciones masivas recorren los buffers con map() sobre funciones de
+    `operator` (o comprensiones sobre zip() cuando combinan varias coordenadas),
+    sin crear ningún Vector3D por elemento. Cada operación acepta otro lote (de la misma longitud), un
+    Vector3D (se aplica a todas las filas) o un escalar:
+    - add / sub          -> nuevo lote (también con + y -)
+    - scale              -> nuevo lote (también con * escalar)
+    - cross              -> nuevo lote (también con * vector)
+    - dot                -> array('d') con un producto punto por fila (también con %)
+    - norms              -> array('d') con la norma de cada fila (también abs, ~, 0 &)
+
+    Los buffers `x`, `y`, `z` soportan el protocolo de buffer: memoryview(lote.x)
+    o lote.memoryviews() exponen las coordenadas sin copiarlas.
+    """
+
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, xs: Iterable[float] = (), ys: Iterable[float] = (),
+                 zs: Iterable[float] = ()):
+        self.x = array("d", xs)
+        self.y = array("d", ys)
+        self.z = array("d", zs)
+        if not len(self.x) == len(self.y) == len(self.z):
+            raise ValueError("las tres coordenadas deben tener la misma longitud")
+
+    @classmethod
+    def from_vectors(cls, vectors: Iterable[Vector3D]) -> "Vector3DBatch":
+        vectors = list(vectors)
+        return cls([v.x for v in vectors], [v.y for v in vectors], [v.z for v in vectors])
+
+    def to_vectors(self) -> List[Vector3D]:
+        return list(map(_vector, self.x, self.y, self.z))
+
+    def append(self, v: Vector3D) -> None:
+        self.x.append(v.x)
+        self.y.append(v.y)
+        self.z.append(v.z)
+
+    def memoryviews(self) -> Tuple[memoryview, memoryview, memoryview]:
+        """Vistas (sin copia) de los tres buffers de coordenadas, formato 'd'."""
+        return memoryview(self.x), memoryview(self.y), memoryview(self.z)
+
+    # Contenedor
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Vector3DBatch(self.x[index], self.y[index], self.z[index])
+        return _vector(self.x[index], self.y[index], self.z[index])
+
+    def __iter__(self):
+        return map(_vector, self.x, self.y, self.z)
+
+    def __repr__(self) -> str:
+        return f"Vector3DBatch({len(self)} vectores)"
+
+    # Comparación aproximada fila a fila, con la semántica de Vector3D.__eq__
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Vector3DBatch) or len(other) != len(self):
+            return False
+        return all(map(Vector3D.__eq__, self, other))
+
+    # Helper: iterables de componentes del otro operando, alineados con las filas.
+    # Retorna (ox, oy, oz, es_vector) o None si el tipo no está soportado.
+    def _components(self, other):
+        if isinstance(other, Vector3DBatch):
+            if len(other) != len(self):
+                raise ValueError("los lotes deben tener la misma longitud")
+            return other.x, other.y, other.z, True
+        if isinstance(other, Vector3D):
+            return repeat(other.x), repeat(other.y), repeat(other.z), True
+        if isinstance(other, (int, float)):
+            return repeat(other), repeat(other), repeat(other), False
+        return None
+
+    def _elementwise(self, op, other):
+        comps = self._components(other)
+        if comps is None:
+            return NotImplemented
+        ox, oy, oz, _ = comps
+        return Vector3DBatch(map(op, self.x, ox), map(op, self.y, oy), map(op, self.z, oz))
+
+    # Operaciones masivas
+    def add(self, other) -> "Vector3DBatch":
+        return self._checked(self._elementwise(add, other))
+
+    def sub(self, other) -> "Vector3DBatch":
+        return self._checked(self._elementwise(sub, other))
+
+    def scale(self, factor: float) -> "Vector3DBatch":
+        return Vector3DBatch(map(mul, self.x, repeat(factor)),
+                             map(mul, self.y, repeat(factor)),
+                             map(mul, self.z, repeat(factor)))
+
+    def cross(self, other) -> "Vector3DBatch":
+        comps = self._components(other)
+        if comps is None or not comps[3]:
+            raise TypeError("el producto cruz requiere un Vector3D o un Vector3DBatch")
+        return self._cross(self.x, self.y, self.z, *comps[:3])
+
+    @staticmethod
+    def _cross(x, y, z, ox, oy, oz) -> "Vector3DBatch":
+        # un mismo repeat() puede alimentar varios zip(): siempre da el mismo valor
+        return Vector3DBatch([b * f - c * e for b, c, e, f in zip(y, z, oy, oz)],
+                             [c * d - a * f for a, c, d, f in zip(x, z, ox, oz)],
+                             [a * e - b * d for a, b, d, e in zip(x, y, ox, oy)])
+
+    def dot(self, other) -> array:
+        comps = self._components(other)
+        if comps is None or not comps[3]:
+            raise TypeError("el producto punto requiere un Vector3D o un Vector3DBatch")
+        ox, oy, oz, _ = comps
+        return array("d", [a * d + b * e + c * f
+                           for a, b, c, d, e, f in zip(self.x, self.y, self.z, ox, oy, oz)])
+
+    def norms(self) -> array:
+        return array("d", map(hypot, self.x, self.y, self.z))
+
+    @staticmethod
+    def _checked(result):
+        if result is NotImplemented:
+            raise TypeError("operando no soportado: se espera Vector3DBatch, Vector3D o escalar")
+        return result
+
+    # Operadores, con la misma semántica que Vector3D
+    def __add__(self, other):
+        return self._elementwise(add, other)
+
+    def __radd__(self, other):
+        return self._elementwise(add, other)
+
+    def __sub__(self, other):
+        return self._elementwise(sub, other)
+
+    def __rsub__(self, other):
+        # escalar - lote o Vector3D - lote
+        comps = self._components(other)
+        if comps is None:
+            return NotImplemented
+        ox, oy, oz, _ = comps
+        return Vector3DBatch(map(sub, ox, self.x), map(sub, oy, self.y), map(sub, oz, self.z))
+
+    def __mul__(self, other):
+        if isinstance(other, (int, float)):
+            return self.scale(other)
+        if isinstance(other, (Vector3D, Vector3DBatch)):
+            return self.cross(other)
+        return NotImplemented
+
+    def __rmul__(self, other):
+        if isinstance(other, (int, float)):
+            return self.scale(other)
+        if isinstance(other, Vector3D):
+            # Vector3D * lote: el producto cruz no es conmutativo
+            ox, oy, oz, _ = self._components(other)
+            return self._cross(ox, oy, oz, self.x, self.y, self.z)
+        return NotImplemented
+
+    def __mod__(self, other):
+        if isinstance(other, (Vector3D, Vector3DBatch)):
+            return self.dot(other)
+        return NotImplemented
+
+    def __rmod__(self, other):
+        return self.__mod__(other)
+
+    def __abs__(self) -> array:
+        return self.norms()
+
+    def __invert__(self) -> array:
+        return self.norms()
+
+    def __rand__(self, other):
+        if other == 0:
+            return self.norms()
+        return NotImplemented
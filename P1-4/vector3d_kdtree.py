@@ -0,0 +1,161 @@
+# vector3d_kdtree.py
+# Índice espacial (k-d tree) para conjuntos de Vector3D
+# Autor: Kevin Briceño
+
+from heapq import heappush, heappushpop
+from math import sqrt
+from typing import Iterable, List, Tuple
+
+from vector3d import Vector3D
+
+class KDTree:
+    """k-d tree estático sobre una nube de puntos Vector3D.
+
+    - query_radius(centro, r): puntos a distancia euclídea <= r del centro.
+    - knn(centro, k): los k puntos más cercanos, del más cercano al más lejano.
+
+    Construcción en O(n log n): los índices de los puntos se ordenan una sola
+    vez por cada eje y en cada nivel se reparten (de forma estable) entre los
+    dos hijos, así que no hace falta volver a ordenar. Cada nodo corta por la
+    mediana del eje con mayor extensión; las hojas guardan hasta `leaf_size`
+    puntos, que se revisan por fuerza bruta.
+    """
+
+    def __init__(self, points: Iterable[Vector3D], leaf_size: int = 16):
+        if leaf_size < 1:
+            raise ValueError("leaf_size debe ser positivo")
+        self.points: List[Vector3D] = list(points)
+        self.leaf_size = leaf_size
+        # coordenadas en listas paralelas: indexarlas es más barato que leer atributos
+        self._coords = ([p.x for p in self.points], [p.y for p in self.points],
+                        [p.z for p in self.points])
+        # nodos en listas paralelas; en las hojas axis == -1 y bucket tiene los índices
+        self._axis: List[int] = []
+        self._split: List[float] = []
+        self._left: List[int] = []
+        self._right: List[int] = []
+        self._bucket: List[List[int]] = []
+        n = len(self.points)
+        if n:
+            orders = [sorted(range(n), key=c.__getitem__) for c in self._coords]
+            self._build(orders, bytearray(n))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _new_node(self) -> int:
+        self._axis.append(-1)
+        self._split.append(0.0)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._bucket.append([])
+        return len(self._axis) - 1
+
+    def _build(self, orders: List[List[int]], mark: bytearray) -> int:
+        """Construye el subárbol de los índices en `orders` (los mismos índices,
+        ordenados por x, y, z). `mark` es un bytearray auxiliar de tamaño n."""
+        node = self._new_node()
+        count = len(orders[0])
+        if count <= self.leaf_size:
+            self._bucket[node] = orders[0]
+            return node
+        # eje de mayor extensión: los extremos son el primero y el último de cada orden
+        spreads = [c[o[-1]] - c[o[0]] for c, o in zip(self._coords, orders)]
+        axis = spreads.index(max(spreads))
+        if spreads[axis] == 0:
+            # todos los puntos coinciden: no hay corte posible
+            self._bucket[node] = orders[0]
+            return node
+        mid = count // 2
+        by_axis = orders[axis]
+        left = by_axis[:mid]
+        for i in left:
+            mark[i] = 1
+        left_orders, right_orders = [], []
+        for a, order in enumerate(orders):
+            if a == axis:
+                left_orders.append(left)
+                right_orders.append(by_axis[mid:])
+            else:
+                left_orders.append([i for i in order if mark[i]])
+                right_orders.append([i for i in order if not mark[i]])
+        for i in left:
+            mark[i] = 0
+        self._axis[node] = axis
+        # izquierda: coordenadas <= split; derecha: >= split
+        self._split[node] = self._coords[axis][by_axis[mid]]
+        self._left[node] = self._build(left_orders, mark)
+        self._right[node] = self._build(right_orders, mark)
+        return node
+
+    def query_radius(self, center: Vector3D, r: float) -> List[Vector3D]:
+        """Puntos p con abs(p - center) <= r (en orden arbitrario)."""
+        if not self.points:
+            return []
+        xs, ys, zs = self._coords
+        axes, splits, lefts, rights, buckets = (self._axis, self._split, self._left,
+                                                self._right, self._bucket)
+        q = (center.x, center.y, center.z)
+        qx, qy, qz = q
+        r2 = r * r
+        found = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            axis = axes[node]
+            if axis < 0:
+                for i in buckets[node]:
+                    dx, dy, dz = xs[i] - qx, ys[i] - qy, zs[i] - qz
+                    if dx * dx + dy * dy + dz * dz <= r2:
+                        found.append(i)
+                continue
+            c, split = q[axis], splits[node]
+            if c - r <= split:
+                stack.append(lefts[node])
+            if c + r >= split:
+                stack.append(rights[node])
+        points = self.points
+        return [points[i] for i in found]
+
+    def knn(self, center: Vector3D, k: int) -> List[Vector3D]:
+        """Los k puntos más cercanos a center (menos si el árbol tiene menos)."""
+        return [p for _, p in self.knn_with_distances(center, k)]
+
+    def knn_with_distances(self, center: Vector3D, k: int) -> List[Tuple[float, Vector3D]]:
+        """Como knn, pero retorna pares (distancia, punto)."""
+        if k <= 0 or not self.points:
+            return []
+        xs, ys, zs = self._coords
+        axes, splits, lefts, rights, buckets = (self._axis, self._split, self._left,
+                                                self._right, self._bucket)
+        q = (center.x, center.y, center.z)
+        qx, qy, qz = q
+        # max-heap de tamaño k con (-distancia², -índice): la raíz es el peor candidato
+        heap: List[Tuple[float, int]] = []
+        worst = float("inf")
+        # pila de (nodo, distancia² mínima posible al nodo)
+        stack = [(0, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if bound > worst:
+                continue
+            axis = axes[node]
+            if axis < 0:
+                for i in buckets[node]:
+                    dx, dy, dz = xs[i] - qx, ys[i] - qy, zs[i] - qz
+                    d2 = dx * dx + dy * dy + dz * dz
+                    if len(heap) < k:
+                        heappush(heap, (-d2, -i))
+                        if len(heap) == k:
+                            worst = -heap[0][0]
+                    elif d2 < worst:
+                        heappushpop(heap, (-d2, -i))
+                        worst = -heap[0][0]
+                continue
+            diff = q[axis] - splits[node]
+            near, far = (lefts[node], rights[node]) if diff <= 0 else (rights[node], lefts[node])
+            # el hijo lejano se apila primero para visitar antes el cercano
+            stack.append((far, max(bound, diff * diff)))
+            stack.append((near, bound))
+        points = self.points
+        return [(sqrt(-d2), points[-i]) for d2, i in sorted(heap, reverse=True)]
@@ -0,0 +1,304 @@
+# vector3d_lazy.py
+# Evaluación perezosa (con fusión de operaciones) de expresiones de Vector3D
+# Autor: Kevin Briceño
+
+from array import array
+from functools import wraps
+from math import sqrt
+from typing import Callable, Dict, List
+
+from vector3d import Vector3D, _vector
+from vector3d_batch import Vector3DBatch
+
+class Expr:
+    """Nodo de una expresión perezosa sobre vectores.
+
+    Se obtiene con lazy(v); a partir de ahí los operadores (+, -, *, %, abs, ~,
+    '0 &') no calculan nada: arman un árbol pequeño. evaluate() lo recorre una
+    sola vez, genera una función en línea recta con todas las operaciones
+    fusionadas (sin Vector3D temporales) y la ejecuta:
+    - si las hojas son Vector3D y escalares, retorna un Vector3D o un float;
+    - si alguna hoja es un Vector3DBatch, aplica la función fila a fila en una
+      sola pasada y retorna un Vector3DBatch o un array('d'). Los Vector3D que
+      aparezcan se aplican a todas las filas, y lo que solo depende de ellos
+      se calcula una vez fuera del ciclo.
+
+    La semántica (y el orden de las operaciones de punto flotante) es la misma
+    de los operadores de Vector3D. Las funciones generadas se reutilizan entre
+    expresiones con la misma forma; para evaluar muchas veces la misma
+    expresión con otros datos conviene fuse().
+    """
+
+    __slots__ = ("op", "args", "kind")
+
+    def __init__(self, op: str, args: tuple, kind: str):
+        self.op = op        # "vec", "batch", "num", "arg" (hojas) u operación
+        self.args = args    # valor de la hoja, o nodos hijos
+        self.kind = kind    # "v" (vectorial) o "s" (escalar)
+
+    def __repr__(self) -> str:
+        if self.op in _LEAVES:
+            return f"lazy({self.args[0]!r})"
+        return f"Expr({self.op}, {', '.join(map(repr, self.args))})"
+
+    # Operadores: solo construyen nodos
+    def __add__(self, other):
+        return _binary("add", self, other)
+
+    def __radd__(self, other):
+        return _binary("add", other, self)
+
+    def __sub__(self, other):
+        return _binary("sub", self, other)
+
+    def __rsub__(self, other):
+        return _binary("sub", other, self)
+
+    def __mul__(self, other):
+        return _binary("mul", self, other)
+
+    def __rmul__(self, other):
+        return _binary("mul", other, self)
+
+    def __mod__(self, other):
+        return _binary("mod", self, other)
+
+    def __rmod__(self, other):
+        return _binary("mod", other, self)
+
+    def __abs__(self):
+        return Expr("abs", (self,), "s")
+
+    def __invert__(self):
+        if self.kind != "v":
+            raise TypeError("~ solo se aplica a expresiones vectoriales")
+        return Expr("abs", (self,), "s")
+
+    def __rand__(self, other):
+        if other == 0 and self.kind == "v":
+            return Expr("abs", (self,), "s")
+        return NotImplemented
+
+    def evaluate(self):
+        kernel, constants, result = _compile(self, ())
+        return result(kernel(*[leaf.args[0] for leaf in constants]))
+
+def lazy(value) -> Expr:
+    """Envuelve un Vector3D, un Vector3DBatch o un número como hoja perezosa."""
+    node = _wrap(value)
+    if node is None:
+        raise TypeError(f"no se puede evaluar perezosamente un {type(value).__name__}")
+    return node
+
+def fuse(fn: Callable) -> Callable:
+    """Decorador: fn(*args) se traza una vez con hojas perezosas por cada
+    combinación de tipos de argumentos (Vector3D, Vector3DBatch o número) y las
+    llamadas siguientes ejecutan directamente la función fusionada.
+
+        @fuse
+        def f(a, b, c):
+            return (b + b) * (c - a)
+
+        f(a, b, c)              # Vector3D, como la expresión original
+        f(lote_a, lote_b, c)    # Vector3DBatch, en una sola pasada
+    """
+    traced: Dict[tuple, tuple] = {}
+
+    @wraps(fn)
+    def fused(*values):
+        signature = tuple(map(type, values))
+        entry = traced.get(signature)
+        if entry is None:
+            args = []
+            for position, value in enumerate(values):
+                leaf = _wrap(value)
+                if leaf is None or isinstance(value, Expr):
+                    raise TypeError(f"argumento no soportado: {type(value).__name__}")
+                args.append(Expr("arg", (position, leaf.op), leaf.kind))
+            root = _wrap(fn(*args))
+            if root is None:
+                raise TypeError("la función debe retornar una expresión de vectores")
+            kernel, constants, result = _compile(root, args)
+            entry = traced[signature] = (kernel, [leaf.args[0] for leaf in constants], result)
+        kernel, constants, result = entry
+        return result(kernel(*values, *constants))
+
+    return fused
+
+_LEAVES = ("vec", "batch", "num", "arg")
+
+def _wrap(value):
+    if isinstance(value, Expr):
+        return value
+    if isinstance(value, Vector3D):
+        return Expr("vec", (value,), "v")
+    if isinstance(value, Vector3DBatch):
+        return Expr("batch", (value,), "v")
+    if isinstance(value, (int, float)):
+        return Expr("num", (value,), "s")
+    return None
+
+# Tipo del resultado de cada operación binaria según el tipo de los operandos;
+# las combinaciones ausentes tampoco existen en Vector3D (p. ej. vector % escalar)
+_BINARY_KINDS = {
+    "add": {("v", "v"): "v", ("v", "s"): "v", ("s", "v"): "v", ("s", "s"): "s"},
+    "sub": {("v", "v"): "v", ("v", "s"): "v", ("s", "v"): "v", ("s", "s"): "s"},
+    "mul": {("v", "v"): "v", ("v", "s"): "v", ("s", "v"): "v", ("s", "s"): "s"},
+    "mod": {("v", "v"): "s", ("s", "s"): "s"},
+}
+
+_SYMBOLS = {"add": "+", "sub": "-", "mul": "*", "mod": "%"}
+
+def _binary(op: str, left, right):
+    left, right = _wrap(left), _wrap(right)
+    if left is None or right is None:
+        return NotImplemented
+    kind = _BINARY_KINDS[op].get((left.kind, right.kind))
+    if kind is None:
+        return NotImplemented
+    return Expr(op, (left, right), kind)
+
+# Generación de código
+
+# forma de la expresión -> función compilada
+_KERNELS: Dict[tuple, Callable] = {}
+_MAX_KERNELS = 256
+
+def _same_length(*buffers) -> None:
+    if len(set(map(len, buffers))) > 1:
+        raise ValueError("los lotes deben tener la misma longitud")
+
+def _compile(root: Expr, args):
+    """Traduce el árbol a sentencias de Python en línea recta (una variable por
+    componente y por nodo). Retorna (función, hojas constantes, conversión del
+    resultado); la función recibe los args y luego los valores de esas hojas."""
+    index: Dict[object, int] = {}             # identidad de la hoja -> índice
+    categories: List[str] = []                # "vec", "batch" o "num" por índice
+    constants: List[Expr] = []                # hojas que no son argumentos
+    names: Dict[int, tuple] = {}              # id(nodo) -> nombres de sus componentes
+    varying: Dict[int, bool] = {}             # id(nodo) -> depende de algún lote
+    hoisted: List[str] = []                   # sentencias que no dependen de los lotes
+    lines: List[str] = []                     # sentencias que se repiten por fila
+
+    # los argumentos ocupan los primeros índices, aunque fn no los use todos
+    for arg in args:
+        index[("arg", arg.args[0])] = len(categories)
+        categories.append(arg.args[1])
+
+    def visit(node: Expr) -> tuple:
+        # los subárboles compartidos (p. ej. t = a + b; t * t) se calculan una vez
+        if id(node) in names:
+            return names[id(node)]
+        if node.op in _LEAVES:
+            key = ("arg", node.args[0]) if node.op == "arg" else id(node.args[0])
+            if key not in index:
+                index[key] = len(categories)
+                categories.append(node.op)
+                constants.append(node)
+            i = index[key]
+            result = (f"c{i}",) if categories[i] == "num" else (f"x{i}", f"y{i}", f"z{i}")
+            varying[id(node)] = categories[i] == "batch"
+        else:
+            operands = [visit(arg) for arg in node.args]
+            varies = any(varying[id(arg)] for arg in node.args)
+            result = _emit(node, operands, f"t{len(names)}", lines if varies else hoisted)
+            varying[id(node)] = varies
+        names[id(node)] = result
+        return result
+
+    out = visit(root)
+    key = (tuple(categories), tuple(hoisted), tuple(lines), out)
+    kernel = _KERNELS.get(key)
+    if kernel is None:
+        namespace = {"sqrt": sqrt, "_same_length": _same_length}
+        exec(_source(categories, hoisted, lines, out), namespace)
+        kernel = namespace["_kernel"]
+        if len(_KERNELS) >= _MAX_KERNELS:
+            _KERNELS.clear()
+        _KERNELS[key] = kernel
+    if "batch" in categories:
+        result = _to_column if root.kind == "s" else _to_batch
+    else:
+        result = _identity if root.kind == "s" else _to_vector
+    return kernel, constants, result
+
+# Conversión del resultado de la función generada
+def _identity(value: float) -> float:
+    return value
+
+def _to_vector(components) -> Vector3D:
+    return _vector(*components)
+
+def _to_column(values) -> array:
+    return array("d", values)
+
+def _to_batch(columns) -> Vector3DBatch:
+    return Vector3DBatch(*columns)
+
+def _emit(node: Expr, operands: List[tuple], t: str, lines: List[str]) -> tuple:
+    """Agrega las sentencias de un nodo y retorna los nombres de su resultado.
+    El orden de cada cálculo replica el de los operadores de Vector3D."""
+    if node.op == "abs":
+        (arg,) = operands
+        if len(arg) == 3:
+            x, y, z = arg
+            lines.append(f"{t} = sqrt({x} * {x} + {y} * {y} + {z} * {z})")
+        else:
+            lines.append(f"{t} = abs({arg[0]})")
+        return (t,)
+    left, right = operands
+    if node.op == "mul" and len(left) == 3 and len(right) == 3:
+        (ax, ay, az), (bx, by, bz) = left, right
+        lines.append(f"{t}x = {ay} * {bz} - {az} * {by}")
+        lines.append(f"{t}y = {az} * {bx} - {ax} * {bz}")
+        lines.append(f"{t}z = {ax} * {by} - {ay} * {bx}")
+        return (f"{t}x", f"{t}y", f"{t}z")
+    if node.op == "mod" and len(left) == 3:
+        (ax, ay, az), (bx, by, bz) = left, right
+        lines.append(f"{t} = {ax} * {bx} + {ay} * {by} + {az} * {bz}")
+        return (t,)
+    sym = _SYMBOLS[node.op]
+    if len(left) == 1 and len(right) == 1:
+        lines.append(f"{t} = {left[0]} {sym} {right[0]}")
+        return (t,)
+    if len(left) == 1 and node.op != "sub":
+        # escalar + vector y escalar * vector se evalúan como vector + escalar
+        left, right = right, left
+    # un escalar se aplica a las tres componentes
+    left = left * 3 if len(left) == 1 else left
+    right = right * 3 if len(right) == 1 else right
+    for c, a, b in zip("xyz", left, right):
+        lines.append(f"{t}{c} = {a} {sym} {b}")
+    return (f"{t}x", f"{t}y", f"{t}z")
+
+def _source(categories: List[str], hoisted: List[str], lines: List[str],
+            out: tuple) -> str:
+    """Código de la función. Sin lotes es una sola secuencia de sentencias; con
+    lotes, las sentencias por fila van dentro de un único ciclo sobre zip()."""
+    params, source, loop_vars, buffers = [], [], [], []
+    for i, category in enumerate(categories):
+        if category == "num":
+            params.append(f"c{i}")
+            continue
+        params.append(f"v{i}")
+        if category == "vec":
+            source.append(f"    x{i}, y{i}, z{i} = v{i}.x, v{i}.y, v{i}.z")
+        else:
+            loop_vars += [f"x{i}", f"y{i}", f"z{i}"]
+            buffers += [f"v{i}.x", f"v{i}.y", f"v{i}.z"]
+    source.insert(0, f"def _kernel({', '.join(params)}):")
+    source += [f"    {line}" for line in hoisted]
+    if not loop_vars:
+        source += [f"    {line}" for line in lines]
+        source.append(f"    return {', '.join(out)}")
+        return "\n".join(source) + "\n"
+    if len(buffers) > 3:
+        source.append(f"    _same_length({', '.join(buffers[::3])})")
+    outs = [f"o{k}" for k in range(len(out))]
+    for o in outs:
+        source += [f"    {o} = []", f"    {o}_append = {o}.append"]
+    source.append(f"    for {', '.join(loop_vars)} in zip({', '.join(buffers)}):")
+    source += [f"        {line}" for line in lines]
+    source += [f"        {o}_append({name})" for o, name in zip(outs, out)]
+    source.append(f"    return {', '.join(outs)}")
+    return "\n".join(source) + "\n"
@@ -0,0 +1,188 @@
+# vector3d_parallel.py
+# Reducciones masivas en paralelo sobre colecciones grandes de Vector3D
+# Autor: Kevin Briceño
+
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from math import fsum, hypot
+from multiprocessing import shared_memory
+from typing import List, Optional, Sequence, Tuple, Union
+
+from vector3d import Vector3D, _vector
+from vector3d_batch import Vector3DBatch
+
+Vectors = Union[Sequence[Vector3D], Vector3DBatch]
+
+_DOUBLE = array("d").itemsize
+
+# Núcleos: trabajan sobre tres secuencias de floats (arrays o memoryviews)
+# y son los mismos en modo serial y dentro de los procesos.
+
+def _sum_kernel(xs, ys, zs) -> Tuple[float, float, float]:
+    return fsum(xs), fsum(ys), fsum(zs)
+
+def _extreme_kernel(xs, ys, zs, largest: bool) -> Tuple[float, int]:
+    """(norma, posición) de la primera fila con norma mínima o máxima."""
+    norms = list(map(hypot, xs, ys, zs))
+    pick = max if largest else min
+    i = pick(range(len(norms)), key=norms.__getitem__)
+    return norms[i], i
+
+def _dot_kernel(xs, ys, zs, v: Tuple[float, float, float]) -> array:
+    vx, vy, vz = v
+    return array("d", [x * vx + y * vy + z * vz for x, y, z in zip(xs, ys, zs)])
+
+def _norm_kernel(xs, ys, zs) -> array:
+    return array("d", map(hypot, xs, ys, zs))
+
+# Tareas de los procesos: se conectan al bloque compartido por nombre, toman
+# su rango [lo, hi) de cada coordenada y aplican el núcleo correspondiente.
+
+def _task(name: str, n: int, lo: int, hi: int, op: str, arg=None, out_name: str = None):
+    shm = shared_memory.SharedMemory(name=name)
+    out_shm = shared_memory.SharedMemory(name=out_name) if out_name else None
+    try:
+        coords = shm.buf.cast("d")
+        xs, ys, zs = coords[lo:hi], coords[n + lo:n + hi], coords[2 * n + lo:2 * n + hi]
+        try:
+            if op == "sum":
+                return _sum_kernel(xs, ys, zs)
+            if op == "extreme":
+                norm, i = _extreme_kernel(xs, ys, zs, arg)
+                return norm, lo + i
+            values = _dot_kernel(xs, ys, zs, arg) if op == "dot" else _norm_kernel(xs, ys, zs)
+            with out_shm.buf.cast("d") as out:
+                out[lo:hi] = values
+            return None
+        finally:
+            # las vistas deben liberarse antes de cerrar el bloque
+            xs.release(); ys.release(); zs.release()
+            coords.release()
+    finally:
+        shm.close()
+        if out_shm is not None:
+            out_shm.close()
+
+class ParallelReducer:
+    """Reducciones sobre muchos vectores (lista de Vector3D o Vector3DBatch):
+
+    - sum / mean                -> Vector3D
+    - min_norm / max_norm       -> el vector de menor / mayor norma (el primero si empatan)
+    - dots(vectores, v)         -> array('d') con el producto punto de cada uno con v
+    - norms(vectores)           -> array('d') con la norma de cada uno
+
+    Las coordenadas se copian una vez a un bloque de memoria compartida
+    (x, y, z contiguos) y se reparten en trozos entre los procesos de un
+    ProcessPoolExecutor, que los leen sin copiarlos; los resultados por
+    elemento (dots, norms) se escriben en otro bloque compartido. Con menos
+    de `serial_below` vectores, o con un solo proceso, se calcula en serie con
+    los mismos núcleos. Usar con `with` (o llamar close()) para cerrar el pool.
+    """
+
+    def __init__(self, workers: Optional[int] = None, serial_below: int = 200_000,
+                 chunks_per_worker: int = 4):
+        self.workers = workers or os.cpu_count() or 1
+        self.serial_below = serial_below
+        self.chunks_per_worker = chunks_per_worker
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "ParallelReducer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    # Reducciones públicas
+    def sum(self, vectors: Vectors) -> Vector3D:
+        partials = self._run(vectors, "sum")
+        return _vector(*(fsum(p[c] for p in partials) for c in range(3)))
+
+    def mean(self, vectors: Vectors) -> Vector3D:
+        if not len(vectors):
+            raise ValueError("el promedio de una colección vacía no está definido")
+        return self.sum(vectors) * (1.0 / len(vectors))
+
+    def min_norm(self, vectors: Vectors) -> Vector3D:
+        return self._extreme(vectors, largest=False)
+
+    def max_norm(self, vectors: Vectors) -> Vector3D:
+        return self._extreme(vectors, largest=True)
+
+    def dots(self, vectors: Vectors, v: Vector3D) -> array:
+        return self._run(vectors, "dot", (v.x, v.y, v.z))
+
+    def norms(self, vectors: Vectors) -> array:
+        return self._run(vectors, "norm")
+
+    def _extreme(self, vectors: Vectors, largest: bool) -> Vector3D:
+        if not len(vectors):
+            raise ValueError("la colección está vacía")
+        partials = self._run(vectors, "extreme", largest)
+        # los parciales vienen en orden: ante empate gana el primero
+        best = partials[0]
+        for norm, i in partials[1:]:
+            if (norm > best[0]) if largest else (norm < best[0]):
+                best = (norm, i)
+        return vectors[best[1]]
+
+    # Ejecución
+    def _chunks(self, n: int) -> List[Tuple[int, int]]:
+        count = max(1, min(n, self.workers * self.chunks_per_worker))
+        bounds = [n * k // count for k in range(count + 1)]
+        return [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if lo < hi]
+
+    def _run(self, vectors: Vectors, op: str, arg=None):
+        """Resultados parciales por trozo (sum, extreme) o array('d') por elemento."""
+        n = len(vectors)
+        if n < self.serial_below or self.workers <= 1:
+            xs, ys, zs = _columns(vectors)
+            if op == "sum":
+                return [_sum_kernel(xs, ys, zs)]
+            if op == "extreme":
+                return [_extreme_kernel(xs, ys, zs, arg)]
+            return _dot_kernel(xs, ys, zs, arg) if op == "dot" else _norm_kernel(xs, ys, zs)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        shm = _share(vectors)
+        out_shm = None
+        try:
+            if op in ("dot", "norm"):
+                out_shm = shared_memory.SharedMemory(create=True, size=n * _DOUBLE)
+            out_name = out_shm.name if out_shm else None
+            futures = [self._executor.submit(_task, shm.name, n, lo, hi, op, arg, out_name)
+                       for lo, hi in self._chunks(n)]
+            partials = [f.result() for f in futures]
+            if out_shm is None:
+                return partials
+            result = array("d")
+            with out_shm.buf[:n * _DOUBLE] as raw:
+                result.frombytes(raw)
+            return result
+        finally:
+            shm.close()
+            shm.unlink()
+            if out_shm is not None:
+                out_shm.close()
+                out_shm.unlink()
+
+def _columns(vectors: Vectors):
+    """Coordenadas como tres secuencias de floats."""
+    if isinstance(vectors, Vector3DBatch):
+        return vectors.x, vectors.y, vectors.z
+    return (array("d", [v.x for v in vectors]), array("d", [v.y for v in vectors]),
+            array("d", [v.z for v in vectors]))
+
+def _share(vectors: Vectors) -> shared_memory.SharedMemory:
+    """Copia las coordenadas a un bloque compartido: n x, luego n y, luego n z."""
+    n = len(vectors)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, 3 * n * _DOUBLE))
+    for k, column in enumerate(_columns(vectors)):
+        with memoryview(column) as view, view.cast("B") as raw:
+            shm.buf[k * n * _DOUBLE:(k + 1) * n * _DOUBLE] = raw
+    return shm
@@ -0,0 +1,184 @@
+# vector3d_transform.py
+# Transformaciones afines (rotación, escala, traslación) sobre Vector3D
+# Autor: Kevin Briceño
+
+from itertools import islice
+from math import cos, isclose, sin
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from vector3d import EPS, Vector3D, _vector
+from vector3d_batch import Vector3DBatch
+
+Matrix = Tuple[Tuple[float, float, float], Tuple[float, float, float], Tuple[float, float, float]]
+
+class Transform3D:
+    """Transformación afín p -> M p + t, con M una matriz 3x3 y t un vector.
+
+    Se componen con '@' como las matrices: (t2 @ t1)(p) == t2(t1(p)); también
+    t1.then(t2) o Transform3D.compose(t1, t2, ...) en orden de aplicación. La
+    composición solo multiplica matrices, así que una cadena de transformaciones
+    se reduce a una sola antes de tocar los datos y cada punto se procesa una vez:
+    - t(v) / t.apply(v)            -> Vector3D
+    - t.apply_many(lista)          -> lista de Vector3D
+    - t.apply_batch(lote)          -> Vector3DBatch (sin crear Vector3D)
+    - t.stream(iterable, chunk)    -> generador perezoso, procesa de a `chunk` puntos
+    """
+
+    __slots__ = ("m00", "m01", "m02", "m10", "m11", "m12", "m20", "m21", "m22",
+                 "tx", "ty", "tz")
+
+    def __init__(self, matrix: Sequence[Sequence[float]] = ((1, 0, 0), (0, 1, 0), (0, 0, 1)),
+                 offset: Sequence[float] = (0, 0, 0)):
+        (self.m00, self.m01, self.m02), (self.m10, self.m11, self.m12), \
+            (self.m20, self.m21, self.m22) = [tuple(map(float, row)) for row in matrix]
+        self.tx, self.ty, self.tz = map(float, offset)
+
+    # Constructores
+    @classmethod
+    def identity(cls) -> "Transform3D":
+        return cls()
+
+    @classmethod
+    def translation(cls, v: Vector3D) -> "Transform3D":
+        return cls(offset=v.to_tuple())
+
+    @classmethod
+    def scaling(cls, sx: float, sy: float = None, sz: float = None) -> "Transform3D":
+        sy = sx if sy is None else sy
+        sz = sx if sz is None else sz
+        return cls(((sx, 0, 0), (0, sy, 0), (0, 0, sz)))
+
+    @classmethod
+    def rotation(cls, axis: Vector3D, angle: float) -> "Transform3D":
+        """Rotación de `angle` radianes alrededor de `axis` (regla de la mano derecha)."""
+        norm = abs(axis)
+        if norm == 0:
+            raise ValueError("el eje de rotación no puede ser el vector nulo")
+        ux, uy, uz = axis.x / norm, axis.y / norm, axis.z / norm
+        c, s = cos(angle), sin(angle)
+        k = 1 - c
+        # fórmula de Rodrigues
+        return cls(((c + ux * ux * k, ux * uy * k - uz * s, ux * uz * k + uy * s),
+                    (uy * ux * k + uz * s, c + uy * uy * k, uy * uz * k - ux * s),
+                    (uz * ux * k - uy * s, uz * uy * k + ux * s, c + uz * uz * k)))
+
+    @classmethod
+    def compose(cls, *transforms: "Transform3D") -> "Transform3D":
+        """Una sola transformación equivalente a aplicar `transforms` en orden."""
+        result = cls()
+        for t in transforms:
+            result = t @ result
+        return result
+
+    # Representación
+    @property
+    def matrix(self) -> Matrix:
+        return ((self.m00, self.m01, self.m02), (self.m10, self.m11, self.m12),
+                (self.m20, self.m21, self.m22))
+
+    @property
+    def offset(self) -> Vector3D:
+        return _vector(self.tx, self.ty, self.tz)
+
+    def __repr__(self) -> str:
+        return f"Transform3D({self.matrix}, {self.offset.to_tuple()})"
+
+    # Comparación aproximada, con la misma tolerancia que Vector3D
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Transform3D):
+            return False
+        return all(isclose(getattr(self, f), getattr(other, f), rel_tol=1e-9, abs_tol=EPS)
+                   for f in self.__slots__)
+
+    # Composición
+    def __matmul__(self, other: "Transform3D") -> "Transform3D":
+        """self @ other: primero other, luego self."""
+        if not isinstance(other, Transform3D):
+            return NotImplemented
+        a, b = self, other
+        t = Transform3D.__new__(Transform3D)
+        t.m00 = a.m00 * b.m00 + a.m01 * b.m10 + a.m02 * b.m20
+        t.m01 = a.m00 * b.m01 + a.m01 * b.m11 + a.m02 * b.m21
+        t.m02 = a.m00 * b.m02 + a.m01 * b.m12 + a.m02 * b.m22
+        t.m10 = a.m10 * b.m00 + a.m11 * b.m10 + a.m12 * b.m20
+        t.m11 = a.m10 * b.m01 + a.m11 * b.m11 + a.m12 * b.m21
+        t.m12 = a.m10 * b.m02 + a.m11 * b.m12 + a.m12 * b.m22
+        t.m20 = a.m20 * b.m00 + a.m21 * b.m10 + a.m22 * b.m20
+        t.m21 = a.m20 * b.m01 + a.m21 * b.m11 + a.m22 * b.m21
+        t.m22 = a.m20 * b.m02 + a.m21 * b.m12 + a.m22 * b.m22
+        # el desplazamiento de other también pasa por la matriz de self
+        t.tx = a.m00 * b.tx + a.m01 * b.ty + a.m02 * b.tz + a.tx
+        t.ty = a.m10 * b.tx + a.m11 * b.ty + a.m12 * b.tz + a.ty
+        t.tz = a.m20 * b.tx + a.m21 * b.ty + a.m22 * b.tz + a.tz
+        return t
+
+    def then(self, other: "Transform3D") -> "Transform3D":
+        """Primero self, luego other."""
+        return other @ self
+
+    def inverse(self) -> "Transform3D":
+        (a, b, c), (d, e, f), (g, h, i) = self.matrix
+        det = a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+        # el determinante escala con el cubo de las entradas: se compara contra la
+        # norma (máxima entrada) al cubo, para que escalas chicas como
+        # scaling(1e-4) sigan siendo invertibles y solo se rechacen las singulares
+        norm = max(abs(a), abs(b), abs(c), abs(d), abs(e), abs(f), abs(g), abs(h), abs(i))
+        if det == 0 or abs(det) <= EPS * norm ** 3:
+            raise ValueError("la transformación no es invertible")
+        inv = Transform3D(((( e * i - f * h) / det, -(b * i - c * h) / det, ( b * f - c * e) / det),
+                           (-(d * i - f * g) / det, ( a * i - c * g) / det, -(a * f - c * d) / det),
+                           (( d * h - e * g) / det, -(a * h - b * g) / det, ( a * e - b * d) / det)))
+        # p = M^-1 (q - t)  =>  desplazamiento -M^-1 t
+        x, y, z = inv._linear(self.tx, self.ty, self.tz)
+        inv.tx, inv.ty, inv.tz = -x, -y, -z
+        return inv
+
+    def _linear(self, x: float, y: float, z: float) -> Tuple[float, float, float]:
+        """M (x, y, z), sin el desplazamiento."""
+        return (self.m00 * x + self.m01 * y + self.m02 * z,
+                self.m10 * x + self.m11 * y + self.m12 * z,
+                self.m20 * x + self.m21 * y + self.m22 * z)
+
+    # Aplicación
+    def apply(self, v: Vector3D) -> Vector3D:
+        x, y, z = v.x, v.y, v.z
+        return _vector(self.m00 * x + self.m01 * y + self.m02 * z + self.tx,
+                       self.m10 * x + self.m11 * y + self.m12 * z + self.ty,
+                       self.m20 * x + self.m21 * y + self.m22 * z + self.tz)
+
+    __call__ = apply
+
+    def apply_many(self, vectors: Iterable[Vector3D]) -> List[Vector3D]:
+        # coeficientes en variables locales: el ciclo no vuelve a leer atributos de self
+        m00, m01, m02, m10, m11, m12, m20, m21, m22, tx, ty, tz = self._coefficients()
+        out = []
+        append = out.append
+        for v in vectors:
+            x, y, z = v.x, v.y, v.z
+            append(_vector(m00 * x + m01 * y + m02 * z + tx,
+                           m10 * x + m11 * y + m12 * z + ty,
+                           m20 * x + m21 * y + m22 * z + tz))
+        return out
+
+    def apply_batch(self, batch: Vector3DBatch) -> Vector3DBatch:
+        m00, m01, m02, m10, m11, m12, m20, m21, m22, tx, ty, tz = self._coefficients()
+        xs, ys, zs = batch.x, batch.y, batch.z
+        return Vector3DBatch([m00 * x + m01 * y + m02 * z + tx for x, y, z in zip(xs, ys, zs)],
+                             [m10 * x + m11 * y + m12 * z + ty for x, y, z in zip(xs, ys, zs)],
+                             [m20 * x + m21 * y + m22 * z + tz for x, y, z in zip(xs, ys, zs)])
+
+    def stream(self, vectors: Iterable[Vector3D], chunk_size: int = 4096) -> Iterator[Vector3D]:
+        """Aplica la transformación de forma perezosa: lee `chunk_size` vectores
+        de la entrada, los transforma juntos y los entrega antes de leer más."""
+        if chunk_size < 1:
+            raise ValueError("chunk_size debe ser positivo")
+        it = iter(vectors)
+        while True:
+            chunk = list(islice(it, chunk_size))
+            if not chunk:
+                return
+            yield from self.apply_many(chunk)
+
+    def _coefficients(self) -> Tuple[float, ...]:
+        return (self.m00, self.m01, self.m02, self.m10, self.m11, self.m12,
+                self.m20, self.m21, self.m22, self.tx, self.ty, self.tz)
@@ -0,0 +1,112 @@
+# bench_simlang.py
+# Kevin Briceño 15-11661
+# Benchmark de definiciones y consultas del Simulator sobre cadenas grandes.
+
+"""
+Genera una cadena de herramientas sintética (semilla fija): unos pocos
+lenguajes base interpretados por LOCAL y n lenguajes L0..Ln-1, cada uno con
+`--per-lang` traductores hacia lenguajes anteriores (implementados en un
+lenguaje base) y, a veces, un intérprete. Una fracción de los lenguajes solo
+traduce hacia lenguajes sin salida, así que no es ejecutable. Las definiciones
+se hacen en orden aleatorio y se mide:
+
+  - definición: tiempo por DEFINIR (incluye mantener el índice)
+  - duplicados: tiempo por DEFINIR repetido (rechazado con SimulatorError)
+  - consulta:   tiempo por EJECUTABLE, un programa por lenguaje
+  - reemplazo:  tiempo por DEFINIR de intérpretes C{i-1} -> C{i} sobre una cadena
+                de n traductores C{i} -> C{i-1} ya ejecutable (cada uno reemplaza
+                al traductor de su lenguaje)
+
+Uso:
+    python bench_simlang.py [--n 10000 100000] [--per-lang 4] [--seed 1]
+"""
+
+import argparse
+import random
+import time
+
+from simlang import LANG_LOCAL, Simulator, SimulatorError
+
+BASES = [f"B{i}" for i in range(8)]
+
+def toolchain(n: int, per_lang: int, rng: random.Random):
+    """Lista (desordenada) de definiciones ("I", impl, lang) / ("T", impl, origen, destino)."""
+    defs = [("I", LANG_LOCAL, b) for b in BASES]
+    for i in range(n):
+        lang = f"L{i}"
+        if rng.random() < 0.1:
+            # sin salida: traduce a un lenguaje que nadie sabe ejecutar
+            defs.append(("T", rng.choice(BASES), lang, f"DEAD{i}"))
+            continue
+        targets = [f"L{rng.randrange(i)}" for _ in range(per_lang)] if i else []
+        for target in dict.fromkeys(targets + [rng.choice(BASES)]):
+            defs.append(("T", rng.choice(BASES), lang, target))
+        if i and rng.random() < 0.2:
+            defs.append(("I", f"L{rng.randrange(i)}", lang))
+    rng.shuffle(defs)
+    return defs
+
+def define_all(sim: Simulator, defs) -> None:
+    for d in defs:
+        if d[0] == "I":
+            sim.define_interpreter(d[1], d[2])
+        else:
+            sim.define_translator(d[1], d[2], d[3])
+
+def redefine_all(sim: Simulator, defs) -> int:
+    rejected = 0
+    for d in defs:
+        try:
+            define_all(sim, [d])
+        except SimulatorError:
+            rejected += 1
+    return rejected
+
+def replace_chain(n: int) -> float:
+    """Segundos por intérprete que reemplaza a un traductor en una cadena de n lenguajes."""
+    sim = Simulator()
+    sim.define_interpreter(LANG_LOCAL, "C0")
+    for i in range(1, n):
+        sim.define_translator(LANG_LOCAL, f"C{i}", f"C{i - 1}")
+    began = time.perf_counter()
+    for i in range(1, n):
+        sim.define_interpreter(f"C{i - 1}", f"C{i}")
+    return (time.perf_counter() - began) / (n - 1)
+
+def bench(n: int, args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    defs = toolchain(n, args.per_lang, rng)
+    sim = Simulator()
+
+    began = time.perf_counter()
+    define_all(sim, defs)
+    define = time.perf_counter() - began
+
+    began = time.perf_counter()
+    rejected = redefine_all(sim, defs)
+    duplicates = time.perf_counter() - began
+    assert rejected == len(defs)
+
+    for i in range(n):
+        sim.define_program(f"P{i}", f"L{i}")
+    began = time.perf_counter()
+    executable = sum(sim.executable_plan_for_program(f"P{i}")[0] for i in range(n))
+    query = time.perf_counter() - began
+
+    print(f"n={n}: {len(defs)} definiciones, {executable} de {n} lenguajes ejecutables")
+    print(f"  definición  {define / len(defs) * 1e6:8.2f} µs/def    total {define:.2f} s")
+    print(f"  duplicados  {duplicates / len(defs) * 1e6:8.2f} µs/def    total {duplicates:.2f} s")
+    print(f"  consulta    {query / n * 1e6:8.2f} µs/consulta total {query:.2f} s")
+    print(f"  reemplazo   {replace_chain(n) * 1e6:8.2f} µs/def")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del Simulator")
+    parser.add_argument("--n", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--per-lang", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    for n in args.n:
+        bench(n, args)
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ Permite definir:
 La lengua especial "LOCAL" corresponde al lenguaje ejecutable por la máquina local.
 Acciones del usuario:
   DEFINIR <TIPO> [ARGUMENTOS]
-  EJECUTABLE "nombre"
+  EJECUTABLE "nombre" [MINIMO]
   SALIR
 
 La función principal para decidir si un programa es ejecutable es
@@ -19,8 +19,9 @@ buscar una secuencia de pasos (usar traductores/interpretes) que permita
 llegar desde el lenguaje del programa hasta LOCAL.
 """
 
-from typing import Dict, List, Tuple, Optional, Set
+from typing import Dict, List, Tuple, Optional, Set, Union
 from dataclasses import dataclass
+from heapq import heappop, heappush
 
 LANG_LOCAL = "LOCAL"
 
@@ -46,6 +47,18 @@ class Translator:
 # contenido variable según tipo
 PlanStep = Dict[str, str]
 
+# Regla que permite ejecutar un lenguaje
+Rule = Union[Interpreter, Translator]
+
+# Costo de usar cada regla en un plan (las que no aparecen cuestan 1)
+Costs = Dict[Rule, float]
+
+def _rule_parts(rule: Rule) -> Tuple[str, Tuple[str, ...]]:
+    """(lenguaje que la regla hace ejecutable, lenguajes que deben ser ejecutables)."""
+    if isinstance(rule, Interpreter):
+        return rule.target_lang, (rule.impl_lang,)
+    return rule.from_lang, (rule.impl_lang, rule.to_lang)
+
 class SimulatorError(Exception):
     """Errores del simulador (definición inválida, búsqueda fallida, etc.)."""
     pass
@@ -58,8 +71,20 @@ class Simulator:
         self.programs: Dict[str, Program] = {}
         # intérpretes indexados por lenguaje interpretado -> list of Interpreter
         self.interpreters: Dict[str, List[Interpreter]] = {}
-        # lista de traductores
-        self.translators: List[Translator] = []
+        # traductores indexados por lenguaje origen -> list of Translator
+        self.translators: Dict[str, List[Translator]] = {}
+        # intérpretes y traductores ya definidos, para detectar duplicados en O(1)
+        self._defined: Set[Rule] = set()
+        # índice de alcanzabilidad: lenguaje ejecutable -> regla con la que se
+        # logró (None para LOCAL); se mantiene al definir intérpretes/traductores
+        self._executable: Dict[str, Optional[Rule]] = {LANG_LOCAL: None}
+        # profundidad de cada lenguaje ejecutable: siempre mayor que la de las premisas
+        # de su regla, así que un plan solo pasa por lenguajes menos profundos
+        self._depth: Dict[str, int] = {LANG_LOCAL: 0}
+        # reglas pendientes, indexadas por el lenguaje que les falta
+        self._waiting: Dict[str, List[Rule]] = {}
+        # reglas indexadas por cada lenguaje que necesitan (para la búsqueda de costo mínimo)
+        self._uses: Dict[str, List[Rule]] = {}
 
     # --- API de definiciones ---
     def define_program(self, name: str, language: str) -> None:
@@ -69,16 +94,19 @@ class Simulator:
 
     def define_interpreter(self, impl_lang: str, target_lang: str) -> None:
         it = Interpreter(impl_lang=impl_lang, target_lang=target_lang)
-        self.interpreters.setdefault(target_lang, [])
-        if it in self.interpreters[target_lang]:
+        if it in self._defined:
             raise SimulatorError("Intérprete duplicado")
-        self.interpreters[target_lang].append(it)
+        self._defined.add(it)
+        self.interpreters.setdefault(target_lang, []).append(it)
+        self._add_rule(it)
 
     def define_translator(self, impl_lang: str, from_lang: str, to_lang: str) -> None:
         tr = Translator(impl_lang=impl_lang, from_lang=from_lang, to_lang=to_lang)
-        if tr in self.translators:
+        if tr in self._defined:
             raise SimulatorError("Traductor duplicado")
-        self.translators.append(tr)
+        self._defined.add(tr)
+        self.translators.setdefault(from_lang, []).append(tr)
+        self._add_rule(tr)
 
     # --- consulta / utilidades ---
     def list_programs(self) -> List[Program]:
@@ -91,88 +119,169 @@ class Simulator:
         return out
 
     def list_translators(self) -> List[Translator]:
-        return list(self.translators)
+        out = []
+        for lst in self.translators.values():
+            out.extend(lst)
+        return out
 
     # --- búsqueda de plan de ejecución ---
-    def executable_plan_for_program(self, name: str) -> Tuple[bool, Optional[List[PlanStep]]]:
+    def executable_plan_for_program(self, name: str, cheapest: bool = False,
+                                    costs: Optional[Costs] = None) -> Tuple[bool, Optional[List[PlanStep]]]:
         """
         Para el programa 'name', devuelve (True, plan) si es ejecutable;
         plan es una lista de pasos ordenados para ejecutar (o traducir/interpretar).
         Si no es ejecutable devuelve (False, None).
+
+        Por defecto el plan es el primero encontrado. Con cheapest=True (o si se
+        pasa costs) es el de menor costo total: la cantidad de pasos, o la suma
+        de costs[regla] por cada paso (1 para las reglas que no aparecen).
         """
         if name not in self.programs:
             raise SimulatorError(f"Programa '{name}' no definido")
         program = self.programs[name]
-        memo = {}  # memo[lang] = (bool, plan)
-        ok, plan = self._can_execute_language(program.language, memo, path=set())
-        return ok, plan
+        if cheapest or costs is not None:
+            return self._cheapest_plan(program.language, costs)
+        return self._can_execute_language(program.language)
 
-    def _can_execute_language(self, lang: str, memo: Dict[str, Tuple[bool, Optional[List[PlanStep]]]],
-                              path: Set[str]) -> Tuple[bool, Optional[List[PlanStep]]]:
+    def plan_cost(self, plan: List[PlanStep], costs: Optional[Costs] = None) -> float:
+        """Costo total de un plan: número de pasos, o suma de costs por paso."""
+        if costs is None:
+            return float(len(plan))
+        total = 0.0
+        for step in plan:
+            if step["action"] == "interpret":
+                rule = Interpreter(step["implemented_in"], step["interpreted"])
+            else:
+                rule = Translator(step["implemented_in"], step["from"], step["to"])
+            total += costs.get(rule, 1.0)
+        return total
+
+    def _can_execute_language(self, lang: str) -> Tuple[bool, Optional[List[PlanStep]]]:
         """
         Decide si un código en 'lang' puede ser ejecutado por la máquina local.
         Devuelve (True, plan) si es posible, plan es secuencia de pasos.
-        path se usa para detectar ciclos (idiomático DFS).
+        La decisión es una consulta O(1) al índice; el plan se reconstruye
+        siguiendo las reglas guardadas en self._executable.
         """
-        # Caso trivial
-        if lang == LANG_LOCAL:
-            return True, []
-
-        if lang in memo:
-            return memo[lang]
+        if lang not in self._executable:
+            return False, None
+        return True, self._build_plan(lang)
 
-        if lang in path:
-            # ciclo detectado -> no seguir por esta rama
-            memo[lang] = (False, None)
+    def _cheapest_plan(self, lang: str, costs: Optional[Costs]) -> Tuple[bool, Optional[List[PlanStep]]]:
+        """
+        Dijkstra generalizado (Knuth) sobre el grafo de lenguajes: el costo de
+        un lenguaje es el mínimo, entre sus reglas, de costo(regla) más el costo
+        de cada premisa (LOCAL cuesta 0). Una regla se evalúa cuando todas sus
+        premisas tienen costo definitivo, y los lenguajes se fijan en orden de
+        costo; requiere costos no negativos.
+        """
+        if costs is not None and any(c < 0 for c in costs.values()):
+            raise SimulatorError("Los costos deben ser no negativos")
+        if lang not in self._executable:
             return False, None
+        best: Dict[str, Optional[Rule]] = {LANG_LOCAL: None}
+        dist: Dict[str, float] = {LANG_LOCAL: 0.0}
+        settled: Set[str] = set()
+        heap = [(0.0, LANG_LOCAL)]
+        while heap:
+            d, cur = heappop(heap)
+            if cur in settled:
+                continue
+            settled.add(cur)
+            if cur == lang:
+                break
+            for rule in self._uses.get(cur, ()):
+                if isinstance(rule, Interpreter):
+                    goal, cand = rule.target_lang, d
+                else:
+                    impl, to = rule.impl_lang, rule.to_lang
+                    # se evalúa al fijarse la última de sus dos premisas; si son el
+                    # mismo lenguaje, su plan se paga dos veces
+                    if impl not in settled or to not in settled:
+                        continue
+                    goal, cand = rule.from_lang, dist[impl] + dist[to]
+                if goal in settled:
+                    continue
+                cand += 1.0 if costs is None else costs.get(rule, 1.0)
+                if cand < dist.get(goal, float("inf")):
+                    dist[goal] = cand
+                    best[goal] = rule
+                    heappush(heap, (cand, goal))
+        return True, self._build_plan(lang, best)
+
+    def _build_plan(self, lang: str, rules: Optional[Dict[str, Optional[Rule]]] = None) -> List[PlanStep]:
+        """
+        Plan para un lenguaje ejecutable: plan(impl) + [paso] (+ plan(destino)
+        si es traducción), según la regla que `rules` (por defecto el índice)
+        asigna a cada lenguaje. Se arma con una pila explícita en lugar de recursión.
+        """
+        if rules is None:
+            rules = self._executable
+        plan: List[PlanStep] = []
+        # la pila tiene lenguajes por resolver o pasos ya listos para emitir
+        stack: List[object] = [lang]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, dict):
+                plan.append(item)
+                continue
+            rule = rules[item]
+            if rule is None:
+                continue  # LOCAL: ejecución nativa
+            if isinstance(rule, Interpreter):
+                stack.append({"action": "interpret", "interpreted": item,
+                              "implemented_in": rule.impl_lang})
+            else:
+                stack.append(rule.to_lang)
+                stack.append({"action": "translate", "from": item, "to": rule.to_lang,
+                              "implemented_in": rule.impl_lang})
+            stack.append(rule.impl_lang)
+        return plan
+
+    def _add_rule(self, rule: Rule) -> None:
+        for lang in set(_rule_parts(rule)[1]):
+            self._uses.setdefault(lang, []).append(rule)
+        self._propagate([rule])
+
+    def _propagate(self, rules: List[Rule]) -> None:
+        """
+        Agrega reglas al índice de lenguajes ejecutables (punto fijo incremental).
 
-        # marcar en camino
-        path.add(lang)
-
-        # 1) intentamos usar intérpretes que interpreten 'lang'
-        interpreters_for_lang = self.interpreters.get(lang, [])
-        for it in interpreters_for_lang:
-            impl = it.impl_lang
-            # necesitamos ejecutar el intérprete (impl)
-            ok_impl, plan_impl = self._can_execute_language(impl, memo, set(path))
-            if ok_impl:
-                # ejecutar plan_impl para el impl_lang, luego ejecutar el intérprete
-                plan = []
-                if plan_impl:
-                    plan.extend(plan_impl)
-                plan.append({"action": "interpret", "interpreted": lang, "implemented_in": impl})
-                memo[lang] = (True, plan)
-                path.remove(lang)
-                return True, plan
-
-        # 2) intentamos usar traductores que partan de 'lang'
-        for tr in self.translators:
-            if tr.from_lang != lang:
+        Un intérprete hace ejecutable a target_lang cuando impl_lang lo es; un
+        traductor hace ejecutable a from_lang cuando impl_lang y to_lang lo son.
+        Una regla a la que le falta una premisa espera en self._waiting bajo ese
+        lenguaje y se revisa cuando éste se vuelve ejecutable, así que cada regla
+        se procesa a lo sumo una vez por premisa.
+
+        Cada lenguaje conserva la primera regla que lo hizo ejecutable, salvo que
+        se priorizan los intérpretes: un intérprete aplicable reemplaza a un
+        traductor si su implementación es menos profunda que el lenguaje. Como el
+        plan de un lenguaje solo pasa por lenguajes menos profundos, eso garantiza
+        en O(1) que la implementación no depende del propio lenguaje (no hay ciclo).
+        """
+        executable, waiting, depth = self._executable, self._waiting, self._depth
+        work = list(rules)
+        while work:
+            rule = work.pop()
+            goal, premises = _rule_parts(rule)
+            known = goal in executable
+            if known and not (isinstance(rule, Interpreter) and
+                              isinstance(executable[goal], Translator)):
+                continue
+            missing = next((p for p in premises if p not in executable), None)
+            if missing is not None:
+                waiting.setdefault(missing, []).append(rule)
                 continue
-            impl = tr.impl_lang
-            to_lang = tr.to_lang
-            # primero necesitamos poder ejecutar el traductor (impl)
-            ok_impl, plan_impl = self._can_execute_language(impl, memo, set(path))
-            if not ok_impl:
+            if known:
+                # las reglas que esperaban a goal ya se revisaron; solo cambia su plan.
+                # Bajar la profundidad de goal mantiene el invariante de quienes lo usan.
+                if depth[rule.impl_lang] < depth[goal]:
+                    executable[goal] = rule
+                    depth[goal] = depth[rule.impl_lang] + 1
                 continue
-            # si podemos ejecutar el traductor, al usarlo convertimos a 'to_lang'
-            # ahora necesitamos poder ejecutar to_lang
-            ok_to, plan_to = self._can_execute_language(to_lang, memo, set(path))
-            if ok_to:
-                plan = []
-                if plan_impl:
-                    plan.extend(plan_impl)
-                plan.append({"action": "translate", "from": lang, "to": to_lang, "implemented_in": impl})
-                if plan_to:
-                    plan.extend(plan_to)
-                memo[lang] = (True, plan)
-                path.remove(lang)
-                return True, plan
-
-        # no encontramos forma de ejecutar lang
-        memo[lang] = (False, None)
-        path.remove(lang)
-        return False, None
+            executable[goal] = rule
+            depth[goal] = 1 + max(depth[p] for p in premises)
+            work.extend(waiting.pop(goal, ()))
 
     # --- interfaz conversacional mínima ---
     def run_cli(self):
@@ -182,7 +291,7 @@ class Simulator:
         print('  DEFINIR PROGRAMA "nombre" "lenguaje"')
         print('  DEFINIR INTERPRETE "leng_impl" "lenguaje"')
         print('  DEFINIR TRADUCTOR "leng_impl" "origen" "destino"')
-        print('  EJECUTABLE "nombre"')
+        print('  EJECUTABLE "nombre" [MINIMO]')
         print('  LISTAR')
         print('  SALIR')
         while True:
@@ -201,11 +310,11 @@ class Simulator:
                 if cmd == "DEFINIR":
                     self._handle_definir(toks[1:])
                 elif cmd == "EJECUTABLE":
-                    if len(toks) != 2:
-                        print("Uso: EJECUTABLE \"nombre\"")
+                    if len(toks) not in (2, 3) or (len(toks) == 3 and toks[2].upper() != "MINIMO"):
+                        print("Uso: EJECUTABLE \"nombre\" [MINIMO]")
                         continue
                     name = self._strip_quotes(toks[1])
-                    ok, plan = self.executable_plan_for_program(name)
+                    ok, plan = self.executable_plan_for_program(name, cheapest=len(toks) == 3)
                     if ok:
                         print(f"Programa '{name}' es EJECUTABLE. Plan:")
                         for i, step in enumerate(plan, 1):
@@ -302,5 +411,5 @@ class Simulator:
             for it in lst:
                 print(f"  interpreta {it.target_lang} implementado en {it.impl_lang}")
         print("Traductores definidos:")
-        for tr in self.translators:
+        for tr in self.list_translators():
             print(f"  traduce {tr.from_lang} -> {tr.to_lang} implementado en {tr.impl_lang}")
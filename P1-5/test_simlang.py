@@ -2,7 +2,7 @@
 # Kevin Briceño 15-11661
 # Pruebas unitarias para simlang.py
 import pytest
-from simlang import Simulator, SimulatorError, LANG_LOCAL
+from simlang import Simulator, SimulatorError, LANG_LOCAL, Interpreter
 
 def test_define_and_execute_local():
     s = Simulator()
@@ -87,3 +87,187 @@ def test_cli_tokenize_and_strip():
     toks = s._tokenize('DEFINIR PROGRAMA "p" "L1"')
     assert toks == ["DEFINIR", "PROGRAMA", '"p"', '"L1"']
     assert s._strip_quotes('"ABC"') == "ABC"
+
+def test_incremental_index_updates_after_query():
+    s = Simulator()
+    s.define_program("p", "A")
+    s.define_translator("T", "A", "B")   # T y B aún no son ejecutables
+    assert s.executable_plan_for_program("p") == (False, None)
+    s.define_interpreter("C", "B")
+    assert s.executable_plan_for_program("p") == (False, None)
+    # al hacer ejecutable C se vuelven ejecutables B y luego A (falta T)
+    s.define_interpreter(LANG_LOCAL, "C")
+    assert s.executable_plan_for_program("p") == (False, None)
+    s.define_interpreter(LANG_LOCAL, "T")
+    ok, plan = s.executable_plan_for_program("p")
+    assert ok
+    assert [st["action"] for st in plan] == ["interpret", "translate", "interpret", "interpret"]
+    assert plan[1] == {"action": "translate", "from": "A", "to": "B", "implemented_in": "T"}
+    assert plan[2]["interpreted"] == "C" and plan[3]["interpreted"] == "B"
+
+def test_interpreter_replaces_translator_unless_it_would_cycle():
+    s = Simulator()
+    s.define_program("p", "A")
+    s.define_program("q", "Q")
+    s.define_translator(LANG_LOCAL, "A", "B")
+    s.define_interpreter(LANG_LOCAL, "B")
+    s.define_translator(LANG_LOCAL, "Q", "A")   # Q depende del plan de A
+    # B2 solo es ejecutable a través de A: su intérprete de A formaría un ciclo
+    s.define_translator(LANG_LOCAL, "B2", "A")
+    s.define_interpreter("B2", "A")
+    ok, plan = s.executable_plan_for_program("p")
+    assert ok and [st["action"] for st in plan] == ["translate", "interpret"]
+    # un intérprete de A implementado en algo independiente sí lo reemplaza,
+    # y los planes que pasan por A lo ven
+    s.define_interpreter("C", "A")
+    s.define_interpreter(LANG_LOCAL, "C")
+    ok, plan = s.executable_plan_for_program("q")
+    assert ok and plan == [
+        {"action": "translate", "from": "Q", "to": "A", "implemented_in": LANG_LOCAL},
+        {"action": "interpret", "interpreted": "C", "implemented_in": LANG_LOCAL},
+        {"action": "interpret", "interpreted": "A", "implemented_in": "C"},
+    ]
+
+def test_interpreters_replacing_a_translator_chain_stay_incremental():
+    n = 20_000
+    s = Simulator()
+    s.define_program("p", f"C{n - 1}")
+    s.define_interpreter(LANG_LOCAL, "C0")
+    for i in range(1, n):
+        s.define_translator(LANG_LOCAL, f"C{i}", f"C{i - 1}")
+    # cada intérprete reemplaza a un traductor cuyo plan recorre toda la cadena;
+    # decidirlo no debe recorrer el plan (antes era más que cuadrático)
+    for i in range(1, n):
+        s.define_interpreter(f"C{i - 1}", f"C{i}")
+    ok, plan = s.executable_plan_for_program("p")
+    assert ok and len(plan) == n and all(st["action"] == "interpret" for st in plan)
+    assert plan[-1] == {"action": "interpret", "interpreted": f"C{n - 1}",
+                        "implemented_in": f"C{n - 2}"}
+
+def test_plan_independent_of_definition_order():
+    defs = [("I", LANG_LOCAL, "X"), ("T", "X", "A", "B"), ("I", "X", "B")]
+    plans = []
+    for order in (defs, defs[::-1]):
+        s = Simulator()
+        s.define_program("p", "A")
+        for d in order:
+            (s.define_interpreter if d[0] == "I" else s.define_translator)(*d[1:])
+        ok, plan = s.executable_plan_for_program("p")
+        assert ok
+        plans.append(plan)
+    assert plans[0] == plans[1]
+    # el plan devuelto es una copia: modificarlo no afecta consultas futuras
+    plans[0].clear()
+    assert s.executable_plan_for_program("p")[1] == plans[1]
+
+def test_translators_indexed_by_source():
+    s = Simulator()
+    s.define_translator("L0", "A", "B")
+    s.define_translator("L0", "A", "C")
+    s.define_translator("L1", "B", "C")
+    s.define_interpreter("L0", "A")
+    assert [tr.to_lang for tr in s.translators["A"]] == ["B", "C"]
+    assert [tr.from_lang for tr in s.translators["B"]] == ["B"]
+    assert len(s.list_translators()) == 3 and len(s.list_interpreters()) == 1
+    # un intérprete y un traductor con los mismos lenguajes no se confunden
+    s.define_interpreter("L1", "B")
+    with pytest.raises(SimulatorError):
+        s.define_translator("L1", "B", "C")
+
+def test_cheapest_plan_by_steps_and_costs():
+    s = Simulator()
+    s.define_program("p", "A")
+    s.define_translator(LANG_LOCAL, "A", "B")
+    s.define_translator(LANG_LOCAL, "B", "C")
+    s.define_interpreter(LANG_LOCAL, "C")
+    s.define_interpreter(LANG_LOCAL, "A")  # alternativa directa, definida después
+    direct = [{"action": "interpret", "interpreted": "A", "implemented_in": LANG_LOCAL}]
+    # por defecto se prioriza el intérprete aunque se haya definido después
+    assert s.executable_plan_for_program("p") == (True, direct)
+    ok, shortest = s.executable_plan_for_program("p", cheapest=True)
+    assert ok and shortest == direct
+    # un intérprete lento (factor 10) hace preferible la cadena de traducciones
+    costs = {Interpreter(LANG_LOCAL, "A"): 10.0}
+    ok, cheap = s.executable_plan_for_program("p", costs=costs)
+    assert ok and [st["action"] for st in cheap] == ["translate", "translate", "interpret"]
+    assert s.plan_cost(cheap, costs) == 3.0 and s.plan_cost(shortest, costs) == 10.0
+    with pytest.raises(SimulatorError):
+        s.executable_plan_for_program("p", costs={Interpreter(LANG_LOCAL, "A"): -1.0})
+
+def test_cheapest_plan_counts_shared_subplans():
+    s = Simulator()
+    s.define_program("p", "A")
+    # traductor A -> X implementado en X: el plan de X se paga dos veces
+    s.define_interpreter("M", "X")
+    s.define_interpreter(LANG_LOCAL, "M")
+    s.define_translator("X", "A", "X")
+    # alternativa: intérprete de A implementado en una cadena de 3 intérpretes
+    s.define_interpreter("N2", "A")
+    s.define_interpreter("N1", "N2")
+    s.define_interpreter(LANG_LOCAL, "N1")
+    ok, plan = s.executable_plan_for_program("p", cheapest=True)
+    assert ok and len(plan) == 3 and plan[-1]["interpreted"] == "A"
+    s.define_program("q", "Z")
+    assert s.executable_plan_for_program("q", cheapest=True) == (False, None)
+
+def test_language_blocked_by_cycle_is_not_cached_as_unexecutable():
+    # A -> B -> A es un ciclo, pero A también es ejecutable directamente;
+    # B (intérprete implementado en A) debe quedar ejecutable
+    s = Simulator()
+    s.define_program("p", "D")
+    s.define_interpreter("B", "A")
+    s.define_interpreter("A", "B")
+    s.define_interpreter(LANG_LOCAL, "A")
+    s.define_translator("A", "D", "B")
+    ok, plan = s.executable_plan_for_program("p")
+    assert ok
+    assert plan == [
+        {"action": "interpret", "interpreted": "A", "implemented_in": LANG_LOCAL},
+        {"action": "translate", "from": "D", "to": "B", "implemented_in": "A"},
+        {"action": "interpret", "interpreted": "A", "implemented_in": LANG_LOCAL},
+        {"action": "interpret", "interpreted": "B", "implemented_in": "A"},
+    ]
+
+def test_cycles_resolve_when_exit_is_defined_later():
+    s = Simulator()
+    s.define_program("p", "A")
+    s.define_program("q", "S")
+    s.define_translator("L1", "A", "B")
+    s.define_translator("L1", "B", "A")
+    s.define_interpreter("S", "S")   # un intérprete implementado en sí mismo
+    s.define_interpreter("L1", "L1")
+    assert not s.executable_plan_for_program("p")[0]
+    s.define_interpreter("B", "L1")  # L1 depende del ciclo A <-> B
+    assert not s.executable_plan_for_program("p")[0]
+    s.define_interpreter(LANG_LOCAL, "B")
+    ok, plan = s.executable_plan_for_program("p")
+    assert ok and plan[-2:] == [
+        {"action": "translate", "from": "A", "to": "B", "implemented_in": "L1"},
+        {"action": "interpret", "interpreted": "B", "implemented_in": LANG_LOCAL},
+    ]
+    for cheapest in (False, True):
+        assert s.executable_plan_for_program("q", cheapest=cheapest) == (False, None)
+
+def test_long_chain_without_recursion():
+    n = 100_000
+    s = Simulator()
+    s.define_program("p", f"C{n - 1}")
+    # cadena de n lenguajes que alterna intérpretes (C{i-1} interpreta C{i}) y
+    # traductores (C{i} -> C{i-1}); en orden inverso, todo queda pendiente
+    # hasta la última definición
+    for i in range(n - 1, 0, -1):
+        if i % 2:
+            s.define_translator(LANG_LOCAL, f"C{i}", f"C{i - 1}")
+        else:
+            s.define_interpreter(f"C{i - 1}", f"C{i}")
+    assert s.executable_plan_for_program("p") == (False, None)
+    s.define_interpreter(LANG_LOCAL, "C0")
+    for cheapest in (False, True):
+        ok, plan = s.executable_plan_for_program("p", cheapest=cheapest)
+        assert ok and len(plan) == n
+        assert plan[0] == {"action": "translate", "from": f"C{n - 1}", "to": f"C{n - 2}",
+                           "implemented_in": LANG_LOCAL}
+        # primero todas las traducciones hasta C0; luego los intérpretes, de adentro hacia afuera
+        assert plan[n // 2] == {"action": "interpret", "interpreted": "C0", "implemented_in": LANG_LOCAL}
+        assert plan[-1] == {"action": "interpret", "interpreted": f"C{n - 2}",
+                            "implemented_in": f"C{n - 3}"}